@@ -1,11 +1,14 @@
+import asyncio
 import time
 from abc import ABC, abstractmethod
 from contextlib import asynccontextmanager
-from typing import List, Optional
+from itertools import islice
+from typing import Any, Callable, List, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
-from app.llm import LLM
+from app.journal import SessionJournal
+from app.llm import LLM, budget_usage
 from app.logger import logger
 from app.sandbox.client import SANDBOX_CLIENT
 from app.schema import ROLE_TYPE, AgentState, Memory, Message
@@ -43,8 +46,16 @@ class BaseAgent(BaseModel, ABC):
 
     duplicate_threshold: int = 2
 
+    # Minimum seconds between the starts of consecutive steps
     interval: float = 0.2
 
+    # Called with the agent and the step result after every step
+    on_step: Optional[Callable[["BaseAgent", str], Any]] = Field(None, exclude=True)
+
+    journal: Optional[SessionJournal] = Field(
+        None, exclude=True, description="Journal recording the session for resume"
+    )
+
     class Config:
         arbitrary_types_allowed = True
         extra = "allow"  # Allow extra fields for flexibility in subclasses
@@ -56,8 +67,88 @@ class BaseAgent(BaseModel, ABC):
             self.llm = LLM(config_name=self.name.lower())
         if not isinstance(self.memory, Memory):
             self.memory = Memory()
+        if self.memory.token_counter is None:
+            self.memory.set_token_counter(self.llm.token_counter.count_message)
+        if self.journal is not None:
+            self.attach_journal(self.journal)
         return self
 
+    def attach_journal(self, journal: SessionJournal) -> None:
+        """Record messages and completed steps to journal from now on."""
+        self.journal = journal
+        self.memory.on_add = lambda message: journal.append(
+            "message", agent=self.name, message=message.model_dump()
+        )
+
+    def checkpoint(self) -> None:
+        """Journal the current step, state and token totals"""
+        if self.journal is None:
+            return
+        # Within a session the budget scope holds the session's own usage
+        usage = budget_usage()
+        self.journal.append(
+            "checkpoint",
+            agent=self.name,
+            step=self.current_step,
+            state=self.state.value,
+            input_tokens=usage.input_tokens if usage else self.llm.total_input_tokens,
+            completion_tokens=(
+                usage.completion_tokens if usage else self.llm.total_completion_tokens
+            ),
+        )
+
+    def resume(self) -> bool:
+        """Restore memory, current_step and token totals from the journal.
+
+        Only messages journaled before the last checkpoint are restored, so
+        a step interrupted by a crash is run again by the next ``run()``.
+        Token totals go to the current budget scope if there is one, and to
+        the LLM's totals otherwise.
+
+        Returns:
+            Whether the journal had a checkpoint for this agent.
+        """
+        if self.journal is None:
+            raise ValueError("Agent has no journal to resume from")
+
+        messages: List[Message] = []
+        pending: List[Message] = []
+        last_checkpoint = None
+        for record in self.journal.records():
+            if record.get("agent") != self.name:
+                continue
+            if record["type"] == "message":
+                pending.append(Message.model_validate(record["message"]))
+            elif record["type"] == "checkpoint":
+                messages += pending
+                pending = []
+                last_checkpoint = record
+        if last_checkpoint is None:
+            return False
+
+        self.memory.set_messages(messages)
+        self.current_step = last_checkpoint["step"]
+        usage = budget_usage()
+        if usage is not None:
+            usage.input_tokens = max(
+                usage.input_tokens, last_checkpoint["input_tokens"]
+            )
+            usage.completion_tokens = max(
+                usage.completion_tokens, last_checkpoint["completion_tokens"]
+            )
+        else:
+            self.llm.total_input_tokens = max(
+                self.llm.total_input_tokens, last_checkpoint["input_tokens"]
+            )
+            self.llm.total_completion_tokens = max(
+                self.llm.total_completion_tokens, last_checkpoint["completion_tokens"]
+            )
+        logger.info(
+            f"Resumed {self.name} at step {self.current_step} "
+            f"with {len(messages)} messages"
+        )
+        return True
+
     @asynccontextmanager
     async def state_context(self, new_state: AgentState):
         """Context manager for safe agent state transitions.
@@ -133,6 +224,7 @@ class BaseAgent(BaseModel, ABC):
 
         if request:
             self.update_memory("user", request)
+            self.checkpoint()
 
         results: List[str] = []
         async with self.state_context(AgentState.RUNNING):
@@ -141,6 +233,7 @@ class BaseAgent(BaseModel, ABC):
             ):
                 self.current_step += 1
                 logger.info(f"Executing step {self.current_step}/{self.max_steps}")
+                step_started = time.monotonic()
                 step_result = await self.step()
 
                 # Check for stuck state
@@ -148,15 +241,34 @@ class BaseAgent(BaseModel, ABC):
                     self.handle_stuck_state()
 
                 results.append(f"Step {self.current_step}: {step_result}")
-                time.sleep(self.interval)
+                self.checkpoint()
+                if self.on_step is not None:
+                    callback_result = self.on_step(self, step_result)
+                    if asyncio.iscoroutine(callback_result):
+                        await callback_result
+                await self.pace(step_started)
 
             if self.current_step >= self.max_steps:
                 self.current_step = 0
                 self.state = AgentState.IDLE
                 results.append(f"Terminated: Reached max steps ({self.max_steps})")
+                self.checkpoint()
         await SANDBOX_CLIENT.cleanup()
         return "\n".join(results) if results else "No steps executed"
 
+    async def pace(self, step_started: float) -> None:
+        """Wait before the next step without blocking the event loop.
+
+        The default policy keeps step starts at least ``interval`` seconds
+        apart and always yields to other tasks. Override for other pacing,
+        e.g. a shared budget across agents.
+
+        Args:
+            step_started: ``time.monotonic()`` at the start of the last step.
+        """
+        remaining = self.interval - (time.monotonic() - step_started)
+        await asyncio.sleep(max(remaining, 0))
+
     @abstractmethod
     async def step(self) -> str:
         """Execute a single step in the agent's workflow.
@@ -183,7 +295,7 @@ class BaseAgent(BaseModel, ABC):
         # Count identical content occurrences
         duplicate_count = sum(
             1
-            for msg in reversed(self.memory.messages[:-1])
+            for msg in islice(reversed(self.memory.messages), 1, None)
             if msg.role == "assistant" and msg.content == last_message.content
         )
 
@@ -197,4 +309,4 @@ class BaseAgent(BaseModel, ABC):
     @messages.setter
     def messages(self, value: List[Message]):
         """Set the list of messages in the agent's memory."""
-        self.memory.messages = value
+        self.memory.set_messages(value)
@@ -1,15 +1,18 @@
 import asyncio
 import json
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from pydantic import Field
+from pydantic import Field, model_validator
 
 from app.agent.react import ReActAgent
-from app.exceptions import TokenLimitExceeded
+from app.compaction import ContextCompactor, get_compactor
+from app.exceptions import TokenLimitExceeded, ToolStreamInterrupted
 from app.logger import logger
+from app.observation import get_observation_store
 from app.prompt.toolcall import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, ToolCall, ToolChoice
 from app.tool import CreateChatCompletion, Terminate, ToolCollection
+from app.tool.read_observation import ReadObservation
 
 
 TOOL_CALL_REQUIRED = "Tool calls required but none provided"
@@ -31,17 +34,61 @@ class ToolCallAgent(ReActAgent):
     special_tool_names: List[str] = Field(default_factory=lambda: [Terminate().name])
 
     tool_calls: List[ToolCall] = Field(default_factory=list)
-    _current_base64_image: Optional[str] = None
+    # Images produced by tool calls, keyed by tool call id until consumed
+    _tool_images: Dict[str, str] = {}
+
+    # Stream tool calls and start executing each one as soon as its arguments
+    # are complete, while the model is still generating the rest
+    stream_tool_calls: bool = False
+    _dispatched_tools: Dict[str, asyncio.Task] = {}
+    _dispatched_names: Dict[str, str] = {}
+
+    # Run independent calls to parallel-safe tools concurrently within a step
+    parallel_tool_calls: bool = False
+    max_parallel_tools: int = 4
 
     max_steps: int = 30
+    # Tool outputs longer than this are saved to a file and observed as their
+    # head and tail, which the agent can page through with read_observation
     max_observe: Optional[Union[int, bool]] = None
 
+    # Replaces old tool results with summaries once memory grows too large
+    compactor: Optional[ContextCompactor] = Field(
+        default_factory=get_compactor, exclude=True
+    )
+
+    @model_validator(mode="after")
+    def add_observation_reader(self) -> "ToolCallAgent":
+        """Give agents with bounded observations a way to read spilled outputs."""
+        if self.max_observe and ReadObservation().name not in (
+            self.available_tools.tool_map
+        ):
+            # A new collection, as the default one is shared between agents
+            self.available_tools = ToolCollection(
+                *self.available_tools.tools, ReadObservation()
+            )
+        return self
+
     async def think(self) -> bool:
         """Process current state and decide next actions using tools"""
         if self.next_step_prompt:
             user_msg = Message.user_message(self.next_step_prompt)
-            self.messages += [user_msg]
+            self.memory.add_message(user_msg)
+
+        if self.compactor is not None:
+            record = await self.compactor.compact(self.memory)
+            if record is not None and self.journal is not None:
+                self.journal.append(
+                    "compaction",
+                    agent=self.name,
+                    step=self.current_step,
+                    tokens_saved=record.tokens_saved,
+                    **record.model_dump(),
+                )
 
+        self._dispatched_tools = {}
+        self._dispatched_names = {}
+        early_dispatch = self.stream_tool_calls and self.tool_choices != ToolChoice.NONE
         try:
             # Get response with tool options
             response = await self.llm.ask_tool(
@@ -53,16 +100,35 @@ class ToolCallAgent(ReActAgent):
                 ),
                 tools=self.available_tools.to_params(),
                 tool_choice=self.tool_choices,
+                stream=self.stream_tool_calls,
+                on_tool_call=self._dispatch_tool_call if early_dispatch else None,
             )
         except ValueError:
+            self._cancel_dispatched_tools()
             raise
-        except Exception as e:
-            # Check if this is a RetryError containing TokenLimitExceeded
-            if hasattr(e, "__cause__") and isinstance(e.__cause__, TokenLimitExceeded):
-                token_limit_error = e.__cause__
-                logger.error(
-                    f"🚨 Token limit error (from RetryError): {token_limit_error}"
+        except ToolStreamInterrupted as e:
+            # Calls that already ran can't be undone, and the response that
+            # asked for them is lost; note them so the next step can re-plan
+            started = [
+                f"{call_id} ({self._dispatched_names.get(call_id, 'unknown')})"
+                for call_id in e.dispatched
+            ]
+            self._cancel_dispatched_tools()
+            logger.error(f"🚨 {e}")
+            self.memory.add_message(
+                Message.assistant_message(
+                    f"The response was interrupted after starting tool calls "
+                    f"{', '.join(started)}. They may have run; check their effects "
+                    f"before repeating them."
                 )
+            )
+            return False
+        except Exception as e:
+            self._cancel_dispatched_tools()
+            # TokenLimitExceeded is never retried, but may arrive wrapped
+            token_limit_error = e if isinstance(e, TokenLimitExceeded) else e.__cause__
+            if isinstance(token_limit_error, TokenLimitExceeded):
+                logger.error(f"🚨 Token limit error: {token_limit_error}")
                 self.memory.add_message(
                     Message.assistant_message(
                         f"Maximum token limit reached, cannot continue execution: {str(token_limit_error)}"
@@ -75,6 +141,8 @@ class ToolCallAgent(ReActAgent):
         self.tool_calls = tool_calls = (
             response.tool_calls if response and response.tool_calls else []
         )
+        # Drop early-dispatched calls that did not make it into the final response
+        self._cancel_dispatched_tools(keep={call.id for call in tool_calls})
         content = response.content if response and response.content else ""
 
         # Log response info
@@ -138,15 +206,8 @@ class ToolCallAgent(ReActAgent):
             return self.messages[-1].content or "No content or commands to execute"
 
         results = []
-        for command in self.tool_calls:
-            # Reset base64_image for each tool call
-            self._current_base64_image = None
-
-            result = await self.execute_tool(command)
-
-            if self.max_observe:
-                result = result[: self.max_observe]
-
+        outcomes = await self._execute_tool_calls(self.tool_calls)
+        for command, (result, base64_image) in zip(self.tool_calls, outcomes):
             logger.info(
                 f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
             )
@@ -156,13 +217,97 @@ class ToolCallAgent(ReActAgent):
                 content=result,
                 tool_call_id=command.id,
                 name=command.function.name,
-                base64_image=self._current_base64_image,
+                base64_image=base64_image,
             )
             self.memory.add_message(tool_msg)
             results.append(result)
 
         return "\n\n".join(results)
 
+    async def _execute_tool_calls(
+        self, commands: List[ToolCall]
+    ) -> List[Tuple[str, Optional[str]]]:
+        """Execute tool calls and return their results in call order.
+
+        In parallel mode, consecutive calls to parallel-safe tools run together
+        under ``max_parallel_tools``. A call to any other tool, or one that
+        conflicts with a call in the running group, waits for the group to
+        finish first.
+        """
+        semaphore = asyncio.Semaphore(max(1, self.max_parallel_tools))
+
+        async def run(command: ToolCall) -> Tuple[str, Optional[str]]:
+            # Await calls already started while the response was streaming
+            task = self._dispatched_tools.pop(command.id, None)
+            if task:
+                return await task
+            async with semaphore:
+                return await self._execute_with_image(command)
+
+        outcomes: List[Tuple[str, Optional[str]]] = []
+        group: List[ToolCall] = []
+        keys: set = set()
+        for command in commands:
+            key = self._parallel_key(command) if self.parallel_tool_calls else None
+            if group and (key is None or key in keys):
+                outcomes.extend(await asyncio.gather(*(run(c) for c in group)))
+                group, keys = [], set()
+            if key is None:
+                outcomes.append(await run(command))
+            else:
+                group.append(command)
+                keys.add(key)
+        if group:
+            outcomes.extend(await asyncio.gather(*(run(c) for c in group)))
+        return outcomes
+
+    def _parallel_key(self, command: ToolCall) -> Optional[str]:
+        """Return the conflict key of a call that may run concurrently, else None"""
+        name = command.function.name
+        tool = self.available_tools.get_tool(name)
+        if tool is None or not tool.parallel_safe or self._is_special_tool(name):
+            return None
+        try:
+            args = json.loads(command.function.arguments or "{}")
+        except json.JSONDecodeError:
+            return None
+        return f"{name}:{tool.conflict_key(**args) or command.id}"
+
+    def _dispatch_tool_call(self, command: ToolCall) -> None:
+        """Start executing a streamed tool call before the response completes.
+
+        Dispatched calls are chained so they still run one at a time in call order.
+        """
+        previous = next(reversed(self._dispatched_tools.values()), None)
+        logger.info(f"⚡ Early dispatch of tool '{command.function.name}'")
+        self._dispatched_names[command.id] = command.function.name
+        self._dispatched_tools[command.id] = asyncio.create_task(
+            self._execute_after(previous, command)
+        )
+
+    async def _execute_after(
+        self, previous: Optional[asyncio.Task], command: ToolCall
+    ) -> Tuple[str, Optional[str]]:
+        """Execute a tool call once the previously dispatched call has finished"""
+        if previous is not None:
+            await asyncio.wait([previous])
+        return await self._execute_with_image(command)
+
+    def _cancel_dispatched_tools(self, keep: Optional[set] = None) -> None:
+        """Cancel early-dispatched tool calls, except those whose id is in keep"""
+        for call_id in list(self._dispatched_tools):
+            if keep and call_id in keep:
+                continue
+            task = self._dispatched_tools.pop(call_id)
+            if not task.done():
+                logger.warning(f"Cancelling early-dispatched tool call {call_id}")
+                task.cancel()
+
+    async def _execute_with_image(self, command: ToolCall) -> Tuple[str, Optional[str]]:
+        """Execute a tool call and capture the base64 image it produced, if any"""
+        result = await self.execute_tool(command)
+        return result, self._tool_images.pop(command.id, None)
+
     async def execute_tool(self, command: ToolCall) -> str:
         """Execute a single tool call with robust error handling"""
         if not command or not command.function or not command.function.name:
@@ -186,26 +331,37 @@ class ToolCallAgent(ReActAgent):
             # Check if result is a ToolResult with base64_image
             if hasattr(result, "base64_image") and result.base64_image:
                 # Store the base64_image for later use in tool_message
-                self._current_base64_image = result.base64_image
+                self._tool_images[command.id] = result.base64_image
 
             # Format result for display (standard case)
-            observation = (
-                f"Observed output of cmd `{name}` executed:\n{str(result)}"
-                if result
-                else f"Cmd `{name}` completed with no output"
-            )
-
-            return observation
+            if not result:
+                return f"Cmd `{name}` completed with no output"
+            header = f"Observed output of cmd `{name}` executed:\n"
+            return header + await self._observe(str(result), len(header))
         except json.JSONDecodeError:
             error_msg = f"Error parsing arguments for {name}: Invalid JSON format"
             logger.error(
                 f"📝 Oops! The arguments for '{name}' don't make sense - invalid JSON, arguments:{command.function.arguments}"
             )
-            return f"Error: {error_msg}"
+            return "Error: " + await self._observe(error_msg, len("Error: "))
         except Exception as e:
             error_msg = f"⚠️ Tool '{name}' encountered a problem: {str(e)}"
             logger.exception(error_msg)
-            return f"Error: {error_msg}"
+            return "Error: " + await self._observe(error_msg, len("Error: "))
+
+    async def _observe(self, output: str, reserved: int = 0) -> str:
+        """Bound a tool output to max_observe, spilling the full output to disk.
+
+        Spilled outputs can be many megabytes, so they are written in a worker
+        thread rather than on the event loop.
+        """
+        if not self.max_observe or len(output) + reserved <= self.max_observe:
+            return output
+        summary = await asyncio.to_thread(
+            get_observation_store().spill, output, max(0, self.max_observe - reserved)
+        )
+        logger.info(f"📦 Saved {len(output)} characters of tool output to disk")
+        return summary
 
     async def _handle_special_tool(self, name: str, result: Any, **kwargs):
         """Handle special tool execution and state changes"""
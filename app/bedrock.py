@@ -1,16 +1,18 @@
+import asyncio
 import json
 import sys
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Literal, Optional
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Optional
 
 import boto3
+from botocore.config import Config
 
-
-# Global variables to track the current tool use ID across function calls
-# Tmp solution
-CURRENT_TOOLUSE_ID = None
+from app.streaming import StreamSink, get_stream_sink
 
 
 # Class to handle OpenAI-style response formatting
@@ -36,11 +38,19 @@ class OpenAIResponse:
 
 # Main client class for interacting with Amazon Bedrock
 class BedrockClient:
-    def __init__(self):
-        # Initialize Bedrock client, you need to configure AWS env first
+    def __init__(self, max_workers: int = 16, timeout: float = 600.0):
+        # Initialize Bedrock client, you need to configure AWS env first.
+        # boto3 is synchronous, so calls run on a bounded worker pool and the
+        # event loop only awaits them
         try:
-            self.client = boto3.client("bedrock-runtime")
-            self.chat = Chat(self.client)
+            self.client = boto3.client(
+                "bedrock-runtime",
+                config=Config(read_timeout=timeout, max_pool_connections=max_workers),
+            )
+            self.executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="bedrock"
+            )
+            self.chat = Chat(self.client, self.executor, timeout)
         except Exception as e:
             print(f"Error initializing Bedrock client: {e}")
             sys.exit(1)
@@ -48,14 +58,66 @@ class BedrockClient:
 
 # Chat interface class
 class Chat:
-    def __init__(self, client):
-        self.completions = ChatCompletions(client)
+    def __init__(self, client, executor: ThreadPoolExecutor, timeout: float):
+        self.completions = ChatCompletions(client, executor, timeout)
 
 
 # Core class handling chat completions functionality
 class ChatCompletions:
-    def __init__(self, client):
+    # Maximum stream events buffered ahead of the consumer
+    STREAM_BUFFER_SIZE = 64
+
+    def __init__(self, client, executor: ThreadPoolExecutor, timeout: float):
         self.client = client
+        self.executor = executor
+        self.timeout = timeout
+
+    async def _run(self, func: Callable[..., Any], **kwargs) -> Any:
+        # Run a blocking boto3 call on the worker pool with a timeout
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self.executor, partial(func, **kwargs)),
+            self.timeout,
+        )
+
+    async def _iterate_stream(self, stream) -> AsyncIterator[dict]:
+        # Read a boto3 event stream on the worker pool and hand events to the
+        # event loop through a bounded queue. The timeout applies between events
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.STREAM_BUFFER_SIZE)
+        finished = object()
+        stopped = threading.Event()
+
+        def put(item) -> None:
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def pump() -> None:
+            try:
+                for event in stream:
+                    if stopped.is_set():
+                        return
+                    put(event)
+            except Exception as e:
+                if not stopped.is_set():
+                    put(e)
+                return
+            if not stopped.is_set():
+                put(finished)
+
+        loop.run_in_executor(self.executor, pump)
+        try:
+            while True:
+                item = await asyncio.wait_for(queue.get(), self.timeout)
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+            # Unblock a pending put so the worker thread can exit
+            while not queue.empty():
+                queue.get_nowait()
 
     def _convert_openai_tools_to_bedrock_format(self, tools):
         # Convert OpenAI function calling format to Bedrock tool format
@@ -83,52 +145,64 @@ class ChatCompletions:
                 bedrock_tools.append(bedrock_tool)
         return bedrock_tools
 
+    @staticmethod
+    def _text_blocks(content) -> List[dict]:
+        # Bedrock rejects empty text blocks, so only non-empty text is kept
+        if isinstance(content, list):
+            texts = [
+                item.get("text", "") if isinstance(item, dict) else str(item)
+                for item in content
+            ]
+            return [{"text": text} for text in texts if text]
+        return [{"text": content}] if content else []
+
     def _convert_openai_messages_to_bedrock_format(self, messages):
-        # Convert OpenAI message format to Bedrock message format
+        # Convert OpenAI message format to Bedrock message format. Every tool
+        # call of an assistant turn becomes a toolUse block, and the matching
+        # tool results are merged into the following user turn by toolUseId
         bedrock_messages = []
         system_prompt = []
         for message in messages:
-            if message.get("role") == "system":
-                system_prompt = [{"text": message.get("content")}]
-            elif message.get("role") == "user":
-                bedrock_message = {
-                    "role": message.get("role", "user"),
-                    "content": [{"text": message.get("content")}],
-                }
-                bedrock_messages.append(bedrock_message)
-            elif message.get("role") == "assistant":
-                bedrock_message = {
-                    "role": "assistant",
-                    "content": [{"text": message.get("content")}],
-                }
-                openai_tool_calls = message.get("tool_calls", [])
-                if openai_tool_calls:
-                    bedrock_tool_use = {
-                        "toolUseId": openai_tool_calls[0]["id"],
-                        "name": openai_tool_calls[0]["function"]["name"],
-                        "input": json.loads(
-                            openai_tool_calls[0]["function"]["arguments"]
-                        ),
-                    }
-                    bedrock_message["content"].append({"toolUse": bedrock_tool_use})
-                    global CURRENT_TOOLUSE_ID
-                    CURRENT_TOOLUSE_ID = openai_tool_calls[0]["id"]
-                bedrock_messages.append(bedrock_message)
-            elif message.get("role") == "tool":
-                bedrock_message = {
-                    "role": "user",
-                    "content": [
+            role = message.get("role")
+            if role == "system":
+                system_prompt.extend(self._text_blocks(message.get("content")))
+                continue
+            elif role == "user":
+                content = self._text_blocks(message.get("content"))
+            elif role == "assistant":
+                content = self._text_blocks(message.get("content"))
+                for tool_call in message.get("tool_calls") or []:
+                    arguments = tool_call["function"].get("arguments") or "{}"
+                    content.append(
                         {
-                            "toolResult": {
-                                "toolUseId": CURRENT_TOOLUSE_ID,
-                                "content": [{"text": message.get("content")}],
+                            "toolUse": {
+                                "toolUseId": tool_call["id"],
+                                "name": tool_call["function"]["name"],
+                                "input": json.loads(arguments),
                             }
                         }
-                    ],
-                }
-                bedrock_messages.append(bedrock_message)
+                    )
+            elif role == "tool":
+                role = "user"
+                content = [
+                    {
+                        "toolResult": {
+                            "toolUseId": message.get("tool_call_id"),
+                            "content": self._text_blocks(message.get("content"))
+                            or [{"text": "."}],
+                        }
+                    }
+                ]
             else:
                 raise ValueError(f"Invalid role: {message.get('role')}")
+
+            if not content:
+                continue
+            # Bedrock requires alternating roles, so consecutive turns are merged
+            if bedrock_messages and bedrock_messages[-1]["role"] == role:
+                bedrock_messages[-1]["content"].extend(content)
+            else:
+                bedrock_messages.append({"role": role, "content": content})
         return system_prompt, bedrock_messages
 
     def _convert_bedrock_response_to_openai_format(self, bedrock_response):
@@ -146,14 +220,12 @@ class ChatCompletions:
             for content_item in bedrock_response["output"]["message"]["content"]:
                 if content_item.get("toolUse"):
                     bedrock_tool_use = content_item["toolUse"]
-                    global CURRENT_TOOLUSE_ID
-                    CURRENT_TOOLUSE_ID = bedrock_tool_use["toolUseId"]
                     openai_tool_call = {
-                        "id": CURRENT_TOOLUSE_ID,
+                        "id": bedrock_tool_use["toolUseId"],
                         "type": "function",
                         "function": {
                             "name": bedrock_tool_use["name"],
-                            "arguments": json.dumps(bedrock_tool_use["input"]),
+                            "arguments": json.dumps(bedrock_tool_use.get("input", {})),
                         },
                     }
                     openai_tool_calls.append(openai_tool_call)
@@ -207,12 +279,13 @@ class ChatCompletions:
             system_prompt,
             bedrock_messages,
         ) = self._convert_openai_messages_to_bedrock_format(messages)
-        response = self.client.converse(
+        response = await self._run(
+            self.client.converse,
             modelId=model,
             system=system_prompt,
             messages=bedrock_messages,
             inferenceConfig={"temperature": temperature, "maxTokens": max_tokens},
-            toolConfig={"tools": tools} if tools else None,
+            **({"toolConfig": {"tools": tools}} if tools else {}),
         )
         openai_response = self._convert_bedrock_response_to_openai_format(response)
         return openai_response
@@ -225,19 +298,22 @@ class ChatCompletions:
         temperature: float,
         tools: Optional[List[dict]] = None,
         tool_choice: Literal["none", "auto", "required"] = "auto",
+        stream_sink: Optional[StreamSink] = None,
         **kwargs,
     ) -> OpenAIResponse:
         # Streaming invocation of Bedrock model
+        sink = get_stream_sink(stream_sink)
         (
             system_prompt,
             bedrock_messages,
         ) = self._convert_openai_messages_to_bedrock_format(messages)
-        response = self.client.converse_stream(
+        response = await self._run(
+            self.client.converse_stream,
             modelId=model,
             system=system_prompt,
             messages=bedrock_messages,
             inferenceConfig={"temperature": temperature, "maxTokens": max_tokens},
-            toolConfig={"tools": tools} if tools else None,
+            **({"toolConfig": {"tools": tools}} if tools else {}),
         )
 
         # Initialize response structure
@@ -247,51 +323,57 @@ class ChatCompletions:
             "usage": {},
             "metrics": {},
         }
-        bedrock_response_text = ""
-        bedrock_response_tool_input = ""
+        # Content blocks by contentBlockIndex; tool input arrives as JSON fragments
+        blocks: Dict[int, dict] = {}
+        tool_inputs: Dict[int, str] = {}
 
         # Process streaming response
         stream = response.get("stream")
         if stream:
-            for event in stream:
+            async for event in self._iterate_stream(stream):
                 if event.get("messageStart", {}).get("role"):
                     bedrock_response["output"]["message"]["role"] = event[
                         "messageStart"
                     ]["role"]
-                if event.get("contentBlockDelta", {}).get("delta", {}).get("text"):
-                    bedrock_response_text += event["contentBlockDelta"]["delta"]["text"]
-                    print(
-                        event["contentBlockDelta"]["delta"]["text"], end="", flush=True
-                    )
-                if event.get("contentBlockStop", {}).get("contentBlockIndex") == 0:
-                    bedrock_response["output"]["message"]["content"].append(
-                        {"text": bedrock_response_text}
-                    )
-                if event.get("contentBlockStart", {}).get("start", {}).get("toolUse"):
-                    bedrock_tool_use = event["contentBlockStart"]["start"]["toolUse"]
-                    tool_use = {
-                        "toolUseId": bedrock_tool_use["toolUseId"],
-                        "name": bedrock_tool_use["name"],
-                    }
-                    bedrock_response["output"]["message"]["content"].append(
-                        {"toolUse": tool_use}
+                if "contentBlockStart" in event:
+                    index = event["contentBlockStart"].get("contentBlockIndex", 0)
+                    tool_use = (
+                        event["contentBlockStart"].get("start", {}).get("toolUse")
                     )
-                    global CURRENT_TOOLUSE_ID
-                    CURRENT_TOOLUSE_ID = bedrock_tool_use["toolUseId"]
-                if event.get("contentBlockDelta", {}).get("delta", {}).get("toolUse"):
-                    bedrock_response_tool_input += event["contentBlockDelta"]["delta"][
-                        "toolUse"
-                    ]["input"]
-                    print(
-                        event["contentBlockDelta"]["delta"]["toolUse"]["input"],
-                        end="",
-                        flush=True,
-                    )
-                if event.get("contentBlockStop", {}).get("contentBlockIndex") == 1:
-                    bedrock_response["output"]["message"]["content"][1]["toolUse"][
-                        "input"
-                    ] = json.loads(bedrock_response_tool_input)
-        print()
+                    if tool_use:
+                        blocks[index] = {
+                            "toolUse": {
+                                "toolUseId": tool_use["toolUseId"],
+                                "name": tool_use["name"],
+                            }
+                        }
+                        tool_inputs[index] = ""
+                if "contentBlockDelta" in event:
+                    index = event["contentBlockDelta"].get("contentBlockIndex", 0)
+                    delta = event["contentBlockDelta"].get("delta", {})
+                    if delta.get("text"):
+                        block = blocks.setdefault(index, {"text": ""})
+                        block["text"] += delta["text"]
+                        await sink.send(delta["text"])
+                    if delta.get("toolUse"):
+                        tool_inputs[index] = (
+                            tool_inputs.get(index, "") + delta["toolUse"]["input"]
+                        )
+                        await sink.send(delta["toolUse"]["input"])
+                if "contentBlockStop" in event:
+                    index = event["contentBlockStop"].get("contentBlockIndex", 0)
+                    if index in tool_inputs and index in blocks:
+                        blocks[index]["toolUse"]["input"] = json.loads(
+                            tool_inputs[index] or "{}"
+                        )
+                if event.get("messageStop", {}).get("stopReason"):
+                    bedrock_response["stopReason"] = event["messageStop"]["stopReason"]
+                if event.get("metadata", {}).get("usage"):
+                    bedrock_response["usage"] = event["metadata"]["usage"]
+        bedrock_response["output"]["message"]["content"] = [
+            blocks[index] for index in sorted(blocks)
+        ]
+        await sink.end()
         openai_response = self._convert_bedrock_response_to_openai_format(
             bedrock_response
         )
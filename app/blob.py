@@ -0,0 +1,163 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.config import config
+from app.logger import logger
+
+
+class BlobStore:
+    """Content-addressed store for large base64 payloads such as screenshots.
+
+    Messages keep only the SHA-256 reference returned by ``put``; the data is
+    written once per distinct content under ``root`` and read back with
+    ``get`` when a request is built. A small LRU keeps recently used blobs
+    in memory.
+
+    Writes happen on a background thread, so ``put`` never blocks on disk;
+    blobs not yet written are served from memory. Once the store grows past
+    ``max_bytes``, the least recently used blobs are deleted, and ``get``
+    raises ``KeyError`` for them like for any unknown reference.
+
+    Attributes:
+        root: Directory holding the blobs, sharded by the first two hex digits.
+        cache_size: Number of blobs kept in memory.
+        max_bytes: Size the store is pruned back to, or None to keep everything.
+        writes: Blobs written to disk.
+        dedup_hits: Puts of content that was already stored.
+        evictions: Blobs deleted to stay within max_bytes.
+    """
+
+    def __init__(
+        self, root: Path, cache_size: int = 16, max_bytes: Optional[int] = 1 << 30
+    ):
+        self.root = Path(root)
+        self.cache_size = cache_size
+        self.max_bytes = max_bytes
+        self.writes = 0
+        self.dedup_hits = 0
+        self.evictions = 0
+
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blobs")
+        # Prune on the first write, to bound what earlier runs left behind
+        self._written_since_prune = max_bytes or 0
+
+    def _path(self, ref: str) -> Path:
+        return self.root / ref[:2] / ref
+
+    def _remember(self, ref: str, data: str) -> None:
+        with self._lock:
+            self._cache[ref] = data
+            self._cache.move_to_end(ref)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def put(self, data: str) -> str:
+        """Store data and return its reference"""
+        ref = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        with self._lock:
+            known = ref in self._cache or ref in self._pending
+            if known:
+                self.dedup_hits += 1
+            else:
+                self._pending[ref] = data
+        self._remember(ref, data)
+        if not known:
+            self._writer.submit(self._write, ref, data)
+        return ref
+
+    def _write(self, ref: str, data: str) -> None:
+        path = self._path(ref)
+        try:
+            if path.exists():
+                with self._lock:
+                    self.dedup_hits += 1
+                os.utime(path)
+                return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write atomically so concurrent readers never see a partial blob
+            tmp_path = path.with_name(f"{ref}.{os.getpid()}.tmp")
+            tmp_path.write_text(data, encoding="utf-8")
+            tmp_path.replace(path)
+            self.writes += 1
+            self._written_since_prune += len(data)
+        except OSError as e:
+            logger.warning(f"Failed to write blob {ref}: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(ref, None)
+
+        if self.max_bytes and self._written_since_prune >= self.max_bytes // 10:
+            self.prune()
+
+    def prune(self) -> None:
+        """Delete the least recently used blobs until the store fits max_bytes"""
+        self._written_since_prune = 0
+        if not self.max_bytes or not self.root.exists():
+            return
+        blobs = []
+        for path in self.root.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in blobs)
+        for _, size, path in sorted(blobs):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+
+    def flush(self) -> None:
+        """Wait until every blob put so far has been written"""
+        self._writer.submit(lambda: None).result()
+
+    def get(self, ref: str) -> str:
+        """Return the data stored under ref.
+
+        Raises:
+            KeyError: If no blob has that reference.
+        """
+        with self._lock:
+            data = self._cache.get(ref) or self._pending.get(ref)
+            if data is not None:
+                if ref in self._cache:
+                    self._cache.move_to_end(ref)
+                return data
+        path = self._path(ref)
+        try:
+            data = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            raise KeyError(f"Unknown blob {ref}") from None
+        # Mark the blob as recently used for pruning
+        with suppress(OSError):
+            os.utime(path)
+        self._remember(ref, data)
+        return data
+
+
+_blob_store: Optional[BlobStore] = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Return the process-wide blob store under the workspace."""
+    global _blob_store
+    if _blob_store is None:
+        with _blob_store_lock:
+            if _blob_store is None:
+                _blob_store = BlobStore(config.workspace_root / ".blobs")
+    return _blob_store
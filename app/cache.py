@@ -0,0 +1,200 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config import PROJECT_ROOT, LLMCacheSettings, config
+from app.logger import logger
+
+
+class ResponseCache:
+    """Persistent, content-addressed cache for LLM responses.
+
+    Entries are stored in a SQLite database keyed by a stable hash of the
+    request. The cache evicts the least recently used entries once it exceeds
+    either ``max_entries`` or ``max_size_bytes``, and drops entries older than
+    ``ttl`` seconds on read.
+
+    Attributes:
+        path: Location of the SQLite database.
+        ttl: Entry lifetime in seconds, or None for no expiry.
+        max_entries: Maximum number of stored entries.
+        max_size_bytes: Maximum total size of stored values.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: Optional[int] = None,
+        max_entries: int = 10000,
+        max_size_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_size_bytes = max_size_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+        )
+
+    @classmethod
+    def from_settings(cls, settings: LLMCacheSettings) -> "ResponseCache":
+        """Create a cache from the ``[cache]`` section of the config."""
+        path = Path(settings.path)
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+        return cls(
+            path=path,
+            ttl=settings.ttl,
+            max_entries=settings.max_entries,
+            max_size_bytes=settings.max_size_mb * 1024 * 1024,
+        )
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """Build a stable hash from the request parts.
+
+        Dict keys are sorted so that logically identical requests hash the same
+        regardless of insertion order.
+        """
+        payload = json.dumps(
+            parts,
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value and evict old entries if the cache is over capacity."""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_size_bytes:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self.writes += 1
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until within limits."""
+        if self.ttl is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+
+        entries, total_size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if entries <= self.max_entries and total_size <= self.max_size_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        )
+        stale = []
+        for key, size in rows:
+            if entries <= self.max_entries and total_size <= self.max_size_bytes:
+                break
+            stale.append((key,))
+            entries -= 1
+            total_size -= size
+
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current cache occupancy."""
+        with self._lock:
+            entries, total_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": total_size,
+        }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None if caching is disabled."""
+    global _response_cache
+    settings = config.llm_cache
+    if settings is None or not settings.enabled:
+        return None
+
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache.from_settings(settings)
+                logger.info(f"LLM response cache enabled at {_response_cache.path}")
+    return _response_cache
@@ -0,0 +1,183 @@
+import asyncio
+import re
+import threading
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.config import CompactionSettings, config
+from app.llm import LLM
+from app.logger import logger
+from app.schema import Memory, Message, Role
+
+
+COMPACTED_PREFIX = "[Compacted tool result] "
+
+SUMMARY_PROMPT = """Summarize the output of the `{name}` tool below in at most {chars} characters.
+Keep what an agent would need later: results, errors, file paths, identifiers and numbers. Reply with the summary only.
+
+{output}"""
+
+# Characters of a tool result sent to the summarizer, split between head and tail
+MAX_SUMMARY_INPUT = 12000
+
+# Ids of outputs spilled to disk, see app.observation
+_OBSERVATION_ID = re.compile(r"\bobs_[0-9a-f]{12}\b")
+
+
+class CompactionRecord(BaseModel):
+    """Outcome of one compaction of an agent's memory"""
+
+    tokens_before: int = Field(..., description="Memory size before compaction")
+    tokens_after: int = Field(..., description="Memory size after compaction")
+    messages: int = Field(..., description="Tool results replaced by summaries")
+    summarizer: str = Field(
+        ..., description="LLM config that wrote the summaries, or 'truncate'"
+    )
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+class ContextCompactor:
+    """Replaces old tool results in agent memory with compact summaries.
+
+    Once memory holds more than ``watermark`` tokens, every tool result
+    except the ``keep_recent`` newest ones is replaced by a summary of at most
+    ``summary_chars`` characters. Summaries are written by ``llm`` if given,
+    at most ``max_concurrency`` at a time, and otherwise by keeping the head
+    and tail of the result. Messages are
+    never removed and keep their tool_call_id, so each tool call still has
+    its result.
+
+    Attributes:
+        compactions: Compactions performed.
+        tokens_saved: Tokens removed from memory by all compactions.
+    """
+
+    def __init__(
+        self,
+        watermark: int,
+        keep_recent: int = 4,
+        summary_chars: int = 600,
+        llm: Optional[LLM] = None,
+        max_concurrency: int = 4,
+    ):
+        self.watermark = watermark
+        self.keep_recent = keep_recent
+        self.summary_chars = summary_chars
+        self.llm = llm
+        self.max_concurrency = max_concurrency
+        self.compactions = 0
+        self.tokens_saved = 0
+
+    def _candidates(self, messages: List[Message]) -> List[int]:
+        """Indexes of the tool results to compact"""
+        tool_results = [i for i, m in enumerate(messages) if m.role == Role.TOOL]
+        if self.keep_recent > 0:
+            tool_results = tool_results[: -self.keep_recent]
+        return [
+            i
+            for i in tool_results
+            if len(messages[i].content or "") > self.summary_chars
+            and not messages[i].content.startswith(COMPACTED_PREFIX)
+        ]
+
+    def truncate(self, content: str) -> str:
+        """Summarize a tool result by its head and tail"""
+        notice = f"\n... [{len(content)} characters compacted] ...\n"
+        budget = max(0, self.summary_chars - len(COMPACTED_PREFIX) - len(notice))
+        tail = budget // 3
+        return content[: budget - tail] + notice + (content[-tail:] if tail else "")
+
+    async def _summarize(self, message: Message, limit: asyncio.Semaphore) -> str:
+        content = message.content
+        if self.llm is not None:
+            if len(content) > MAX_SUMMARY_INPUT:
+                half = MAX_SUMMARY_INPUT // 2
+                content = f"{content[:half]}\n...\n{content[-half:]}"
+            prompt = SUMMARY_PROMPT.format(
+                name=message.name or "unknown",
+                chars=self.summary_chars,
+                output=content,
+            )
+            try:
+                async with limit:
+                    summary = await self.llm.ask(
+                        [Message.user_message(prompt)], stream=False, temperature=0
+                    )
+                summary = summary.strip()[: self.summary_chars].rstrip()
+            except Exception as e:
+                logger.warning(f"Truncating tool result instead of summarizing: {e}")
+                summary = self.truncate(message.content)
+        else:
+            summary = self.truncate(content)
+
+        # Keep spilled outputs reachable with read_observation
+        for observation_id in dict.fromkeys(_OBSERVATION_ID.findall(message.content)):
+            if observation_id not in summary:
+                summary += f"\nFull output: observation `{observation_id}`"
+        return COMPACTED_PREFIX + summary
+
+    async def compact(self, memory: Memory) -> Optional[CompactionRecord]:
+        """Compact memory if it is over the watermark.
+
+        Returns:
+            The compaction performed, or None if memory was left unchanged.
+        """
+        if memory.token_count <= self.watermark:
+            return None
+        messages = list(memory.messages)
+        candidates = self._candidates(messages)
+        if not candidates:
+            return None
+
+        # Created per call, so the compactor is not bound to one event loop
+        limit = asyncio.Semaphore(max(1, self.max_concurrency))
+        summaries = await asyncio.gather(
+            *(self._summarize(messages[i], limit) for i in candidates)
+        )
+        tokens_before = memory.token_count
+        for i, summary in zip(candidates, summaries):
+            messages[i] = messages[i].model_copy(
+                update={"content": summary, "base64_image": None, "image_ref": None}
+            )
+        memory.set_messages(messages)
+
+        record = CompactionRecord(
+            tokens_before=tokens_before,
+            tokens_after=memory.token_count,
+            messages=len(candidates),
+            summarizer=self.llm.config_name if self.llm else "truncate",
+        )
+        self.compactions += 1
+        self.tokens_saved += record.tokens_saved
+        logger.info(
+            f"🗜️ Compacted {record.messages} tool results: "
+            f"{record.tokens_before} -> {record.tokens_after} tokens"
+        )
+        return record
+
+
+_compactor: Optional[ContextCompactor] = None
+_compactor_lock = threading.Lock()
+
+
+def get_compactor() -> Optional[ContextCompactor]:
+    """Return the process-wide compactor, or None if compaction is disabled."""
+    global _compactor
+    settings: CompactionSettings = config.compaction
+    if not settings.enabled:
+        return None
+    if _compactor is None:
+        with _compactor_lock:
+            if _compactor is None:
+                _compactor = ContextCompactor(
+                    watermark=settings.watermark,
+                    keep_recent=settings.keep_recent,
+                    summary_chars=settings.summary_chars,
+                    llm=LLM(config_name=settings.llm) if settings.llm else None,
+                    max_concurrency=settings.max_concurrency,
+                )
+    return _compactor
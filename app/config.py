@@ -26,6 +26,50 @@ class LLMSettings(BaseModel):
         description="Maximum input tokens to use across all requests (None for unlimited)",
     )
     temperature: float = Field(1.0, description="Sampling temperature")
+    rpm: Optional[int] = Field(
+        None, description="Client-side requests per minute limit (None for unlimited)"
+    )
+    tpm: Optional[int] = Field(
+        None, description="Client-side tokens per minute limit (None for unlimited)"
+    )
+    max_concurrency: Optional[int] = Field(
+        None, description="Maximum concurrent requests (None for unlimited)"
+    )
+    max_retries: int = Field(5, description="Maximum retries of transient errors")
+    retry_deadline: float = Field(
+        120.0, description="Total seconds a request may spend retrying"
+    )
+    endpoints: List[str] = Field(
+        default_factory=list,
+        description="Other [llm.*] configs serving the same model to route between",
+    )
+    hedge_percentile: Optional[float] = Field(
+        None,
+        description="Send a backup tool call request once this latency percentile is exceeded (None to disable)",
+    )
+    hedge_min_samples: int = Field(
+        20, description="Latency samples needed before hedging starts"
+    )
+    prefix_cache: bool = Field(
+        False,
+        description="Keep the system prompt and tool schemas byte-stable for provider prompt caching",
+    )
+    prefix_cache_breakpoints: bool = Field(
+        False,
+        description="Mark the system prompt and tool block with cache_control breakpoints",
+    )
+    coalesce_requests: bool = Field(
+        True,
+        description="Share one provider call between identical in-flight requests at temperature 0",
+    )
+    max_images: Optional[int] = Field(
+        None,
+        description="Only send the images of this many most recent messages (None for all)",
+    )
+    preprocess_images: bool = Field(
+        True, description="Down-scale and re-encode inline images before sending"
+    )
+    image_quality: int = Field(85, description="JPEG quality of re-encoded images")
     api_type: str = Field(..., description="Azure, Openai, or Ollama")
     api_version: str = Field(..., description="Azure Openai version if AzureOpenai")
     # bk
@@ -103,6 +147,85 @@ class SandboxSettings(BaseModel):
     )
 
 
+class LLMCacheSettings(BaseModel):
+    """Configuration for the persistent LLM response cache"""
+
+    enabled: bool = Field(False, description="Whether to cache LLM responses")
+    path: str = Field(
+        "workspace/.cache/llm_cache.sqlite",
+        description="SQLite database file, relative to the project root",
+    )
+    ttl: Optional[int] = Field(
+        86400, description="Seconds before a cached response expires (None for never)"
+    )
+    max_entries: int = Field(10000, description="Maximum number of cached responses")
+    max_size_mb: int = Field(256, description="Maximum total size of cached responses")
+    deterministic_only: bool = Field(
+        True, description="Only cache requests sent with temperature 0"
+    )
+
+
+class HTTPSettings(BaseModel):
+    """Configuration for the shared HTTP connection pool used by LLM clients"""
+
+    http2: bool = Field(False, description="Whether to negotiate HTTP/2 when possible")
+    max_connections: int = Field(100, description="Maximum open connections in total")
+    max_keepalive_connections: int = Field(
+        20, description="Maximum idle connections kept alive for reuse"
+    )
+    keepalive_expiry: float = Field(
+        30.0, description="Seconds an idle connection is kept alive"
+    )
+    max_connections_per_host: Optional[int] = Field(
+        None, description="Maximum concurrent requests per host (None for unlimited)"
+    )
+    timeout: float = Field(600.0, description="Default request timeout in seconds")
+    connect_timeout: float = Field(5.0, description="Connection timeout in seconds")
+
+
+class ServerSettings(BaseModel):
+    """Configuration for the multi-session agent server"""
+
+    host: str = Field("127.0.0.1", description="Address to listen on")
+    port: int = Field(8000, description="Port to listen on")
+    max_concurrent_sessions: int = Field(
+        8, description="Maximum sessions running at once across all tenants"
+    )
+    max_queued_sessions: int = Field(
+        100,
+        description="Maximum sessions waiting to start before new ones are rejected",
+    )
+    max_sessions_per_tenant: int = Field(
+        2, description="Maximum sessions running at once for a single tenant"
+    )
+    session_timeout: float = Field(3600.0, description="Seconds a session may run")
+    max_finished_sessions: int = Field(
+        1000, description="Finished sessions kept for status queries"
+    )
+
+
+class CompactionSettings(BaseModel):
+    """Configuration for compacting old tool results in agent memory"""
+
+    enabled: bool = Field(False, description="Whether to compact agent memory")
+    watermark: int = Field(
+        60000, description="Memory size in tokens above which compaction runs"
+    )
+    keep_recent: int = Field(
+        4, description="Most recent tool results that are never compacted"
+    )
+    summary_chars: int = Field(
+        600, description="Maximum characters of a compacted tool result"
+    )
+    llm: Optional[str] = Field(
+        None,
+        description="[llm.*] config summarizing tool results; None truncates them",
+    )
+    max_concurrency: int = Field(
+        4, description="Maximum summaries requested from the LLM at once"
+    )
+
+
 class MCPServerConfig(BaseModel):
     """Configuration for a single MCP server"""
 
@@ -170,6 +293,18 @@ class AppConfig(BaseModel):
     )
     mcp_config: Optional[MCPSettings] = Field(None, description="MCP configuration")
     bk_config: Optional[BKSettings] = Field(None, description="BK configuration")
+    llm_cache: Optional[LLMCacheSettings] = Field(
+        None, description="LLM response cache configuration"
+    )
+    http: Optional[HTTPSettings] = Field(
+        None, description="Shared HTTP connection pool configuration"
+    )
+    server: Optional[ServerSettings] = Field(
+        None, description="Multi-session server configuration"
+    )
+    compaction: Optional[CompactionSettings] = Field(
+        None, description="Memory compaction configuration"
+    )
 
     class Config:
         arbitrary_types_allowed = True
@@ -225,6 +360,20 @@ class Config:
             "max_tokens": base_llm.get("max_tokens", 4096),
             "max_input_tokens": base_llm.get("max_input_tokens"),
             "temperature": base_llm.get("temperature", 1.0),
+            "rpm": base_llm.get("rpm"),
+            "tpm": base_llm.get("tpm"),
+            "max_concurrency": base_llm.get("max_concurrency"),
+            "max_retries": base_llm.get("max_retries", 5),
+            "retry_deadline": base_llm.get("retry_deadline", 120.0),
+            "endpoints": base_llm.get("endpoints", []),
+            "hedge_percentile": base_llm.get("hedge_percentile"),
+            "hedge_min_samples": base_llm.get("hedge_min_samples", 20),
+            "prefix_cache": base_llm.get("prefix_cache", False),
+            "prefix_cache_breakpoints": base_llm.get("prefix_cache_breakpoints", False),
+            "coalesce_requests": base_llm.get("coalesce_requests", True),
+            "max_images": base_llm.get("max_images"),
+            "preprocess_images": base_llm.get("preprocess_images", True),
+            "image_quality": base_llm.get("image_quality", 85),
             "api_type": base_llm.get("api_type", ""),
             "api_version": base_llm.get("api_version", ""),
             # bk
@@ -288,6 +437,26 @@ class Config:
         bk_config = raw_config.get("bk", {})
         bk_settings = BKSettings(**bk_config) if bk_config else None
 
+        cache_config = raw_config.get("cache", {})
+        cache_settings = (
+            LLMCacheSettings(**cache_config) if cache_config else LLMCacheSettings()
+        )
+
+        http_config = raw_config.get("http", {})
+        http_settings = HTTPSettings(**http_config) if http_config else HTTPSettings()
+
+        server_config = raw_config.get("server", {})
+        server_settings = (
+            ServerSettings(**server_config) if server_config else ServerSettings()
+        )
+
+        compaction_config = raw_config.get("compaction", {})
+        compaction_settings = (
+            CompactionSettings(**compaction_config)
+            if compaction_config
+            else CompactionSettings()
+        )
+
         config_dict = {
             "llm": {
                 "default": default_settings,
@@ -301,6 +470,10 @@ class Config:
             "search_config": search_settings,
             "mcp_config": mcp_settings,
             "bk_config": bk_settings,
+            "llm_cache": cache_settings,
+            "http": http_settings,
+            "server": server_settings,
+            "compaction": compaction_settings,
         }
 
         self._config = AppConfig(**config_dict)
@@ -331,6 +504,26 @@ class Config:
         """Get the MCP configuration"""
         return self._config.bk_config
 
+    @property
+    def llm_cache(self) -> LLMCacheSettings:
+        """Get the LLM response cache configuration"""
+        return self._config.llm_cache
+
+    @property
+    def http(self) -> HTTPSettings:
+        """Get the shared HTTP connection pool configuration"""
+        return self._config.http
+
+    @property
+    def server(self) -> ServerSettings:
+        """Get the multi-session server configuration"""
+        return self._config.server
+
+    @property
+    def compaction(self) -> CompactionSettings:
+        """Get the memory compaction configuration"""
+        return self._config.compaction
+
     @property
     def workspace_root(self) -> Path:
         """Get the workspace root directory"""
@@ -13,6 +13,25 @@ class TokenLimitExceeded(OpenManusError):
     """Exception raised when the token limit is exceeded"""
 
 
+class SessionQueueFull(OpenManusError):
+    """Exception raised when the server cannot accept more sessions"""
+
+
+class TraceMiss(OpenManusError):
+    """Exception raised when a replayed call has no recorded response"""
+
+
+class ToolStreamInterrupted(OpenManusError):
+    """Exception raised when a tool-call stream fails after dispatching calls.
+
+    It is never retried, since retrying would run the dispatched calls again.
+    """
+
+    def __init__(self, message, dispatched):
+        super().__init__(message)
+        self.dispatched = dispatched
+
+
 class ApiError(Exception):
     """Base exception for all API errors"""
 
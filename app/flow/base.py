@@ -4,6 +4,7 @@ from typing import Dict, List, Optional, Union
 from pydantic import BaseModel
 
 from app.agent.base import BaseAgent
+from app.journal import SessionJournal
 
 
 class BaseFlow(BaseModel, ABC):
@@ -12,6 +13,7 @@ class BaseFlow(BaseModel, ABC):
     agents: Dict[str, BaseAgent]
     tools: Optional[List] = None
     primary_agent_key: Optional[str] = None
+    journal: Optional[SessionJournal] = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -39,6 +41,11 @@ class BaseFlow(BaseModel, ABC):
         # Initialize using BaseModel's init
         super().__init__(**data)
 
+        # Agents record to the flow's journal so the whole session can resume
+        if self.journal is not None:
+            for agent in self.agents.values():
+                agent.attach_journal(self.journal)
+
     @property
     def primary_agent(self) -> Optional[BaseAgent]:
         """Get the primary agent for the flow"""
@@ -51,6 +58,8 @@ class BaseFlow(BaseModel, ABC):
     def add_agent(self, key: str, agent: BaseAgent) -> None:
         """Add a new agent to the flow"""
         self.agents[key] = agent
+        if self.journal is not None:
+            agent.attach_journal(self.journal)
 
     @abstractmethod
     async def execute(self, input_text: str) -> str:
@@ -107,6 +107,7 @@ class PlanningFlow(BaseFlow):
                         f"Plan creation failed. Plan ID {self.active_plan_id} not found in planning tool."
                     )
                     return f"Failed to create plan for: {input_text}"
+                self._journal_plan()
 
             result = ""
             while True:
@@ -117,12 +118,14 @@ class PlanningFlow(BaseFlow):
                 if self.current_step_index is None:
                     result += await self._finalize_plan()
                     break
+                self._journal_plan()
 
                 # Execute current step with appropriate agent
                 step_type = step_info.get("type") if step_info else None
                 executor = self.get_executor(step_type)
                 step_result = await self._execute_step(executor, step_info)
                 result += step_result + "\n"
+                self._journal_plan()
 
                 # Check if agent wants to terminate
                 if hasattr(executor, "state") and executor.state == AgentState.FINISHED:
@@ -133,6 +136,43 @@ class PlanningFlow(BaseFlow):
             logger.error(f"Error in PlanningFlow: {str(e)}")
             return f"Execution failed: {str(e)}"
 
+    def _journal_plan(self) -> None:
+        """Journal the active plan after a status change"""
+        if self.journal is None or self.active_plan_id not in self.planning_tool.plans:
+            return
+        self.journal.append(
+            "plan",
+            plan_id=self.active_plan_id,
+            plan=self.planning_tool.plans[self.active_plan_id],
+            current_step_index=self.current_step_index,
+        )
+
+    def resume(self) -> bool:
+        """Restore the plan and the agents' progress from the journal.
+
+        Call ``execute("")`` afterwards to continue with the first step that
+        is not completed, skipping plan creation.
+
+        Returns:
+            Whether the journal had a plan to resume.
+        """
+        if self.journal is None:
+            raise ValueError("Flow has no journal to resume from")
+
+        records = self.journal.records("plan")
+        if not records:
+            return False
+        last = records[-1]
+        self.active_plan_id = last["plan_id"]
+        self.planning_tool.plans[self.active_plan_id] = last["plan"]
+        self.current_step_index = last["current_step_index"]
+        for agent in self.agents.values():
+            agent.resume()
+        logger.info(
+            f"Resumed plan {self.active_plan_id} at step {self.current_step_index}"
+        )
+        return True
+
     async def _create_initial_plan(self, request: str) -> None:
         """Create an initial plan based on the request using the flow's LLM and PlanningTool."""
         logger.info(f"Creating initial plan with ID: {self.active_plan_id}")
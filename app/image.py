@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from app.logger import logger
+
+
+DATA_URL_PREFIX = "data:image/jpeg;base64,"
+
+# Bounds providers scale images to before tiling them, see TokenCounter
+MAX_SIDE = 2048
+MAX_SHORT_SIDE = 768
+
+# Dimensions of recently seen images, by content hash
+_dimensions: OrderedDict[str, Tuple[int, int]] = OrderedDict()
+_dimensions_lock = threading.Lock()
+DIMENSIONS_CACHE_SIZE = 256
+
+
+def _digest(data: str) -> str:
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _remember_dimensions(digest: str, size: Tuple[int, int]) -> None:
+    with _dimensions_lock:
+        _dimensions[digest] = size
+        _dimensions.move_to_end(digest)
+        if len(_dimensions) > DIMENSIONS_CACHE_SIZE:
+            _dimensions.popitem(last=False)
+
+
+def cached_dimensions(digest: str) -> Optional[Tuple[int, int]]:
+    """Return the dimensions of an image seen before, by the SHA-256 of its base64.
+
+    This is also the image's blob store reference.
+    """
+    with _dimensions_lock:
+        return _dimensions.get(digest)
+
+
+def image_dimensions(data: str) -> Optional[Tuple[int, int]]:
+    """Return the width and height of a base64 image or data URL.
+
+    The base64 payload is decoded and hashed in full, but only the image
+    header is parsed; results are cached by that hash. Returns None for
+    remote URLs and undecodable data.
+    """
+    if data.startswith("data:"):
+        data = data.partition(",")[2]
+    elif data.startswith(("http://", "https://")):
+        return None
+
+    digest = _digest(data)
+    with _dimensions_lock:
+        size = _dimensions.get(digest)
+    if size is not None:
+        return size
+
+    try:
+        with Image.open(io.BytesIO(base64.b64decode(data))) as image:
+            size = image.size
+    except Exception:
+        return None
+    _remember_dimensions(digest, size)
+    return size
+
+
+def target_size(width: int, height: int) -> Tuple[int, int]:
+    """Largest size that providers will not scale down further.
+
+    Images are fit within MAX_SIDE and then until the short side is at most
+    MAX_SHORT_SIDE, which is what high-detail tiling does server side.
+    """
+    scale = min(1.0, MAX_SIDE / max(width, height), MAX_SHORT_SIDE / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+class ImageProcessor:
+    """Down-scales and re-encodes images before they are sent to a model.
+
+    Each image is decoded once, resized to ``target_size`` and saved as JPEG
+    at ``quality``; a JPEG already at that size is kept if re-encoding would
+    not make it smaller. Results are cached by content hash, so a screenshot
+    that stays in the conversation is only processed the first time.
+
+    Attributes:
+        quality: JPEG quality used for re-encoding.
+        cache_size: Number of processed images kept.
+    """
+
+    def __init__(self, quality: int = 85, cache_size: int = 32):
+        self.quality = quality
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def process(self, data: str) -> str:
+        """Return the base64 JPEG to send in place of a base64 image.
+
+        Data that can't be decoded is returned unchanged.
+        """
+        digest = _digest(data)
+        with self._lock:
+            processed = self._cache.get(digest)
+            if processed is not None:
+                self.hits += 1
+                self._cache.move_to_end(digest)
+                return processed
+        self.misses += 1
+
+        try:
+            processed, size = self._convert(data)
+        except Exception as e:
+            logger.warning(f"Sending image unprocessed: {e}")
+            return data
+
+        _remember_dimensions(_digest(processed), size)
+        with self._lock:
+            self._cache[digest] = processed
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return processed
+
+    def _convert(self, data: str) -> Tuple[str, Tuple[int, int]]:
+        raw = base64.b64decode(data)
+        with Image.open(io.BytesIO(raw)) as image:
+            size = target_size(*image.size)
+            unchanged = size == image.size and image.format == "JPEG"
+            image = image.convert("RGB")
+            if size != image.size:
+                image = image.resize(size, Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+        if unchanged and buffer.tell() >= len(raw):
+            # A JPEG at its final size that re-encoding does not shrink, e.g.
+            # one already saved at a lower quality
+            return data, size
+        return base64.b64encode(buffer.getvalue()).decode("ascii"), size
+
+    def process_url(self, url: str) -> str:
+        """Process a base64 data URL; other URLs are returned unchanged"""
+        if not url.startswith("data:image/"):
+            return url
+        return DATA_URL_PREFIX + self.process(url.partition(",")[2])
+
+
+_processors: Dict[int, ImageProcessor] = {}
+
+
+def get_image_processor(quality: int) -> ImageProcessor:
+    """Return the process-wide image processor for a JPEG quality."""
+    if quality not in _processors:
+        _processors[quality] = ImageProcessor(quality=quality)
+    return _processors[quality]
@@ -0,0 +1,78 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+
+class SessionJournal:
+    """Append-only JSONL record of an agent session.
+
+    Agents append every message they add to memory and a checkpoint after
+    each completed step; PlanningFlow appends the plan after every status
+    change. Each record is flushed before the call returns, so a crashed
+    run can be resumed from its last completed step with
+    ``BaseAgent.resume`` or ``PlanningFlow.resume``.
+
+    Flushing hands the record to the OS, which is enough to survive a
+    process crash. To also survive a host crash the file is fsynced, but at
+    most once per ``fsync_interval`` seconds, since each fsync blocks the
+    event loop for a disk round trip.
+
+    Attributes:
+        path: Location of the journal file.
+        fsync_interval: Minimum seconds between fsyncs; 0 fsyncs every
+            record and None never fsyncs.
+    """
+
+    def __init__(self, path: Path, fsync_interval: Optional[float] = 1.0):
+        self.path = Path(path)
+        self.fsync_interval = fsync_interval
+        self._synced_at = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        records = self.records()
+        self._seq = records[-1]["seq"] if records else 0
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and not self.path.read_bytes().endswith(b"\n"):
+            # Terminate a line truncated by a crash so new records stay parseable
+            self._file.write("\n")
+
+    def append(self, type: str, **data: Any) -> None:
+        """Append and flush a record"""
+        self._seq += 1
+        record = {"seq": self._seq, "time": time.time(), "type": type, **data}
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        if (
+            self.fsync_interval is not None
+            and time.monotonic() - self._synced_at >= self.fsync_interval
+        ):
+            self.sync()
+
+    def sync(self) -> None:
+        """Fsync the records appended so far"""
+        os.fsync(self._file.fileno())
+        self._synced_at = time.monotonic()
+
+    def records(self, type: Optional[str] = None) -> List[dict]:
+        """Read the journal, optionally only records of one type.
+
+        A truncated last line, left by a crash mid-write, is ignored.
+        """
+        if not self.path.exists():
+            return []
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if type is None or record["type"] == type:
+                    records.append(record)
+        return records
+
+    def close(self) -> None:
+        if self.fsync_interval is not None:
+            self.sync()
+        self._file.close()
@@ -1,6 +1,22 @@
-import math
+import asyncio
+import inspect
 import json
-from typing import Dict, List, Optional, Union
+import math
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import tiktoken
 from openai import (
@@ -11,28 +27,44 @@ from openai import (
     OpenAIError,
     RateLimitError,
 )
-from openai.types.chat import ChatCompletion, ChatCompletionMessage
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_random_exponential,
+from openai.types.chat import (
+    ChatCompletion,
+    ChatCompletionMessage,
+    ChatCompletionMessageToolCall,
 )
+from pydantic import BaseModel, Field
 
 from app.bedrock import BedrockClient
-from app.config import LLMSettings, config
-from app.exceptions import TokenLimitExceeded
+from app.blob import get_blob_store
+from app.cache import ResponseCache, get_response_cache
+from app.config import HTTPSettings, LLMSettings, config
+from app.exceptions import TokenLimitExceeded, ToolStreamInterrupted
+from app.image import (
+    ImageProcessor,
+    cached_dimensions,
+    get_image_processor,
+    image_dimensions,
+)
 from app.logger import logger  # Assuming a logger is set up in your app
+from app.rate_limiter import get_rate_limiter
+from app.retry import RetryPolicy, llm_retry
+from app.router import HedgePolicy, LLMRouter
 from app.schema import (
     ROLE_VALUES,
     TOOL_CHOICE_TYPE,
     TOOL_CHOICE_VALUES,
+    Function,
     Message,
+    ToolCall,
     ToolChoice,
 )
+from app.streaming import StreamSink, get_stream_sink
+from app.trace import get_trace
+from app.transport import get_http_client
 
 
 REASONING_MODELS = ["o1", "o3-mini"]
+CACHE_BREAKPOINT = {"type": "ephemeral"}
 MULTIMODAL_MODELS = [
     "gpt-4-vision-preview",
     "gpt-4o",
@@ -43,6 +75,102 @@ MULTIMODAL_MODELS = [
 ]
 
 
+class TokenUsage(BaseModel):
+    """Token usage accumulated within a tracking scope"""
+
+    input_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.completion_tokens
+
+
+# Usage scopes active in the current task, innermost last
+_usage_scopes: ContextVar[tuple] = ContextVar("token_usage_scopes", default=())
+# Innermost scope that max_input_tokens is checked against
+_budget_usage: ContextVar[Optional[TokenUsage]] = ContextVar(
+    "token_budget_usage", default=None
+)
+
+
+@contextmanager
+def track_token_usage(budget: bool = False) -> Iterator[TokenUsage]:
+    """Accumulate the tokens used by LLM calls made within this context.
+
+    Scopes nest, and each one only sees calls made from its own task and the
+    tasks it spawns, so concurrent work can be accounted separately. With
+    ``budget`` set the scope is also the token budget of the work in it, such
+    as one server session: ``max_input_tokens`` is checked against its usage
+    instead of the process-wide totals of each LLM.
+    """
+    usage = TokenUsage()
+    token = _usage_scopes.set(_usage_scopes.get() + (usage,))
+    budget_token = _budget_usage.set(usage) if budget else None
+    try:
+        yield usage
+    finally:
+        if budget_token is not None:
+            _budget_usage.reset(budget_token)
+        _usage_scopes.reset(token)
+
+
+def budget_usage() -> Optional[TokenUsage]:
+    """Return the usage of the innermost budget scope, or None outside one."""
+    return _budget_usage.get()
+
+
+def _record_usage(
+    input_tokens: int, completion_tokens: int, cached_tokens: int = 0
+) -> None:
+    for usage in _usage_scopes.get():
+        usage.input_tokens += input_tokens
+        usage.completion_tokens += completion_tokens
+        usage.cached_tokens += cached_tokens
+
+
+class BatchItemResult(BaseModel):
+    """Result of one prompt in a batch"""
+
+    index: int
+    result: Any = None
+    error: Optional[str] = None
+    latency: float = 0.0
+    usage: TokenUsage = Field(default_factory=TokenUsage)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BatchResult(BaseModel):
+    """Ordered results of a batch with aggregate latency and token usage"""
+
+    items: List[BatchItemResult] = Field(default_factory=list)
+    wall_time: float = 0.0
+    usage: TokenUsage = Field(default_factory=TokenUsage)
+
+    @property
+    def results(self) -> List[Any]:
+        return [item.result for item in self.items]
+
+    @property
+    def failed(self) -> List[BatchItemResult]:
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def total_latency(self) -> float:
+        return sum(item.latency for item in self.items)
+
+    @property
+    def max_latency(self) -> float:
+        return max((item.latency for item in self.items), default=0.0)
+
+
 class TokenCounter:
     # Token constants
     BASE_MESSAGE_TOKENS = 4
@@ -55,8 +183,12 @@ class TokenCounter:
     HIGH_DETAIL_TARGET_SHORT_SIDE = 768
     TILE_SIZE = 512
 
+    # Number of per-message token counts kept in the memo
+    MESSAGE_CACHE_SIZE = 4096
+
     def __init__(self, tokenizer):
         self.tokenizer = tokenizer
+        self._message_cache: OrderedDict[int, int] = OrderedDict()
 
     def count_text(self, text: str) -> int:
         """Calculate tokens for a text string"""
@@ -84,9 +216,12 @@ class TokenCounter:
 
         # For high detail, calculate based on dimensions if available
         if detail == "high" or detail == "medium":
-            # If dimensions are provided in the image_item
-            if "dimensions" in image_item:
-                width, height = image_item["dimensions"]
+            # Use the provided dimensions, or read them from inline image data
+            dimensions = image_item.get("dimensions") or image_dimensions(
+                (image_item.get("image_url") or {}).get("url", "")
+            )
+            if dimensions:
+                width, height = dimensions
                 return self._calculate_high_detail_tokens(width, height)
 
         return (
@@ -145,31 +280,170 @@ class TokenCounter:
                 token_count += self.count_text(function.get("arguments", ""))
         return token_count
 
+    @staticmethod
+    def _message_key(message: dict) -> int:
+        """Build a hash key from the fields of a message that affect its token count"""
+        content = message.get("content")
+        if isinstance(content, list):
+            content = tuple(
+                item
+                if isinstance(item, str)
+                else (
+                    item.get("text")
+                    or (item.get("image_url") or {}).get("url")
+                    or item.get("type"),
+                    item.get("detail"),
+                    tuple(item.get("dimensions") or ()),
+                )
+                for item in content
+            )
+        tool_calls = tuple(
+            (
+                call.get("function", {}).get("name"),
+                call.get("function", {}).get("arguments"),
+            )
+            for call in message.get("tool_calls") or []
+        )
+        return hash(
+            (
+                message.get("role"),
+                content,
+                tool_calls,
+                message.get("name"),
+                message.get("tool_call_id"),
+                message.get("image_ref") or message.get("base64_image"),
+            )
+        )
+
+    @staticmethod
+    def _stored_image_dimensions(ref: str) -> Optional[Tuple[int, int]]:
+        """Dimensions of an image in the blob store, or None if it is missing"""
+        dimensions = cached_dimensions(ref)
+        if dimensions is None:
+            try:
+                dimensions = image_dimensions(get_blob_store().get(ref))
+            except KeyError:
+                return None
+        return dimensions
+
+    def _count_message(self, message: dict) -> int:
+        """Calculate tokens for a single message dict without memoization"""
+        tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
+
+        # Add role tokens
+        tokens += self.count_text(message.get("role", ""))
+
+        # Add content tokens
+        if "content" in message:
+            tokens += self.count_content(message["content"])
+
+        # Add tool calls tokens
+        if "tool_calls" in message:
+            tokens += self.count_tool_calls(message["tool_calls"])
+
+        # Add name and tool_call_id tokens
+        tokens += self.count_text(message.get("name", ""))
+        tokens += self.count_text(message.get("tool_call_id", ""))
+
+        # Images attached to Message objects, which are not in content yet
+        if message.get("image_ref"):
+            tokens += self.count_image(
+                {"dimensions": self._stored_image_dimensions(message["image_ref"])}
+            )
+        elif message.get("base64_image"):
+            tokens += self.count_image({"image_url": {"url": message["base64_image"]}})
+
+        return tokens
+
+    def count_message(self, message: Union[dict, Message]) -> int:
+        """Calculate tokens for a single message, memoized by content hash
+
+        Conversation history is re-sent on every step, so only messages that
+        have not been seen before are passed through the tokenizer.
+        """
+        if isinstance(message, Message):
+            message = message.to_dict()
+
+        key = self._message_key(message)
+        tokens = self._message_cache.get(key)
+        if tokens is not None:
+            self._message_cache.move_to_end(key)
+            return tokens
+
+        tokens = self._count_message(message)
+        self._message_cache[key] = tokens
+        if len(self._message_cache) > self.MESSAGE_CACHE_SIZE:
+            self._message_cache.popitem(last=False)
+        return tokens
+
     def count_message_tokens(self, messages: List[dict]) -> int:
         """Calculate the total number of tokens in a message list"""
         total_tokens = self.FORMAT_TOKENS  # Base format tokens
 
         for message in messages:
-            tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
-
-            # Add role tokens
-            tokens += self.count_text(message.get("role", ""))
+            total_tokens += self.count_message(message)
 
-            # Add content tokens
-            if "content" in message:
-                tokens += self.count_content(message["content"])
+        return total_tokens
 
-            # Add tool calls tokens
-            if "tool_calls" in message:
-                tokens += self.count_tool_calls(message["tool_calls"])
 
-            # Add name and tool_call_id tokens
-            tokens += self.count_text(message.get("name", ""))
-            tokens += self.count_text(message.get("tool_call_id", ""))
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into a single in-flight call.
+
+    The underlying call runs in its own task, so cancelling one awaiter does
+    not affect the others; it is only cancelled once every awaiter has gone.
+    Tokens used by the call are recorded in the usage scopes of every
+    awaiter that was still waiting when it finished.
+    """
+
+    def __init__(self):
+        # key -> [task, awaiter count, usage of the call]
+        self._flights: Dict[str, List] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            self.calls += 1
+            usage = TokenUsage()
+
+            async def run() -> Any:
+                # Tasks copy the caller's context; record into the flight's
+                # own scope instead of the first caller's
+                _usage_scopes.set((usage,))
+                return await call()
+
+            flight = [asyncio.ensure_future(run()), 0, usage]
+            self._flights[key] = flight
+            flight[0].add_done_callback(
+                lambda _: self._flights.pop(key, None)
+                if self._flights.get(key) is flight
+                else None
+            )
+        else:
+            self.coalesced += 1
+            logger.debug(f"Coalescing identical in-flight LLM request {key[:12]}")
 
-            total_tokens += tokens
+        task, _, usage = flight
+        flight[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            flight[1] -= 1
+            if task.done() and not task.cancelled():
+                _record_usage(
+                    usage.input_tokens, usage.completion_tokens, usage.cached_tokens
+                )
+            elif flight[1] == 0:
+                task.cancel()
 
-        return total_tokens
+    def stats(self) -> Dict[str, int]:
+        """Return the number of provider calls made and requests coalesced"""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._flights),
+        }
 
 
 class LLM:
@@ -188,8 +462,9 @@ class LLM:
         self, config_name: str = "default", llm_config: Optional[LLMSettings] = None
     ):
         if not hasattr(self, "client"):  # Only initialize if not already initialized
-            llm_config = llm_config or config.llm
-            llm_config = llm_config.get(config_name, llm_config["default"])
+            llm_configs = llm_config or config.llm
+            llm_config = llm_configs.get(config_name, llm_configs["default"])
+            self.config_name = config_name
             self.model = llm_config.model
             self.max_tokens = llm_config.max_tokens
             self.temperature = llm_config.temperature
@@ -204,6 +479,7 @@ class LLM:
             # Add token counting related attributes
             self.total_input_tokens = 0
             self.total_completion_tokens = 0
+            self.total_cached_tokens = 0
             self.max_input_tokens = (
                 llm_config.max_input_tokens
                 if hasattr(llm_config, "max_input_tokens")
@@ -222,13 +498,18 @@ class LLM:
                     base_url=self.base_url,
                     api_key=self.api_key,
                     api_version=self.api_version,
+                    http_client=get_http_client(),
                 )
             elif self.api_type == "aws":
-                self.client = BedrockClient()
+                self.client = BedrockClient(
+                    max_workers=llm_config.max_concurrency or 16,
+                    timeout=(config.http or HTTPSettings()).timeout,
+                )
             elif self.api_type == "bk":
                 self.client = AsyncOpenAI(
                     base_url=self.base_url,
                     api_key=self.api_key,
+                    http_client=get_http_client(),
                     default_headers={
                         "X-Bkapi-Authorization": json.dumps({
                             "bk_app_code": self.bk_app_code,
@@ -238,10 +519,65 @@ class LLM:
                     }
                 )
             else:
-                self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+                self.client = AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    http_client=get_http_client(),
+                )
 
             self.token_counter = TokenCounter(self.tokenizer)
 
+            # Opt-in persistent response cache shared by all LLM instances
+            self.cache = get_response_cache()
+
+            # Client-side RPM/TPM limiter shared by everything using this config
+            self.rate_limiter = get_rate_limiter(config_name, llm_config)
+
+            # Only transient errors are retried, within a per-call deadline
+            self.retry_policy = RetryPolicy(
+                max_attempts=llm_config.max_retries + 1,
+                deadline=llm_config.retry_deadline,
+            )
+
+            # Stable request prefixes let providers reuse cached prompt tokens
+            self.prefix_cache = llm_config.prefix_cache
+            self.prefix_cache_breakpoints = llm_config.prefix_cache_breakpoints
+
+            # Older screenshots are usually stale, so they can be left out
+            self.max_images = llm_config.max_images
+            self.image_processor = (
+                get_image_processor(llm_config.image_quality)
+                if llm_config.preprocess_images
+                else None
+            )
+
+            # Identical concurrent requests share one provider call
+            self.coalesce_requests = llm_config.coalesce_requests
+            self.single_flight = SingleFlight()
+
+            # Slow tool calls get a backup request once enough latency is observed
+            self.hedge_policy = (
+                HedgePolicy(llm_config.hedge_percentile, llm_config.hedge_min_samples)
+                if llm_config.hedge_percentile
+                else None
+            )
+
+            # Other [llm.*] configs serving the same model, routed between lazily
+            self.endpoint_names = [
+                name for name in llm_config.endpoints if name != config_name
+            ]
+            self._llm_configs = llm_configs
+            self._router: Optional[LLMRouter] = None
+
+    @property
+    def router(self) -> Optional[LLMRouter]:
+        """Router over this config and its endpoints, or None without endpoints"""
+        if self._router is None and self.endpoint_names:
+            self._router = LLMRouter(
+                [self] + [LLM(name, self._llm_configs) for name in self.endpoint_names]
+            )
+        return self._router
+
     def count_tokens(self, text: str) -> int:
         """Calculate the number of tokens in a text"""
         if not text:
@@ -251,44 +587,364 @@ class LLM:
     def count_message_tokens(self, messages: List[dict]) -> int:
         return self.token_counter.count_message_tokens(messages)
 
-    def update_token_count(self, input_tokens: int, completion_tokens: int = 0) -> None:
+    def update_token_count(
+        self, input_tokens: int, completion_tokens: int = 0, cached_tokens: int = 0
+    ) -> None:
         """Update token counts"""
         # Only track tokens if max_input_tokens is set
         self.total_input_tokens += input_tokens
         self.total_completion_tokens += completion_tokens
+        self.total_cached_tokens += cached_tokens
+        _record_usage(input_tokens, completion_tokens, cached_tokens)
         logger.info(
             f"Token usage: Input={input_tokens}, Completion={completion_tokens}, "
             f"Cumulative Input={self.total_input_tokens}, Cumulative Completion={self.total_completion_tokens}, "
             f"Total={input_tokens + completion_tokens}, Cumulative Total={self.total_input_tokens + self.total_completion_tokens}"
         )
+        if cached_tokens:
+            logger.info(
+                f"Prompt cache: Cached={cached_tokens}, Cumulative Cached={self.total_cached_tokens}"
+            )
+
+    @staticmethod
+    def _cached_tokens(usage: Any) -> int:
+        """Read the number of prompt tokens served from the provider's prefix cache"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None)
+        if cached is None:
+            # Anthropic-compatible gateways report cache reads separately
+            cached = getattr(usage, "cache_read_input_tokens", None)
+        return cached or 0
+
+    def add_completion_tokens(self, completion_tokens: int) -> None:
+        """Add estimated completion tokens of a streamed response"""
+        self.total_completion_tokens += completion_tokens
+        _record_usage(0, completion_tokens)
+
+    def used_input_tokens(self) -> int:
+        """Input tokens counted against max_input_tokens so far.
+
+        Inside a budget scope this is the scope's usage, otherwise the
+        process-wide total of this LLM.
+        """
+        usage = budget_usage()
+        return usage.input_tokens if usage is not None else self.total_input_tokens
 
     def check_token_limit(self, input_tokens: int) -> bool:
         """Check if token limits are exceeded"""
         if self.max_input_tokens is not None:
-            return (self.total_input_tokens + input_tokens) <= self.max_input_tokens
+            return (self.used_input_tokens() + input_tokens) <= self.max_input_tokens
         # If max_input_tokens is not set, always return True
         return True
 
     def get_limit_error_message(self, input_tokens: int) -> str:
         """Generate error message for token limit exceeded"""
+        used = self.used_input_tokens()
         if (
             self.max_input_tokens is not None
-            and (self.total_input_tokens + input_tokens) > self.max_input_tokens
+            and (used + input_tokens) > self.max_input_tokens
         ):
-            return f"Request may exceed input token limit (Current: {self.total_input_tokens}, Needed: {input_tokens}, Max: {self.max_input_tokens})"
+            return f"Request may exceed input token limit (Current: {used}, Needed: {input_tokens}, Max: {self.max_input_tokens})"
 
         return "Token limit exceeded"
 
+    def _admit(self, input_tokens: int):
+        """Wait for the rate limiter to admit a request of the estimated size"""
+        if self.rate_limiter is None:
+            return nullcontext()
+        return self.rate_limiter.acquire(input_tokens)
+
+    def _settle_tokens(self, estimated: int, actual: int) -> None:
+        """Report the actual token usage of an admitted request to the rate limiter"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.settle(estimated, actual)
+
+    def _stabilize_prefix(self, params: dict) -> None:
+        """Make the request prefix byte-stable for provider prompt caching.
+
+        Tool schemas are sorted by name with their keys in a canonical order,
+        so the same tools always serialize identically. With breakpoints on,
+        the last system message and the tool block are marked with
+        ``cache_control`` for gateways that take explicit cache breakpoints.
+        """
+        if not self.prefix_cache:
+            return
+        # Bedrock builds its own request body, so breakpoints don't apply
+        breakpoints = self.prefix_cache_breakpoints and self.api_type != "aws"
+
+        if params.get("tools"):
+            tools = sorted(
+                (
+                    json.loads(json.dumps(tool, sort_keys=True))
+                    for tool in params["tools"]
+                ),
+                key=lambda tool: tool.get("function", {}).get("name", ""),
+            )
+            if breakpoints:
+                tools[-1]["cache_control"] = CACHE_BREAKPOINT
+            params["tools"] = tools
+
+        if not breakpoints:
+            return
+        system_indexes = [
+            i for i, msg in enumerate(params["messages"]) if msg["role"] == "system"
+        ]
+        if system_indexes and isinstance(
+            params["messages"][system_indexes[-1]].get("content"), str
+        ):
+            system = dict(params["messages"][system_indexes[-1]])
+            system["content"] = [
+                {
+                    "type": "text",
+                    "text": system["content"],
+                    "cache_control": CACHE_BREAKPOINT,
+                }
+            ]
+            params["messages"] = list(params["messages"])
+            params["messages"][system_indexes[-1]] = system
+
+    @staticmethod
+    def _request_key(kind: str, params: dict) -> str:
+        """Build a stable hash of the parameters that influence the completion.
+
+        Transport options such as ``stream`` and ``timeout`` are ignored, so
+        otherwise identical requests share a key.
+        """
+        return ResponseCache.make_key(
+            kind=kind,
+            model=params.get("model"),
+            messages=params.get("messages"),
+            tools=params.get("tools"),
+            tool_choice=params.get("tool_choice"),
+            temperature=params.get("temperature"),
+            max_tokens=params.get("max_tokens", params.get("max_completion_tokens")),
+        )
+
+    def _cache_key(self, request_key: str, params: dict) -> Optional[str]:
+        """Return the response cache key for a request, or None if it should not be cached"""
+        # Traced calls must reach the trace rather than the cache
+        if self.cache is None or get_trace() is not None:
+            return None
+        if config.llm_cache.deterministic_only and params.get("temperature") != 0:
+            return None
+        return request_key
+
+    def _endpoint_params(self, params: dict) -> dict:
+        """Adapt request parameters built by another endpoint to this one"""
+        temperature = params.get("temperature", self.temperature)
+        params = {
+            k: v
+            for k, v in params.items()
+            if k not in ("max_tokens", "max_completion_tokens", "temperature")
+        } | {"model": self.model}
+        if self.model in REASONING_MODELS:
+            params["max_completion_tokens"] = self.max_tokens
+        else:
+            params["max_tokens"] = self.max_tokens
+            params["temperature"] = temperature
+        if self.api_type == "aws" and params.get("stream"):
+            params["stream"] = False
+        return params
+
+    async def _call_endpoint(
+        self,
+        endpoint: "LLM",
+        params: dict,
+        input_tokens: int,
+        call: Callable[["LLM", dict], Awaitable[Any]],
+    ) -> Any:
+        """Send a provider call to one endpoint under its rate limiter"""
+        if endpoint is self:
+            async with self._admit(input_tokens):
+                return await call(self, params)
+
+        # Usage is counted by the endpoint; mirror it so token limits still apply
+        with track_token_usage() as usage:
+            try:
+                async with endpoint._admit(input_tokens):
+                    return await call(endpoint, endpoint._endpoint_params(params))
+            finally:
+                self.total_input_tokens += usage.input_tokens
+                self.total_completion_tokens += usage.completion_tokens
+                self.total_cached_tokens += usage.cached_tokens
+
+    async def _dispatch(
+        self,
+        request_key: str,
+        params: dict,
+        input_tokens: int,
+        call: Callable[["LLM", dict], Awaitable[Any]],
+        hedge: bool = False,
+        sink: Optional[StreamSink] = None,
+    ) -> Any:
+        """Send a provider call under rate limiting.
+
+        ``call`` receives the endpoint to use and the parameters adapted to it.
+        With endpoints configured the call is routed to the best one and fails
+        over to the others. With ``hedge`` set and a hedge policy configured, a
+        slow call gets a backup request, routed the same way. Concurrent calls
+        with the same request key and sink share one in-flight provider call
+        when request coalescing is enabled and the request is sampled at
+        temperature 0; otherwise each caller gets its own sample. While a
+        trace is active the call is recorded to it, or served from it when
+        replaying.
+        """
+
+        async def route() -> Any:
+            if self.router is None:
+                return await self._call_endpoint(self, params, input_tokens, call)
+            return await self.router.call(
+                lambda endpoint: self._call_endpoint(
+                    endpoint, params, input_tokens, call
+                )
+            )
+
+        async def send() -> Any:
+            if hedge and self.hedge_policy is not None:
+                return await self.hedge_policy.run(route)
+            return await route()
+
+        async def coalesce() -> Any:
+            if not self.coalesce_requests or params.get("temperature") != 0:
+                return await send()
+            # Streams to different sinks must not share one provider call
+            key = request_key if sink is None else f"{request_key}:{id(sink)}"
+            return await self.single_flight.do(key, send)
+
+        trace = get_trace()
+        if trace is not None:
+            return await trace.llm(request_key, coalesce, sink)
+        return await coalesce()
+
+    @staticmethod
+    def _is_complete_json(arguments: str) -> bool:
+        """Check whether streamed tool arguments form a closed JSON document"""
+        if not arguments.rstrip().endswith("}"):
+            return False
+        try:
+            json.loads(arguments)
+        except json.JSONDecodeError:
+            return False
+        return True
+
+    async def _collect_tool_stream(
+        self,
+        response: Any,
+        on_tool_call: Optional[Callable[[ToolCall], Optional[Awaitable[Any]]]] = None,
+    ) -> ChatCompletionMessage:
+        """
+        Assemble a streamed tool-call response into a single message.
+
+        Tool call deltas arrive keyed by index. A call is complete once its
+        arguments close as valid JSON or a later call starts, at which point
+        it is handed to ``on_tool_call`` while the model keeps generating.
+        If the stream fails after a call was handed out, the error is raised
+        as ``ToolStreamInterrupted`` so that the request is not retried.
+
+        Args:
+            response: Async iterator of chat completion chunks
+            on_tool_call: Optional callback for each completed tool call
+
+        Returns:
+            ChatCompletionMessage: The assembled assistant message
+        """
+        content_parts: List[str] = []
+        calls: Dict[int, dict] = {}
+        dispatched: set = set()
+
+        async def dispatch(index: int) -> None:
+            if index in dispatched:
+                return
+            dispatched.add(index)
+            if on_tool_call is None:
+                return
+            call = calls[index]
+            result = on_tool_call(
+                ToolCall(
+                    id=call["id"],
+                    function=Function(name=call["name"], arguments=call["arguments"]),
+                )
+            )
+            if inspect.isawaitable(result):
+                await result
+
+        try:
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+
+                for tool_delta in delta.tool_calls or []:
+                    index = tool_delta.index
+                    if index not in calls:
+                        # A new call starting means every earlier call is complete
+                        for previous in sorted(calls):
+                            await dispatch(previous)
+                        calls[index] = {"id": "", "name": "", "arguments": ""}
+
+                    call = calls[index]
+                    if tool_delta.id:
+                        call["id"] = tool_delta.id
+                    if tool_delta.function:
+                        call["name"] += tool_delta.function.name or ""
+                        call["arguments"] += tool_delta.function.arguments or ""
+
+                    if (
+                        call["id"]
+                        and call["name"]
+                        and self._is_complete_json(call["arguments"])
+                    ):
+                        await dispatch(index)
+        except Exception as e:
+            if on_tool_call is None or not dispatched:
+                raise
+            # Calls already handed out may have run; a retry would repeat them
+            raise ToolStreamInterrupted(
+                f"Tool call stream failed after dispatching calls: {e}",
+                dispatched=[calls[index]["id"] for index in sorted(dispatched)],
+            ) from e
+
+        for index in sorted(calls):
+            await dispatch(index)
+
+        tool_calls = [
+            ChatCompletionMessageToolCall(
+                id=calls[index]["id"],
+                type="function",
+                function={
+                    "name": calls[index]["name"],
+                    "arguments": calls[index]["arguments"],
+                },
+            )
+            for index in sorted(calls)
+        ]
+        return ChatCompletionMessage(
+            role="assistant",
+            content="".join(content_parts) or None,
+            tool_calls=tool_calls or None,
+        )
+
     @staticmethod
     def format_messages(
-        messages: List[Union[dict, Message]], supports_images: bool = False
+        messages: List[Union[dict, Message]],
+        supports_images: bool = False,
+        max_images: Optional[int] = None,
+        image_processor: Optional[ImageProcessor] = None,
     ) -> List[dict]:
         """
         Format messages for LLM by converting them to OpenAI message format.
 
+        Images stored by reference are read from the blob store here, so only
+        the request being built holds their base64 data.
+
         Args:
             messages: List of messages that can be either dict or Message objects
             supports_images: Flag indicating if the target model supports image inputs
+            max_images: Only send the images of this many most recent messages
+                (None for all)
+            image_processor: Down-scales and re-encodes the images that are sent
 
         Returns:
             List[dict]: List of formatted messages in OpenAI format
@@ -307,16 +963,43 @@ class LLM:
         """
         formatted_messages = []
 
-        for message in messages:
-            # Convert Message objects to dictionaries
-            if isinstance(message, Message):
-                message = message.to_dict()
-
+        # Convert Message objects to dictionaries
+        messages = [
+            message.to_dict() if isinstance(message, Message) else message
+            for message in messages
+        ]
+        with_images = [
+            index
+            for index, message in enumerate(messages)
+            if isinstance(message, dict)
+            and (message.get("base64_image") or message.get("image_ref"))
+        ]
+        if max_images is not None:
+            with_images = with_images[-max_images:] if max_images > 0 else []
+        images_to_send = set(with_images) if supports_images else set()
+
+        for index, message in enumerate(messages):
             if isinstance(message, dict):
                 # If message is a dict, ensure it has required fields
                 if "role" not in message:
                     raise ValueError("Message dict must contain 'role' field")
 
+                # Materialize the images that will be sent and drop the rest
+                image_ref = message.pop("image_ref", None)
+                if index not in images_to_send:
+                    message.pop("base64_image", None)
+                else:
+                    if image_ref:
+                        try:
+                            message["base64_image"] = get_blob_store().get(image_ref)
+                        except KeyError:
+                            # E.g. pruned, or a journal resumed on another host
+                            logger.warning(f"Dropping missing image {image_ref}")
+                    if image_processor is not None and message.get("base64_image"):
+                        message["base64_image"] = image_processor.process(
+                            message["base64_image"]
+                        )
+
                 # Process base64 images if present and model supports images
                 if supports_images and message.get("base64_image"):
                     # Initialize or convert content to appropriate format
@@ -367,19 +1050,95 @@ class LLM:
 
         return formatted_messages
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    async def _format(
+        self, messages: List[Union[dict, Message]], supports_images: bool
+    ) -> List[dict]:
+        """Format messages for this model, see format_messages.
+
+        Decoding, resizing and re-encoding images takes tens of milliseconds
+        each, so formatting runs in a worker thread whenever images are sent
+        through the image processor.
+        """
+        if supports_images and self.image_processor is not None:
+            return await asyncio.to_thread(
+                self.format_messages,
+                messages,
+                supports_images,
+                self.max_images,
+                self.image_processor,
+            )
+        return self.format_messages(messages, supports_images, self.max_images)
+
+    async def _complete(
+        self,
+        params: dict,
+        input_tokens: int,
+        stream: bool,
+        sink: Optional[StreamSink] = None,
+    ) -> str:
+        """Send a plain completion request and return the response text"""
+        if not stream or self.api_type == "aws":
+            # Non-streaming request. Bedrock consumes its event stream itself and
+            # returns the full response
+            extra = {"stream_sink": get_stream_sink(sink)} if stream else {}
+            response = await self.client.chat.completions.create(
+                **params, stream=stream, **extra
+            )
+
+            if not response.choices or not response.choices[0].message.content:
+                raise ValueError("Empty or invalid response from LLM")
+
+            # Update token counts
+            self.update_token_count(
+                response.usage.prompt_tokens,
+                response.usage.completion_tokens,
+                self._cached_tokens(response.usage),
+            )
+            self._settle_tokens(
+                input_tokens,
+                response.usage.prompt_tokens + response.usage.completion_tokens,
+            )
+
+            return response.choices[0].message.content
+
+        # Streaming request, For streaming, update estimated token count before making the request
+        self.update_token_count(input_tokens)
+        sink = get_stream_sink(sink)
+
+        response = await self.client.chat.completions.create(**params, stream=True)
+
+        collected_messages = []
+        completion_text = ""
+        async for chunk in response:
+            chunk_message = chunk.choices[0].delta.content or ""
+            collected_messages.append(chunk_message)
+            completion_text += chunk_message
+            if chunk_message:
+                await sink.send(chunk_message)
+
+        await sink.end()
+        full_response = "".join(collected_messages).strip()
+        if not full_response:
+            raise ValueError("Empty response from streaming LLM")
+
+        # estimate completion tokens for streaming response
+        completion_tokens = self.count_tokens(completion_text)
+        logger.info(
+            f"Estimated completion tokens for streaming response: {completion_tokens}"
+        )
+        self.add_completion_tokens(completion_tokens)
+        self._settle_tokens(input_tokens, input_tokens + completion_tokens)
+
+        return full_response
+
+    @llm_retry
     async def ask(
         self,
         messages: List[Union[dict, Message]],
         system_msgs: Optional[List[Union[dict, Message]]] = None,
         stream: bool = True,
         temperature: Optional[float] = None,
+        stream_sink: Optional[StreamSink] = None,
     ) -> str:
         """
         Send a prompt to the LLM and get the response.
@@ -389,6 +1148,8 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response
             temperature (float): Sampling temperature for the response
+            stream_sink: Where streamed text goes; defaults to the sink set with
+                ``stream_to``, or stdout
 
         Returns:
             str: The generated response
@@ -405,10 +1166,10 @@ class LLM:
 
             # Format system and user messages with image support check
             if system_msgs:
-                system_msgs = self.format_messages(system_msgs, supports_images)
-                messages = system_msgs + self.format_messages(messages, supports_images)
+                system_msgs = await self._format(system_msgs, supports_images)
+                messages = system_msgs + await self._format(messages, supports_images)
             else:
-                messages = self.format_messages(messages, supports_images)
+                messages = await self._format(messages, supports_images)
 
             # Calculate input token count
             input_tokens = self.count_message_tokens(messages)
@@ -432,48 +1193,31 @@ class LLM:
                     temperature if temperature is not None else self.temperature
                 )
 
-            if not stream:
-                # Non-streaming request
-                response = await self.client.chat.completions.create(
-                    **params, stream=False
-                )
-
-                if not response.choices or not response.choices[0].message.content:
-                    raise ValueError("Empty or invalid response from LLM")
-
-                # Update token counts
-                self.update_token_count(
-                    response.usage.prompt_tokens, response.usage.completion_tokens
-                )
-
-                return response.choices[0].message.content
-
-            # Streaming request, For streaming, update estimated token count before making the request
-            self.update_token_count(input_tokens)
-
-            response = await self.client.chat.completions.create(**params, stream=True)
-
-            collected_messages = []
-            completion_text = ""
-            async for chunk in response:
-                chunk_message = chunk.choices[0].delta.content or ""
-                collected_messages.append(chunk_message)
-                completion_text += chunk_message
-                print(chunk_message, end="", flush=True)
-
-            print()  # Newline after streaming
-            full_response = "".join(collected_messages).strip()
-            if not full_response:
-                raise ValueError("Empty response from streaming LLM")
-
-            # estimate completion tokens for streaming response
-            completion_tokens = self.count_tokens(completion_text)
-            logger.info(
-                f"Estimated completion tokens for streaming response: {completion_tokens}"
+            self._stabilize_prefix(params)
+            request_key = self._request_key("ask", params)
+            cache_key = self._cache_key(request_key, params)
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    logger.debug("LLM response cache hit for ask")
+                    if stream:
+                        sink = get_stream_sink(stream_sink)
+                        await sink.send(cached)
+                        await sink.end()
+                    return cached
+
+            sink = get_stream_sink(stream_sink) if stream else None
+            response = await self._dispatch(
+                request_key,
+                params,
+                input_tokens,
+                lambda llm, p: llm._complete(p, input_tokens, stream, sink),
+                sink=sink,
             )
-            self.total_completion_tokens += completion_tokens
 
-            return full_response
+            if cache_key:
+                self.cache.set(cache_key, response)
+            return response
 
         except TokenLimitExceeded:
             # Re-raise token limit errors without logging
@@ -494,13 +1238,7 @@ class LLM:
             logger.exception(f"Unexpected error in ask")
             raise
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    @llm_retry
     async def ask_with_images(
         self,
         messages: List[Union[dict, Message]],
@@ -508,6 +1246,7 @@ class LLM:
         system_msgs: Optional[List[Union[dict, Message]]] = None,
         stream: bool = False,
         temperature: Optional[float] = None,
+        stream_sink: Optional[StreamSink] = None,
     ) -> str:
         """
         Send a prompt with images to the LLM and get the response.
@@ -518,6 +1257,8 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response
             temperature (float): Sampling temperature for the response
+            stream_sink: Where streamed text goes; defaults to the sink set with
+                ``stream_to``, or stdout
 
         Returns:
             str: The generated response
@@ -537,7 +1278,7 @@ class LLM:
                 )
 
             # Format messages with image support
-            formatted_messages = self.format_messages(messages, supports_images=True)
+            formatted_messages = await self._format(messages, supports_images=True)
 
             # Ensure the last message is from the user to attach images
             if not formatted_messages or formatted_messages[-1]["role"] != "user":
@@ -561,23 +1302,31 @@ class LLM:
             # Add images to content
             for image in images:
                 if isinstance(image, str):
-                    multimodal_content.append(
-                        {"type": "image_url", "image_url": {"url": image}}
-                    )
+                    image_url = {"url": image}
                 elif isinstance(image, dict) and "url" in image:
-                    multimodal_content.append({"type": "image_url", "image_url": image})
+                    image_url = image
                 elif isinstance(image, dict) and "image_url" in image:
-                    multimodal_content.append(image)
+                    image_url = image["image_url"]
                 else:
                     raise ValueError(f"Unsupported image format: {image}")
 
+                # Inline images are down-scaled; remote URLs are left to the provider
+                if self.image_processor is not None:
+                    image_url = {
+                        **image_url,
+                        "url": await asyncio.to_thread(
+                            self.image_processor.process_url, image_url["url"]
+                        ),
+                    }
+                multimodal_content.append({"type": "image_url", "image_url": image_url})
+
             # Update the message with multimodal content
             last_message["content"] = multimodal_content
 
             # Add system messages if provided
             if system_msgs:
                 all_messages = (
-                    self.format_messages(system_msgs, supports_images=True)
+                    await self._format(system_msgs, supports_images=True)
                     + formatted_messages
                 )
             else:
@@ -592,7 +1341,6 @@ class LLM:
             params = {
                 "model": self.model,
                 "messages": all_messages,
-                "stream": stream,
             }
 
             # Add model-specific parameters
@@ -604,33 +1352,16 @@ class LLM:
                     temperature if temperature is not None else self.temperature
                 )
 
-            # Handle non-streaming request
-            if not stream:
-                response = await self.client.chat.completions.create(**params)
-
-                if not response.choices or not response.choices[0].message.content:
-                    raise ValueError("Empty or invalid response from LLM")
-
-                self.update_token_count(response.usage.prompt_tokens)
-                return response.choices[0].message.content
-
-            # Handle streaming request
-            self.update_token_count(input_tokens)
-            response = await self.client.chat.completions.create(**params)
-
-            collected_messages = []
-            async for chunk in response:
-                chunk_message = chunk.choices[0].delta.content or ""
-                collected_messages.append(chunk_message)
-                print(chunk_message, end="", flush=True)
-
-            print()  # Newline after streaming
-            full_response = "".join(collected_messages).strip()
-
-            if not full_response:
-                raise ValueError("Empty response from streaming LLM")
-
-            return full_response
+            self._stabilize_prefix(params)
+            request_key = self._request_key("ask_with_images", params)
+            sink = get_stream_sink(stream_sink) if stream else None
+            return await self._dispatch(
+                request_key,
+                params,
+                input_tokens,
+                lambda llm, p: llm._complete(p, input_tokens, stream, sink),
+                sink=sink,
+            )
 
         except TokenLimitExceeded:
             raise
@@ -650,13 +1381,49 @@ class LLM:
             logger.error(f"Unexpected error in ask_with_images: {e}")
             raise
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    async def _complete_tool(
+        self,
+        params: dict,
+        input_tokens: int,
+        on_tool_call: Optional[Callable[[ToolCall], Optional[Awaitable[Any]]]] = None,
+    ) -> ChatCompletionMessage | None:
+        """Send a tool-calling request and return the assistant message"""
+        if params.get("stream"):
+            self.update_token_count(input_tokens)
+            response = await self.client.chat.completions.create(**params)
+            message = await self._collect_tool_stream(response, on_tool_call)
+
+            completion_tokens = self.count_tokens(message.content or "")
+            if message.tool_calls:
+                completion_tokens += self.token_counter.count_tool_calls(
+                    [call.model_dump() for call in message.tool_calls]
+                )
+            self.add_completion_tokens(completion_tokens)
+            self._settle_tokens(input_tokens, input_tokens + completion_tokens)
+            return message
+
+        response: ChatCompletion = await self.client.chat.completions.create(**params)
+
+        # Check if response is valid
+        if not response.choices or not response.choices[0].message:
+            logger.debug(response)
+            # raise ValueError("Invalid or empty response from LLM")
+            return None
+
+        # Update token counts
+        self.update_token_count(
+            response.usage.prompt_tokens,
+            response.usage.completion_tokens,
+            self._cached_tokens(response.usage),
+        )
+        self._settle_tokens(
+            input_tokens,
+            response.usage.prompt_tokens + response.usage.completion_tokens,
+        )
+
+        return response.choices[0].message
+
+    @llm_retry
     async def ask_tool(
         self,
         messages: List[Union[dict, Message]],
@@ -665,6 +1432,8 @@ class LLM:
         tools: Optional[List[dict]] = None,
         tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
         temperature: Optional[float] = None,
+        stream: bool = False,
+        on_tool_call: Optional[Callable[[ToolCall], Optional[Awaitable[Any]]]] = None,
         **kwargs,
     ) -> ChatCompletionMessage | None:
         """
@@ -677,6 +1446,9 @@ class LLM:
             tools: List of tools to use
             tool_choice: Tool choice strategy
             temperature: Sampling temperature for the response
+            stream: Whether to stream the response and assemble tool calls incrementally
+            on_tool_call: Optional callback invoked with each tool call as soon as its
+                arguments are complete (streaming mode only)
             **kwargs: Additional completion arguments
 
         Returns:
@@ -698,10 +1470,10 @@ class LLM:
 
             # Format messages
             if system_msgs:
-                system_msgs = self.format_messages(system_msgs, supports_images)
-                messages = system_msgs + self.format_messages(messages, supports_images)
+                system_msgs = await self._format(system_msgs, supports_images)
+                messages = system_msgs + await self._format(messages, supports_images)
             else:
-                messages = self.format_messages(messages, supports_images)
+                messages = await self._format(messages, supports_images)
 
             # Calculate input token count
             input_tokens = self.count_message_tokens(messages)
@@ -744,23 +1516,30 @@ class LLM:
                     temperature if temperature is not None else self.temperature
                 )
 
-            params["stream"] = False  # Always use non-streaming for tool requests
-            response: ChatCompletion = await self.client.chat.completions.create(
-                **params
+            self._stabilize_prefix(params)
+            request_key = self._request_key("ask_tool", params)
+            cache_key = self._cache_key(request_key, params)
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    logger.debug("LLM response cache hit for ask_tool")
+                    return ChatCompletionMessage.model_validate_json(cached)
+
+            # Bedrock streaming does not produce OpenAI-style chunks
+            params["stream"] = stream and self.api_type != "aws"
+            message = await self._dispatch(
+                request_key,
+                params,
+                input_tokens,
+                lambda llm, p: llm._complete_tool(p, input_tokens, on_tool_call),
+                # Streamed calls dispatch tools as they arrive, so they can't be raced
+                hedge=not params["stream"],
             )
 
-            # Check if response is valid
-            if not response.choices or not response.choices[0].message:
-                logger.debug(response)
-                # raise ValueError("Invalid or empty response from LLM")
-                return None
-
-            # Update token counts
-            self.update_token_count(
-                response.usage.prompt_tokens, response.usage.completion_tokens
-            )
-
-            return response.choices[0].message
+            # Bedrock responses are plain objects and are not cached
+            if cache_key and isinstance(message, ChatCompletionMessage):
+                self.cache.set(cache_key, message.model_dump_json())
+            return message
 
         except TokenLimitExceeded:
             # Re-raise token limit errors without logging
@@ -780,3 +1559,101 @@ class LLM:
         except Exception as e:
             logger.error(f"Unexpected error in ask_tool: {e}")
             raise
+
+    async def _run_batch(
+        self,
+        calls: List[Callable[[], Awaitable[Any]]],
+        max_concurrency: int,
+    ) -> BatchResult:
+        """Run calls with bounded concurrency, keeping per-item results in order"""
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run(index: int, call: Callable[[], Awaitable[Any]]):
+            async with semaphore:
+                item = BatchItemResult(index=index)
+                start = time.monotonic()
+                with track_token_usage() as usage:
+                    try:
+                        item.result = await call()
+                    except Exception as e:
+                        logger.warning(f"Batch item {index} failed: {e}")
+                        item.error = f"{type(e).__name__}: {e}"
+                item.latency = time.monotonic() - start
+                item.usage = usage
+                return item
+
+        start = time.monotonic()
+        with track_token_usage() as usage:
+            items = await asyncio.gather(
+                *(run(index, call) for index, call in enumerate(calls))
+            )
+        batch = BatchResult(
+            items=list(items), wall_time=time.monotonic() - start, usage=usage
+        )
+        logger.info(
+            f"Batch of {len(items)} completed in {batch.wall_time:.2f}s "
+            f"({len(batch.failed)} failed, max latency {batch.max_latency:.2f}s, "
+            f"tokens {usage.total_tokens})"
+        )
+        return batch
+
+    async def ask_many(
+        self,
+        messages_list: List[List[Union[dict, Message]]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        max_concurrency: int = 4,
+        **kwargs,
+    ) -> BatchResult:
+        """
+        Send several independent prompts with bounded concurrency.
+
+        Args:
+            messages_list: One list of conversation messages per prompt
+            system_msgs: Optional system messages prepended to every prompt
+            max_concurrency: Maximum number of prompts in flight at once
+            **kwargs: Additional arguments passed to ask (stream defaults to False)
+
+        Returns:
+            BatchResult: Per-prompt results and errors in input order, with
+            aggregate latency and token usage
+        """
+        kwargs.setdefault("stream", False)
+        return await self._run_batch(
+            [
+                lambda messages=messages: self.ask(
+                    messages, system_msgs=system_msgs, **kwargs
+                )
+                for messages in messages_list
+            ],
+            max_concurrency,
+        )
+
+    async def ask_tool_many(
+        self,
+        messages_list: List[List[Union[dict, Message]]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        max_concurrency: int = 4,
+        **kwargs,
+    ) -> BatchResult:
+        """
+        Send several independent tool-calling prompts with bounded concurrency.
+
+        Args:
+            messages_list: One list of conversation messages per prompt
+            system_msgs: Optional system messages prepended to every prompt
+            max_concurrency: Maximum number of prompts in flight at once
+            **kwargs: Additional arguments passed to ask_tool (tools, tool_choice, ...)
+
+        Returns:
+            BatchResult: Per-prompt ChatCompletionMessage results and errors in
+            input order, with aggregate latency and token usage
+        """
+        return await self._run_batch(
+            [
+                lambda messages=messages: self.ask_tool(
+                    messages, system_msgs=system_msgs, **kwargs
+                )
+                for messages in messages_list
+            ],
+            max_concurrency,
+        )
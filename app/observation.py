@@ -0,0 +1,148 @@
+import os
+import threading
+import uuid
+from contextlib import suppress
+from pathlib import Path
+from typing import Optional
+
+from app.config import config
+
+
+SPILL_NOTICE = (
+    "\n\n... [{omitted} of {total} characters omitted. The full output is saved "
+    "as observation `{id}`; call `read_observation` with this id and an offset "
+    "to read the rest.] ...\n\n"
+)
+# Used instead when the limit leaves no room for SPILL_NOTICE
+SHORT_SPILL_NOTICE = "[Output saved as observation `{id}`]"
+
+# Size of the pieces spill files are written in
+CHUNK_SIZE = 1 << 20
+
+
+class ObservationStore:
+    """Spill files for tool outputs too large to keep in the conversation.
+
+    ``spill`` writes the full output to a file under ``root`` and returns a
+    bounded summary of its head and tail with a reference to the file;
+    ``read`` pages through a spilled output by character offset. Once the
+    files add up to more than ``max_bytes``, the least recently used ones are
+    deleted, and ``read`` raises ``KeyError`` for them like for any unknown id.
+
+    Attributes:
+        root: Directory holding one ``<id>.txt`` file per spilled output.
+        max_bytes: Size the store is pruned back to, or None to keep everything.
+        spills: Outputs written to disk.
+        evictions: Outputs deleted to stay within max_bytes.
+    """
+
+    def __init__(self, root: Path, max_bytes: Optional[int] = 256 << 20):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.spills = 0
+        self.evictions = 0
+        # Prune on the first spill, to bound what earlier runs left behind
+        self._written_since_prune = max_bytes or 0
+        # Spills run in worker threads, possibly several at once
+        self._lock = threading.Lock()
+
+    def _path(self, observation_id: str) -> Path:
+        # Ids are generated here, so anything else is not a spill file
+        if not observation_id.startswith("obs_") or not observation_id[4:].isalnum():
+            raise KeyError(f"Unknown observation {observation_id}")
+        return self.root / f"{observation_id}.txt"
+
+    def spill(self, text: str, limit: int) -> str:
+        """Return text unchanged if it fits in limit characters, else spill it.
+
+        The summary of a spilled output, notice included, is at most limit
+        characters long, unless limit is too small for even the short notice
+        (about 50 characters), which is then returned on its own.
+        """
+        if len(text) <= limit:
+            return text
+
+        observation_id = f"obs_{uuid.uuid4().hex[:12]}"
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self._path(observation_id), "w", encoding="utf-8") as f:
+            for start in range(0, len(text), CHUNK_SIZE):
+                f.write(text[start : start + CHUNK_SIZE])
+        with self._lock:
+            self.spills += 1
+            self._written_since_prune += len(text)
+            due = self.max_bytes and self._written_since_prune >= self.max_bytes // 10
+        if due:
+            self.prune()
+
+        # The omitted count only gets shorter once head and tail are known
+        longest = SPILL_NOTICE.format(
+            omitted=len(text), total=len(text), id=observation_id
+        )
+        if len(longest) > limit:
+            return SHORT_SPILL_NOTICE.format(id=observation_id)
+        budget = limit - len(longest)
+        head, tail = budget - budget // 2, budget // 2
+        notice = SPILL_NOTICE.format(
+            omitted=len(text) - head - tail, total=len(text), id=observation_id
+        )
+        return text[:head] + notice + (text[-tail:] if tail else "")
+
+    def prune(self) -> None:
+        """Delete the least recently used outputs until the store fits max_bytes"""
+        with self._lock:
+            self._written_since_prune = 0
+        if not self.max_bytes or not self.root.exists():
+            return
+        files = []
+        for path in self.root.glob("obs_*.txt"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+
+    def read(self, observation_id: str, offset: int = 0, limit: int = 4000) -> str:
+        """Return up to limit characters of a spilled output from offset.
+
+        Raises:
+            KeyError: If no spilled output has that id.
+        """
+        path = self._path(observation_id)
+        try:
+            with open(path, encoding="utf-8") as f:
+                # Text files can only seek to positions returned by tell, so
+                # skip to the offset in chunks
+                remaining = offset
+                while remaining > 0 and f.read(min(remaining, CHUNK_SIZE)):
+                    remaining -= min(remaining, CHUNK_SIZE)
+                text = f.read(limit)
+        except FileNotFoundError:
+            raise KeyError(f"Unknown observation {observation_id}") from None
+        # Mark the output as recently used for pruning
+        with suppress(OSError):
+            os.utime(path)
+        return text
+
+
+_observation_store: Optional[ObservationStore] = None
+_observation_store_lock = threading.Lock()
+
+
+def get_observation_store() -> ObservationStore:
+    """Return the process-wide observation store under the workspace."""
+    global _observation_store
+    if _observation_store is None:
+        with _observation_store_lock:
+            if _observation_store is None:
+                _observation_store = ObservationStore(
+                    config.workspace_root / ".observations"
+                )
+    return _observation_store
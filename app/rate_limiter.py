@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.config import LLMSettings
+from app.logger import logger
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``capacity`` units per minute.
+
+    The level may go negative when actual usage turns out higher than the
+    estimate admitted, so later callers pay back the debt.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.level = float(capacity)
+        self.refill_per_second = capacity / 60.0
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(
+            self.capacity,
+            self.level + (now - self.updated_at) * self.refill_per_second,
+        )
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken from the bucket"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.refill_per_second
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Client-side admission control for one LLM config.
+
+    Requests are admitted in arrival order once both the requests-per-minute
+    and tokens-per-minute buckets have capacity, and at most
+    ``max_concurrency`` requests are in flight at once on each event loop.
+
+    Attributes:
+        name: The LLM config name this limiter belongs to.
+        rpm: Requests per minute, or None for unlimited.
+        tpm: Estimated tokens per minute, or None for unlimited.
+        max_concurrency: Maximum in-flight requests, or None for unlimited.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        # The lock and semaphore bind to the loop that first waits on them, so
+        # each running event loop gets its own; the buckets are shared
+        self._loops: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _loop_state(self) -> Tuple[asyncio.Lock, Optional[asyncio.Semaphore]]:
+        """Return the admission queue and concurrency slots of the running loop"""
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            # asyncio.Lock wakes waiters in FIFO order, which keeps admission fair
+            queue = asyncio.Lock()
+            slots = (
+                asyncio.Semaphore(self.max_concurrency)
+                if self.max_concurrency
+                else None
+            )
+            state = self._loops[loop] = (queue, slots)
+        return state
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = 0.0
+        if self._requests:
+            wait = max(wait, self._requests.wait_time(1))
+        if self._tokens:
+            wait = max(wait, self._tokens.wait_time(tokens))
+        return wait
+
+    @asynccontextmanager
+    async def acquire(self, tokens: int = 0) -> AsyncIterator[None]:
+        """Wait for admission of a request estimated at the given token count."""
+        start = time.monotonic()
+        queue, slots = self._loop_state()
+        self.queue_depth += 1
+        try:
+            async with queue:
+                while (wait := self._wait_time(tokens)) > 0:
+                    await asyncio.sleep(wait)
+                if self._requests:
+                    self._requests.take(1)
+                if self._tokens:
+                    self._tokens.take(tokens)
+            if slots:
+                await slots.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        waited = time.monotonic() - start
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        if waited > 1:
+            logger.info(f"LLM '{self.name}' request waited {waited:.2f}s for admission")
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if slots:
+                slots.release()
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the actual usage of a request is known."""
+        if not self._tokens or actual == estimated:
+            return
+        if actual > estimated:
+            self._tokens.take(actual - estimated)
+        else:
+            self._tokens.give(estimated - actual)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and wait-time metrics"""
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "avg_wait": self.total_wait / self.admitted if self.admitted else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, settings: LLMSettings) -> Optional[RateLimiter]:
+    """Return the shared limiter for an LLM config, or None if it has no limits."""
+    if not (settings.rpm or settings.tpm or settings.max_concurrency):
+        return None
+
+    with _rate_limiters_lock:
+        if name not in _rate_limiters:
+            _rate_limiters[name] = RateLimiter(
+                name,
+                rpm=settings.rpm,
+                tpm=settings.tpm,
+                max_concurrency=settings.max_concurrency,
+            )
+    return _rate_limiters[name]
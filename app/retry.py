@@ -0,0 +1,201 @@
+import asyncio
+import functools
+import random
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_before_delay,
+)
+
+from app.logger import logger
+
+
+# HTTP statuses worth retrying: timeouts, conflicts, throttling and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Bedrock error codes worth retrying
+RETRYABLE_AWS_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+}
+
+
+def classify_error(error: BaseException) -> Optional[str]:
+    """Return a label for a retryable error, or None if it must not be retried.
+
+    Validation errors, authentication failures, bad requests and programming
+    errors fail immediately; throttling, timeouts, connection problems and
+    server errors are retried.
+    """
+    if isinstance(error, RateLimitError):
+        return "rate_limit"
+    if isinstance(
+        error, (APITimeoutError, asyncio.TimeoutError, httpx.TimeoutException)
+    ):
+        return "timeout"
+    if isinstance(error, (APIConnectionError, httpx.TransportError)):
+        return "connection"
+    if isinstance(error, InternalServerError):
+        return "server_error"
+    if isinstance(error, APIStatusError):
+        if error.status_code in RETRYABLE_STATUS_CODES:
+            return f"http_{error.status_code}"
+        return None
+
+    try:
+        from botocore.exceptions import ClientError, ConnectionError, ReadTimeoutError
+    except ImportError:
+        return None
+    if isinstance(error, ReadTimeoutError):
+        return "timeout"
+    if isinstance(error, ConnectionError):
+        return "connection"
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        if code in RETRYABLE_AWS_ERROR_CODES:
+            return "rate_limit" if "Throttl" in code or "TooMany" in code else code
+    return None
+
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """Read the server-requested delay in seconds from Retry-After headers."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryStats:
+    """Counters of retried, exhausted and non-retryable errors by error class"""
+
+    def __init__(self):
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"retried": 0, "exhausted": 0, "not_retried": 0}
+        )
+
+    def record(self, label: str, outcome: str) -> None:
+        self.counters[label][outcome] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {label: dict(counts) for label, counts in self.counters.items()}
+
+
+retry_stats = RetryStats()
+
+
+class RetryPolicy:
+    """Error-classified retry policy for LLM calls.
+
+    Only errors accepted by ``classify_error`` are retried. The delay honours
+    Retry-After headers and otherwise uses full-jitter exponential backoff,
+    and retries stop once the next sleep would exceed the per-call deadline.
+
+    Attributes:
+        max_attempts: Maximum number of attempts, including the first.
+        deadline: Total time budget per call in seconds.
+        min_wait: Lower bound of the backoff in seconds.
+        max_wait: Upper bound of the backoff in seconds.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 6,
+        deadline: float = 120.0,
+        min_wait: float = 1.0,
+        max_wait: float = 30.0,
+    ):
+        self.max_attempts = max_attempts
+        self.deadline = deadline
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+
+    def _should_retry(self, error: BaseException) -> bool:
+        label = classify_error(error)
+        if label is None:
+            retry_stats.record(type(error).__name__, "not_retried")
+            return False
+        return True
+
+    def _wait(self, retry_state: RetryCallState) -> float:
+        error = retry_state.outcome.exception()
+        ceiling = min(
+            self.max_wait, self.min_wait * 2 ** (retry_state.attempt_number - 1)
+        )
+        backoff = random.uniform(self.min_wait, max(self.min_wait, ceiling))
+        retry_after = get_retry_after(error)
+        return max(backoff, retry_after) if retry_after is not None else backoff
+
+    @staticmethod
+    def _before_sleep(retry_state: RetryCallState) -> None:
+        error = retry_state.outcome.exception()
+        label = classify_error(error)
+        retry_stats.record(label, "retried")
+        logger.warning(
+            f"Retrying {retry_state.fn.__name__} in {retry_state.upcoming_sleep:.1f}s "
+            f"after {label} error (attempt {retry_state.attempt_number}): {error}"
+        )
+
+    def retrying(self) -> AsyncRetrying:
+        """Build a tenacity controller for a single call"""
+        return AsyncRetrying(
+            retry=retry_if_exception(self._should_retry),
+            wait=self._wait,
+            stop=stop_after_attempt(self.max_attempts)
+            | stop_before_delay(self.deadline),
+            before_sleep=self._before_sleep,
+            reraise=True,
+        )
+
+
+def llm_retry(func: Callable) -> Callable:
+    """Retry an LLM method according to the instance's ``retry_policy``."""
+
+    @functools.wraps(func)
+    async def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await self.retry_policy.retrying()(func, self, *args, **kwargs)
+        except Exception as e:
+            label = classify_error(e)
+            if label is not None:
+                retry_stats.record(label, "exhausted")
+            raise
+
+    return wrapper
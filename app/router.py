@@ -0,0 +1,222 @@
+import asyncio
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+from app.logger import logger
+from app.retry import classify_error
+
+
+if TYPE_CHECKING:
+    from app.llm import LLM
+
+
+class EndpointHealth:
+    """Observed latency and error rate of one endpoint.
+
+    Latency and error rate are exponentially weighted moving averages, so the
+    router adapts to endpoints slowing down or recovering. After
+    ``failure_threshold`` consecutive failures an endpoint is skipped for
+    ``cooldown`` seconds unless no healthy endpoint is left.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        alpha: float = 0.3,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+    ):
+        self.name = name
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def score(self) -> float:
+        """Expected cost of the next request; lower is better.
+
+        Endpoints without samples score zero so that each one gets tried.
+        """
+        latency = self.latency or 0.0
+        return latency * (1 + self.in_flight) / max(1.0 - self.error_rate, 0.05)
+
+    def record_success(self, latency: float) -> None:
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.error_rate *= 1 - self.alpha
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.alpha * (latency - self.latency)
+
+    def record_failure(self, latency: float) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.error_rate += self.alpha * (1.0 - self.error_rate)
+        # A failed attempt still tells us the endpoint is at least this slow
+        if self.latency is None or latency > self.latency:
+            self.latency = latency
+        if self.consecutive_failures >= self.failure_threshold:
+            self.unhealthy_until = time.monotonic() + self.cooldown
+            logger.warning(
+                f"LLM endpoint '{self.name}' marked unhealthy for {self.cooldown:.0f}s "
+                f"after {self.consecutive_failures} consecutive failures"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class LLMRouter:
+    """Routes calls across several endpoints serving the same model.
+
+    Each call goes to the healthy endpoint with the lowest score and fails
+    over to the next one on retryable errors such as throttling, timeouts
+    and server errors. Non-retryable errors are raised immediately since
+    another endpoint would reject the request too.
+
+    Attributes:
+        endpoints: The LLM instances being routed between.
+        health: Health tracking per endpoint config name.
+    """
+
+    def __init__(self, endpoints: List["LLM"], **health_options: Any):
+        self.endpoints = endpoints
+        self.health: Dict[str, EndpointHealth] = {
+            endpoint.config_name: EndpointHealth(endpoint.config_name, **health_options)
+            for endpoint in endpoints
+        }
+
+    def ranked(self) -> List["LLM"]:
+        """Return endpoints in preference order, unhealthy ones last"""
+        return sorted(
+            self.endpoints,
+            key=lambda endpoint: (
+                not self.health[endpoint.config_name].healthy,
+                self.health[endpoint.config_name].score(),
+            ),
+        )
+
+    async def call(self, run: Callable[["LLM"], Awaitable[Any]]) -> Any:
+        """Run a call on the best endpoint, failing over on retryable errors."""
+        last_error: Optional[Exception] = None
+        for endpoint in self.ranked():
+            health = self.health[endpoint.config_name]
+            health.in_flight += 1
+            start = time.monotonic()
+            try:
+                result = await run(endpoint)
+            except Exception as e:
+                if classify_error(e) is None:
+                    raise
+                health.record_failure(time.monotonic() - start)
+                logger.warning(
+                    f"LLM endpoint '{endpoint.config_name}' failed, trying next: {e}"
+                )
+                last_error = e
+                continue
+            finally:
+                health.in_flight -= 1
+            health.record_success(time.monotonic() - start)
+            return result
+
+        raise last_error
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return health metrics per endpoint"""
+        return {name: health.stats() for name, health in self.health.items()}
+
+
+class HedgePolicy:
+    """Issues a backup request when the first one is slower than usual.
+
+    Once ``min_samples`` latencies have been observed, a call that has not
+    finished within the given percentile of recent latency gets a second,
+    identical request. Whichever finishes first wins and the other is
+    cancelled.
+
+    Attributes:
+        percentile: Latency percentile, between 0 and 100, that triggers a hedge.
+        min_samples: Observations needed before hedging starts.
+        hedges: Number of backup requests issued.
+        hedge_wins: Number of calls answered by the backup request.
+    """
+
+    def __init__(self, percentile: float, min_samples: int = 20, window: int = 200):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.latencies: deque = deque(maxlen=window)
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while samples are too few"""
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
+
+    async def run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run call, hedging it with a second invocation if it is slow."""
+        self.calls += 1
+        start = time.monotonic()
+        delay = self.delay()
+        primary = asyncio.ensure_future(call())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedges += 1
+                logger.info(f"LLM call exceeded p{self.percentile:g} latency, hedging")
+                tasks.add(asyncio.ensure_future(call()))
+
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    if task is not primary:
+                        self.hedge_wins += 1
+                    self.latencies.append(time.monotonic() - start)
+                    return task.result()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hedging counters"""
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_win_rate": self.hedge_wins / self.hedges if self.hedges else 0.0,
+            "hedge_delay": self.delay(),
+        }
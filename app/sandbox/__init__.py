@@ -8,6 +8,7 @@ from app.sandbox.client import (
     BaseSandboxClient,
     LocalSandboxClient,
     create_sandbox_client,
+    use_sandbox_client,
 )
 from app.sandbox.core.exceptions import (
     SandboxError,
@@ -24,6 +25,7 @@ __all__ = [
     "BaseSandboxClient",
     "LocalSandboxClient",
     "create_sandbox_client",
+    "use_sandbox_client",
     "SandboxError",
     "SandboxTimeoutError",
     "SandboxResourceError",
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Protocol
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Protocol
 
 from app.config import SandboxSettings
 from app.sandbox.core.sandbox import DockerSandbox
@@ -198,4 +200,41 @@ def create_sandbox_client() -> LocalSandboxClient:
     return LocalSandboxClient()
 
 
-SANDBOX_CLIENT = create_sandbox_client()
+_current_client: ContextVar[Optional[BaseSandboxClient]] = ContextVar(
+    "sandbox_client", default=None
+)
+
+
+class _SandboxClientProxy:
+    """Forwards to the sandbox client bound to the current context.
+
+    Falls back to a process-wide client, so single-session entry points keep
+    sharing one sandbox while a server can give each session its own.
+    """
+
+    def __init__(self, default: BaseSandboxClient):
+        self._default = default
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__") or name == "_default":
+            raise AttributeError(name)
+        return getattr(_current_client.get() or self._default, name)
+
+    def __copy__(self) -> "_SandboxClientProxy":
+        return self
+
+    def __deepcopy__(self, memo: dict) -> "_SandboxClientProxy":
+        return self
+
+
+@contextmanager
+def use_sandbox_client(client: BaseSandboxClient) -> Iterator[BaseSandboxClient]:
+    """Bind a sandbox client to the current task and the tasks it spawns."""
+    token = _current_client.set(client)
+    try:
+        yield client
+    finally:
+        _current_client.reset(token)
+
+
+SANDBOX_CLIENT = _SandboxClientProxy(create_sandbox_client())
@@ -1,7 +1,11 @@
+from collections import deque
 from enum import Enum
-from typing import Any, List, Literal, Optional, Union
+from itertools import islice
+from typing import Any, Callable, Deque, List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
+
+from app.blob import get_blob_store
 
 
 class Role(str, Enum):
@@ -60,6 +64,17 @@ class Message(BaseModel):
     name: Optional[str] = Field(default=None)
     tool_call_id: Optional[str] = Field(default=None)
     base64_image: Optional[str] = Field(default=None)
+    image_ref: Optional[str] = Field(
+        default=None, description="Blob store reference of the attached image"
+    )
+
+    @model_validator(mode="after")
+    def store_image(self) -> "Message":
+        """Move an attached image to the blob store, keeping only its reference"""
+        if self.base64_image:
+            self.image_ref = get_blob_store().put(self.base64_image)
+            self.base64_image = None
+        return self
 
     def __add__(self, other) -> List["Message"]:
         """支持 Message + list 或 Message + Message 的操作"""
@@ -94,6 +109,8 @@ class Message(BaseModel):
             message["tool_call_id"] = self.tool_call_id
         if self.base64_image is not None:
             message["base64_image"] = self.base64_image
+        if self.image_ref is not None:
+            message["image_ref"] = self.image_ref
         return message
 
     @classmethod
@@ -159,24 +176,65 @@ class Message(BaseModel):
 class Memory(BaseModel):
     messages: List[Message] = Field(default_factory=list)
     max_messages: int = Field(default=100)
+    token_counter: Optional[Callable[[Message], int]] = Field(
+        default=None,
+        exclude=True,
+        description="Per-message token counter used to maintain token_count",
+    )
+    token_count: int = Field(
+        default=0, description="Running token total of the stored messages"
+    )
+    on_add: Optional[Callable[[Message], None]] = Field(
+        default=None,
+        exclude=True,
+        description="Called with every message added, e.g. to journal it",
+    )
+
+    def _notify(self, messages: List[Message]) -> None:
+        if self.on_add is not None:
+            for message in messages:
+                self.on_add(message)
+
+    def _count(self, messages: List[Message]) -> int:
+        if self.token_counter is None:
+            return 0
+        return sum(self.token_counter(message) for message in messages)
+
+    def _trim(self) -> None:
+        # Optional: Implement message limit
+        if len(self.messages) > self.max_messages:
+            dropped = self.messages[: -self.max_messages]
+            self.messages = self.messages[-self.max_messages :]
+            self.token_count -= self._count(dropped)
 
     def add_message(self, message: Message) -> None:
         """Add a message to memory"""
         self.messages.append(message)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        self.token_count += self._count([message])
+        self._notify([message])
+        self._trim()
 
     def add_messages(self, messages: List[Message]) -> None:
         """Add multiple messages to memory"""
         self.messages.extend(messages)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        self.token_count += self._count(messages)
+        self._notify(messages)
+        self._trim()
+
+    def set_messages(self, messages: List[Message]) -> None:
+        """Replace the stored messages and recompute the token total"""
+        self.messages = messages
+        self.token_count = self._count(messages)
+
+    def set_token_counter(self, token_counter: Callable[[Message], int]) -> None:
+        """Attach a per-message token counter and recompute the token total"""
+        self.token_counter = token_counter
+        self.token_count = self._count(self.messages)
 
     def clear(self) -> None:
         """Clear all messages"""
         self.messages.clear()
+        self.token_count = 0
 
     def get_recent_messages(self, n: int) -> List[Message]:
         """Get n most recent messages"""
@@ -185,3 +243,101 @@ class Memory(BaseModel):
     def to_dict_list(self) -> List[dict]:
         """Convert messages to list of dicts"""
         return [msg.to_dict() for msg in self.messages]
+
+
+class TokenBudgetMemory(Memory):
+    """Memory that keeps the most recent messages fitting a token budget.
+
+    Messages live in a deque alongside their token counts, so trimming pops
+    from the front instead of copying the history. System messages are never
+    evicted, and an assistant message is evicted together with the tool
+    results that follow it, so the history never starts with orphaned tool
+    results. The newest message group is always kept, even if it alone
+    exceeds the budget. ``max_messages`` is not used.
+    """
+
+    messages: Deque[Message] = Field(default_factory=deque)
+    max_tokens: int = Field(
+        default=100_000, description="Token budget for the stored messages"
+    )
+
+    _counts: Deque[int] = PrivateAttr(default_factory=deque)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._counts = deque(self._count([message]) for message in self.messages)
+        self.token_count = sum(self._counts)
+
+    @property
+    def available_tokens(self) -> int:
+        """Tokens left in the budget"""
+        return max(self.max_tokens - self.token_count, 0)
+
+    def _append(self, message: Message) -> None:
+        count = self._count([message])
+        self.messages.append(message)
+        self._counts.append(count)
+        self.token_count += count
+
+    def _popleft(self) -> Message:
+        self.token_count -= self._counts.popleft()
+        return self.messages.popleft()
+
+    def _trim(self) -> None:
+        pinned: List[tuple] = []
+        pinned_tokens = 0
+        while self.token_count + pinned_tokens > self.max_tokens:
+            # Find the end of the oldest group: a message plus its tool results
+            group = 1
+            while group < len(self.messages) and self.messages[group].role == Role.TOOL:
+                group += 1
+            if group == len(self.messages):
+                break
+
+            for _ in range(group):
+                count = self._counts[0]
+                message = self._popleft()
+                if message.role == Role.SYSTEM:
+                    pinned.append((message, count))
+                    pinned_tokens += count
+
+        # System messages stay ahead of the remaining history, in order
+        for message, count in reversed(pinned):
+            self.messages.appendleft(message)
+            self._counts.appendleft(count)
+            self.token_count += count
+
+    def add_message(self, message: Message) -> None:
+        """Add a message to memory"""
+        self._append(message)
+        self._notify([message])
+        self._trim()
+
+    def add_messages(self, messages: List[Message]) -> None:
+        """Add multiple messages to memory"""
+        for message in messages:
+            self._append(message)
+        self._notify(messages)
+        self._trim()
+
+    def set_messages(self, messages: List[Message]) -> None:
+        """Replace the stored messages and recompute the token totals"""
+        self.clear()
+        for message in messages:
+            self._append(message)
+        self._trim()
+
+    def set_token_counter(self, token_counter: Callable[[Message], int]) -> None:
+        """Attach a per-message token counter and recompute the token totals"""
+        self.token_counter = token_counter
+        self.model_post_init(None)
+        self._trim()
+
+    def clear(self) -> None:
+        """Clear all messages"""
+        self.messages.clear()
+        self._counts.clear()
+        self.token_count = 0
+
+    def get_recent_messages(self, n: int) -> List[Message]:
+        """Get n most recent messages"""
+        return list(islice(reversed(self.messages), n))[::-1]
@@ -0,0 +1,16 @@
+from app.service.session import (
+    Session,
+    SessionKind,
+    SessionManager,
+    SessionStatus,
+    run_session,
+)
+
+
+__all__ = [
+    "Session",
+    "SessionKind",
+    "SessionManager",
+    "SessionStatus",
+    "run_session",
+]
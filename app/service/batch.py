@@ -0,0 +1,219 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.llm import TokenUsage, track_token_usage
+from app.logger import logger
+from app.service.session import Session, SessionKind, run_session
+from app.trace import record_trace, replay_trace
+
+
+class BatchItem(BaseModel):
+    """One prompt read from a request file"""
+
+    id: str = Field(..., description="Identifier used for checkpointing")
+    prompt: str = Field(..., description="Task for the agent")
+    kind: SessionKind = Field(SessionKind.MANUS, description="Agent or flow to run")
+
+
+class BatchRecord(BaseModel):
+    """Outcome of one batch item, written as a line of the output file"""
+
+    id: str
+    status: str = Field(..., description="'completed' or 'failed'")
+    result: Optional[str] = None
+    error: Optional[str] = None
+    latency: float = Field(0.0, description="Seconds spent running the item")
+    usage: TokenUsage = Field(default_factory=TokenUsage)
+    worker: int = Field(0, description="Process id of the worker that ran the item")
+
+
+def load_items(path: Path, kind: SessionKind = SessionKind.MANUS) -> List[BatchItem]:
+    """Read prompts from a JSONL file.
+
+    Each line needs a ``prompt``, or a ``title`` and ``body`` as in the
+    repository's requests.jsonl. The id is taken from ``id`` or
+    ``request_id`` and defaults to the line number. A per-line ``kind``
+    overrides the given default.
+    """
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            prompt = data.get("prompt") or "\n\n".join(
+                part for part in (data.get("title"), data.get("body")) if part
+            )
+            if not prompt:
+                raise ValueError(f"{path}:{line_number} has no prompt")
+            items.append(
+                BatchItem(
+                    id=str(data.get("id") or data.get("request_id") or line_number),
+                    prompt=prompt,
+                    kind=data.get("kind", kind),
+                )
+            )
+    return items
+
+
+def load_completed(path: Path) -> Dict[str, BatchRecord]:
+    """Return the completed records already in an output file, by item id.
+
+    A truncated last line, left by an interrupted run, is ignored.
+    """
+    completed: Dict[str, BatchRecord] = {}
+    if not path.exists():
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = BatchRecord.model_validate_json(line)
+            except ValueError:
+                continue
+            if record.status == "completed":
+                completed[record.id] = record
+    return completed
+
+
+# Event loop of the current worker process, reused by all items it runs
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _init_worker() -> None:
+    global _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+
+
+def _trace_context(item: BatchItem, trace_dir: Optional[Path], replay: bool):
+    if trace_dir is None:
+        return nullcontext()
+    path = trace_dir / f"{item.id}.jsonl"
+    return replay_trace(path) if replay else record_trace(path)
+
+
+async def _execute(
+    item: BatchItem,
+    runner: Callable[[Session], Awaitable[str]],
+    timeout: float,
+    trace_dir: Optional[Path],
+    replay: bool,
+) -> BatchRecord:
+    session = Session(id=item.id, prompt=item.prompt, kind=item.kind)
+    record = BatchRecord(id=item.id, status="failed", worker=os.getpid())
+    start = time.monotonic()
+    with track_token_usage(budget=True) as usage, _trace_context(
+        item, trace_dir, replay
+    ):
+        try:
+            record.result = await asyncio.wait_for(runner(session), timeout)
+            record.status = "completed"
+        except asyncio.TimeoutError:
+            record.error = f"Timed out after {timeout:.0f}s"
+        except Exception as e:
+            logger.exception(f"Batch item {item.id} failed")
+            record.error = f"{type(e).__name__}: {e}"
+    record.latency = time.monotonic() - start
+    record.usage = usage
+    return record
+
+
+def _run_in_worker(item: BatchItem, *args: Any) -> BatchRecord:
+    """Run one item on the worker's event loop"""
+    return _worker_loop.run_until_complete(_execute(item, *args))
+
+
+def run_batch(
+    items: List[BatchItem],
+    output: Path,
+    workers: int = 4,
+    timeout: float = 3600.0,
+    runner: Callable[[Session], Awaitable[str]] = run_session,
+    trace_dir: Optional[Path] = None,
+    replay: bool = False,
+) -> List[BatchRecord]:
+    """Run items across a pool of worker processes, appending results to output.
+
+    Items already completed in output are skipped, so an interrupted or
+    partly failed batch can be resumed by running it again. Failed items
+    are retried and their new record is appended; readers should keep the
+    last record per id.
+
+    Each worker process has its own event loop, agents and LLM clients and
+    runs one item at a time. ``runner`` must be picklable, i.e. a
+    module-level function.
+
+    With ``trace_dir`` set, the LLM and tool calls of each item are recorded
+    to ``<trace_dir>/<id>.jsonl``, or served from there with ``replay`` set,
+    so a recorded batch can be rerun offline as a benchmark.
+
+    Returns:
+        The records produced by this run, in completion order.
+    """
+    done = load_completed(output)
+    pending = [item for item in items if item.id not in done]
+    logger.info(
+        f"Batch of {len(items)} items: {len(done)} already completed, "
+        f"{len(pending)} to run on {workers} workers"
+    )
+    if not pending:
+        return []
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    records: List[BatchRecord] = []
+    start = time.monotonic()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    ) as pool, open(output, "a", encoding="utf-8") as out:
+        futures = {
+            pool.submit(_run_in_worker, item, runner, timeout, trace_dir, replay): item
+            for item in pending
+        }
+        try:
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # The worker itself died, e.g. from a crash or being killed
+                    record = BatchRecord(
+                        id=item.id, status="failed", error=f"{type(e).__name__}: {e}"
+                    )
+                out.write(record.model_dump_json() + "\n")
+                out.flush()
+                records.append(record)
+                logger.info(
+                    f"Batch item {record.id} {record.status} in {record.latency:.2f}s "
+                    f"({len(records)}/{len(pending)})"
+                )
+        except KeyboardInterrupt:
+            logger.warning("Batch interrupted, finished items are checkpointed")
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    _log_summary(records, time.monotonic() - start)
+    return records
+
+
+def _log_summary(records: List[BatchRecord], wall_time: float) -> None:
+    failed = sum(record.status != "completed" for record in records)
+    latencies = sorted(record.latency for record in records)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    tokens = sum(record.usage.total_tokens for record in records)
+    logger.info(
+        f"Batch finished in {wall_time:.2f}s: {len(records) - failed} completed, "
+        f"{failed} failed, latency p50 {statistics.median(latencies):.2f}s "
+        f"p95 {p95:.2f}s, {tokens} tokens"
+    )
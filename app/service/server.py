@@ -0,0 +1,77 @@
+import json
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.exceptions import SessionQueueFull
+from app.service.session import SessionKind, SessionManager
+
+
+# Seconds clients are asked to wait before resubmitting when the queue is full
+RETRY_AFTER_SECONDS = 5
+
+
+class SessionRequest(BaseModel):
+    prompt: str = Field(..., description="Task for the agent")
+    kind: SessionKind = Field(SessionKind.MANUS, description="Agent or flow to run")
+    tenant: str = Field("default", description="Tenant the session is billed to")
+
+
+def create_app(manager: Optional[SessionManager] = None) -> FastAPI:
+    """Create the HTTP API for submitting and following agent sessions."""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.manager = manager or SessionManager()
+        yield
+        await app.state.manager.shutdown()
+
+    app = FastAPI(title="OpenManus", lifespan=lifespan)
+
+    def get_session(app: FastAPI, session_id: str):
+        session = app.state.manager.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return session
+
+    @app.post("/sessions", status_code=202)
+    async def submit(request: SessionRequest):
+        try:
+            session = app.state.manager.submit(
+                request.prompt, kind=request.kind, tenant=request.tenant
+            )
+        except SessionQueueFull as e:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": str(e)},
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        return session.model_dump()
+
+    @app.get("/sessions/{session_id}")
+    async def status(session_id: str):
+        return get_session(app, session_id).model_dump()
+
+    @app.delete("/sessions/{session_id}")
+    async def cancel(session_id: str):
+        get_session(app, session_id)
+        return {"cancelled": app.state.manager.cancel(session_id)}
+
+    @app.get("/sessions/{session_id}/events")
+    async def events(session_id: str):
+        session = get_session(app, session_id)
+
+        async def stream():
+            async for payload in session.events():
+                yield f"event: {payload['event']}\ndata: {json.dumps(payload)}\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.manager.stats()
+
+    return app
@@ -0,0 +1,265 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from app.config import ServerSettings, config
+from app.exceptions import SessionQueueFull
+from app.llm import TokenUsage, track_token_usage
+from app.logger import logger
+from app.sandbox.client import create_sandbox_client, use_sandbox_client
+from app.streaming import CallbackSink, stream_to
+
+
+class SessionKind(str, Enum):
+    MANUS = "manus"
+    DI = "di"
+    PLANNING = "planning"
+
+
+class SessionStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = (
+    SessionStatus.COMPLETED,
+    SessionStatus.FAILED,
+    SessionStatus.CANCELLED,
+)
+
+# Events kept per session for clients that subscribe late; tokens are not kept
+MAX_EVENT_HISTORY = 500
+# Events buffered per subscriber before further ones are dropped
+MAX_SUBSCRIBER_BUFFER = 1000
+
+
+class Session(BaseModel):
+    """One agent run hosted by the server"""
+
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    tenant: str = "default"
+    kind: SessionKind = SessionKind.MANUS
+    prompt: str
+    status: SessionStatus = SessionStatus.QUEUED
+    result: Optional[str] = None
+    error: Optional[str] = None
+    usage: TokenUsage = Field(default_factory=TokenUsage)
+    created_at: float = Field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    _events: deque = PrivateAttr(
+        default_factory=lambda: deque(maxlen=MAX_EVENT_HISTORY)
+    )
+    _subscribers: List[asyncio.Queue] = PrivateAttr(default_factory=list)
+    _task: Optional[asyncio.Task] = PrivateAttr(None)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def emit(self, event: str, **data: Any) -> None:
+        """Publish a progress event to current and future subscribers"""
+        payload = {"event": event, "session_id": self.id, "time": time.time(), **data}
+        if event != "token":
+            self._events.append(payload)
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # A slow subscriber must not stall the agent
+                logger.debug(f"Dropping {event} event for a slow subscriber")
+
+    async def events(self) -> AsyncIterator[dict]:
+        """Yield past events, then live ones until the session finishes."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_SUBSCRIBER_BUFFER)
+        history = list(self._events)
+        self._subscribers.append(queue)
+        try:
+            for payload in history:
+                yield payload
+            if self.finished:
+                return
+            while True:
+                payload = await queue.get()
+                yield payload
+                if payload["event"] in FINISHED_STATUSES:
+                    return
+        finally:
+            self._subscribers.remove(queue)
+
+
+async def run_session(session: Session) -> str:
+    """Create the agent or flow for a session and run its prompt."""
+    from app.agent.di import DI
+    from app.agent.manus import Manus
+    from app.flow.flow_factory import FlowFactory, FlowType
+
+    def on_step(agent, result: str) -> None:
+        session.emit("step", agent=agent.name, step=agent.current_step, result=result)
+
+    if session.kind == SessionKind.DI:
+        agent = DI.create(on_step=on_step)
+    else:
+        agent = await Manus.create(on_step=on_step)
+
+    try:
+        if session.kind == SessionKind.PLANNING:
+            flow = FlowFactory.create_flow(
+                flow_type=FlowType.PLANNING, agents={"manus": agent}
+            )
+            return await flow.execute(session.prompt)
+        return await agent.run(session.prompt)
+    finally:
+        await agent.cleanup()
+
+
+class SessionManager:
+    """Runs many agent sessions concurrently in one process.
+
+    Sessions wait in a bounded queue and are admitted while fewer than
+    ``max_concurrent_sessions`` run in total and fewer than
+    ``max_sessions_per_tenant`` run for their tenant. Submissions beyond
+    ``max_queued_sessions`` are rejected so callers can back off.
+
+    Each session runs with its own sandbox client, token usage scope and
+    stream sink, so sessions don't share mutable per-run state.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[ServerSettings] = None,
+        runner: Callable[[Session], Awaitable[str]] = run_session,
+    ):
+        self.settings = settings or config.server or ServerSettings()
+        self.runner = runner
+        self.sessions: Dict[str, Session] = {}
+
+        self._slots = asyncio.Semaphore(self.settings.max_concurrent_sessions)
+        self._tenant_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _count(self, status: SessionStatus, tenant: Optional[str] = None) -> int:
+        return sum(
+            1
+            for session in self.sessions.values()
+            if session.status == status and (tenant is None or session.tenant == tenant)
+        )
+
+    def submit(
+        self,
+        prompt: str,
+        kind: SessionKind = SessionKind.MANUS,
+        tenant: str = "default",
+    ) -> Session:
+        """Queue a new session.
+
+        Raises:
+            SessionQueueFull: If too many sessions are already waiting.
+        """
+        if self._count(SessionStatus.QUEUED) >= self.settings.max_queued_sessions:
+            raise SessionQueueFull(
+                f"{self.settings.max_queued_sessions} sessions are already queued"
+            )
+
+        session = Session(prompt=prompt, kind=kind, tenant=tenant)
+        self.sessions[session.id] = session
+        session.emit(SessionStatus.QUEUED.value)
+        session._task = asyncio.create_task(self._run(session))
+        session._task.add_done_callback(lambda _: self._cancelled_early(session))
+        return session
+
+    def _cancelled_early(self, session: Session) -> None:
+        """Finish a session whose task was cancelled before it started running"""
+        if session._task.cancelled() and not session.finished:
+            session.status = SessionStatus.CANCELLED
+            session.finished_at = time.time()
+            session.emit(SessionStatus.CANCELLED.value)
+
+    async def _run(self, session: Session) -> None:
+        tenant_slots = self._tenant_slots.setdefault(
+            session.tenant, asyncio.Semaphore(self.settings.max_sessions_per_tenant)
+        )
+        sandbox = create_sandbox_client()
+        try:
+            async with tenant_slots, self._slots:
+                session.status = SessionStatus.RUNNING
+                session.started_at = time.time()
+                session.emit(SessionStatus.RUNNING.value)
+                logger.info(f"Session {session.id} started for '{session.tenant}'")
+
+                sink = CallbackSink(lambda text: session.emit("token", text=text))
+                with track_token_usage(budget=True) as usage, use_sandbox_client(
+                    sandbox
+                ), stream_to(sink):
+                    session.usage = usage
+                    session.result = await asyncio.wait_for(
+                        self.runner(session), self.settings.session_timeout
+                    )
+            session.status = SessionStatus.COMPLETED
+        except asyncio.CancelledError:
+            session.status = SessionStatus.CANCELLED
+        except asyncio.TimeoutError:
+            session.status = SessionStatus.FAILED
+            session.error = f"Timed out after {self.settings.session_timeout:.0f}s"
+        except Exception as e:
+            logger.exception(f"Session {session.id} failed")
+            session.status = SessionStatus.FAILED
+            session.error = f"{type(e).__name__}: {e}"
+        finally:
+            await sandbox.cleanup()
+            session.finished_at = time.time()
+            session.emit(
+                session.status.value,
+                result=session.result,
+                error=session.error,
+                usage=session.usage.model_dump(),
+            )
+            self._prune()
+
+    def _prune(self) -> None:
+        """Forget the oldest finished sessions beyond the retention limit"""
+        finished = [s for s in self.sessions.values() if s.finished]
+        excess = len(finished) - self.settings.max_finished_sessions
+        for session in sorted(finished, key=lambda s: s.finished_at)[: max(excess, 0)]:
+            del self.sessions[session.id]
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self.sessions.get(session_id)
+
+    def cancel(self, session_id: str) -> bool:
+        """Cancel a queued or running session; returns False if it already finished"""
+        session = self.sessions.get(session_id)
+        if session is None or session.finished or session._task is None:
+            return False
+        session._task.cancel()
+        return True
+
+    async def shutdown(self) -> None:
+        """Cancel all unfinished sessions and wait for them to wind down."""
+        tasks = [s._task for s in self.sessions.values() if s._task and not s.finished]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and running sessions, in total and per tenant"""
+        tenants = {s.tenant for s in self.sessions.values()}
+        return {
+            "queued": self._count(SessionStatus.QUEUED),
+            "running": self._count(SessionStatus.RUNNING),
+            "tenants": {
+                tenant: {
+                    "queued": self._count(SessionStatus.QUEUED, tenant),
+                    "running": self._count(SessionStatus.RUNNING, tenant),
+                }
+                for tenant in tenants
+            },
+        }
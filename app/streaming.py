@@ -0,0 +1,98 @@
+import asyncio
+import inspect
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional, Union
+
+
+class StreamSink(ABC):
+    """Destination for text streamed from an LLM response.
+
+    ``send`` is awaited for every chunk, so a slow consumer applies
+    backpressure to the stream instead of letting chunks pile up.
+    """
+
+    @abstractmethod
+    async def send(self, text: str) -> None:
+        """Deliver one chunk of streamed text"""
+
+    async def end(self) -> None:
+        """Called once a streamed response is complete"""
+
+
+class StdoutSink(StreamSink):
+    """Prints streamed text to stdout"""
+
+    async def send(self, text: str) -> None:
+        print(text, end="", flush=True)
+
+    async def end(self) -> None:
+        print()
+
+
+class NullSink(StreamSink):
+    """Discards streamed text"""
+
+    async def send(self, text: str) -> None:
+        pass
+
+
+class CallbackSink(StreamSink):
+    """Forwards streamed text to a sync or async callback"""
+
+    def __init__(self, callback: Callable[[str], Union[None, Awaitable[None]]]):
+        self.callback = callback
+
+    async def send(self, text: str) -> None:
+        result = self.callback(text)
+        if inspect.isawaitable(result):
+            await result
+
+
+class QueueSink(StreamSink):
+    """Buffers streamed text in a bounded queue that can be consumed with ``async for``.
+
+    When the queue is full, ``send`` waits for the consumer to catch up. Call
+    ``close`` to end iteration.
+    """
+
+    _CLOSED = object()
+
+    def __init__(self, maxsize: int = 100):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def send(self, text: str) -> None:
+        await self.queue.put(text)
+
+    async def close(self) -> None:
+        await self.queue.put(self._CLOSED)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        while (item := await self.queue.get()) is not self._CLOSED:
+            yield item
+
+
+_default_sink: StreamSink = StdoutSink()
+_current_sink: ContextVar[Optional[StreamSink]] = ContextVar(
+    "stream_sink", default=None
+)
+
+
+def get_stream_sink(sink: Optional[StreamSink] = None) -> StreamSink:
+    """Return sink if given, else the sink set by ``stream_to``, else stdout."""
+    return sink or _current_sink.get() or _default_sink
+
+
+@contextmanager
+def stream_to(sink: StreamSink) -> Iterator[StreamSink]:
+    """Send text streamed by LLM calls made within this context to sink.
+
+    The sink only applies to the current task and the tasks it spawns, so
+    concurrent sessions can stream to separate destinations.
+    """
+    token = _current_sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _current_sink.reset(token)
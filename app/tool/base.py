@@ -8,6 +8,8 @@ class BaseTool(ABC, BaseModel):
     name: str
     description: str
     parameters: Optional[dict] = None
+    # Whether calls may run concurrently with other calls in the same step
+    parallel_safe: bool = False
 
     class Config:
         arbitrary_types_allowed = True
@@ -20,6 +22,14 @@ class BaseTool(ABC, BaseModel):
     async def execute(self, **kwargs) -> Any:
         """Execute the tool with given parameters."""
 
+    def conflict_key(self, **kwargs) -> Optional[str]:
+        """Return a key shared by calls that must not run concurrently.
+
+        Only consulted for parallel-safe tools; None means the call conflicts
+        with no other call.
+        """
+        return None
+
     def to_param(self) -> Dict:
         """Convert tool to function call format."""
         return {
@@ -0,0 +1,55 @@
+import asyncio
+
+from app.exceptions import ToolError
+from app.observation import get_observation_store
+from app.tool.base import BaseTool, ToolResult
+
+
+_READ_OBSERVATION_DESCRIPTION = """Read part of a tool output that was too large to show in full.
+Large outputs are shown as their beginning and end plus an observation id; use this tool with that id to page through the omitted middle."""
+
+
+class ReadObservation(BaseTool):
+    name: str = "read_observation"
+    description: str = _READ_OBSERVATION_DESCRIPTION
+    parameters: dict = {
+        "type": "object",
+        "properties": {
+            "observation_id": {
+                "type": "string",
+                "description": "The id of the saved output, e.g. `obs_1a2b3c4d5e6f`.",
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Character offset to start reading from. Default 0.",
+                "default": 0,
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Maximum number of characters to read. Default 4000.",
+                "default": 4000,
+            },
+        },
+        "required": ["observation_id"],
+    }
+    parallel_safe: bool = True
+
+    async def execute(
+        self, observation_id: str, offset: int = 0, limit: int = 4000
+    ) -> ToolResult:
+        """Read a page of a spilled tool output"""
+        try:
+            # Skipping to a large offset reads the file up to it
+            page = await asyncio.to_thread(
+                get_observation_store().read,
+                observation_id,
+                max(0, offset),
+                max(1, limit),
+            )
+        except KeyError:
+            raise ToolError(f"No saved output with id '{observation_id}'")
+        if not page:
+            return ToolResult(output=f"Offset {offset} is past the end of the output")
+        end = offset + len(page)
+        more = "" if len(page) < limit else f"; continue from offset {end}"
+        return ToolResult(output=f"[characters {offset}-{end}{more}]\n{page}")
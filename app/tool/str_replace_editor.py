@@ -62,6 +62,7 @@ class StrReplaceEditor(BaseTool):
 
     name: str = "str_replace_editor"
     description: str = _STR_REPLACE_EDITOR_DESCRIPTION
+    parallel_safe: bool = True
     parameters: dict = {
         "type": "object",
         "properties": {
@@ -102,6 +103,10 @@ class StrReplaceEditor(BaseTool):
     _local_operator: LocalFileOperator = LocalFileOperator()
     _sandbox_operator: SandboxFileOperator = SandboxFileOperator()
 
+    def conflict_key(self, path: str = "", **kwargs) -> Optional[str]:
+        """Edits to the same file must run in call order."""
+        return str(path)
+
     # def _get_operator(self, use_sandbox: bool) -> FileOperator:
     def _get_operator(self) -> FileOperator:
         """Get the appropriate file operator based on execution mode."""
@@ -4,6 +4,7 @@ from typing import Any, Dict, List
 from app.exceptions import ToolError
 from app.logger import logger
 from app.tool.base import BaseTool, ToolFailure, ToolResult
+from app.trace import get_trace
 
 
 class ToolCollection:
@@ -28,11 +29,17 @@ class ToolCollection:
         tool = self.tool_map.get(name)
         if not tool:
             return ToolFailure(error=f"Tool {name} is invalid")
-        try:
-            result = await tool(**tool_input)
-            return result
-        except ToolError as e:
-            return ToolFailure(error=e.message)
+
+        async def run() -> ToolResult:
+            try:
+                return await tool(**tool_input)
+            except ToolError as e:
+                return ToolFailure(error=e.message)
+
+        trace = get_trace()
+        if trace is not None:
+            return await trace.tool(name, tool_input, run)
+        return await run()
 
     async def execute_all(self) -> List[ToolResult]:
         """Execute all tools in the collection sequentially."""
@@ -0,0 +1,248 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+)
+
+from openai.types.chat import ChatCompletionMessage
+from pydantic import BaseModel
+
+from app.cache import ResponseCache
+from app.exceptions import TraceMiss
+from app.logger import logger
+from app.streaming import StreamSink
+
+
+def _to_json(value: Any) -> Any:
+    """Serialize provider responses and tool results that json can't handle"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if hasattr(value, "__dict__"):
+        # e.g. the OpenAI-style objects built for Bedrock responses
+        return vars(value)
+    return str(value)
+
+
+def tool_key(name: str, tool_input: Optional[Dict[str, Any]]) -> str:
+    """Build the trace key of a tool call"""
+    return ResponseCache.make_key(kind="tool", name=name, tool_input=tool_input)
+
+
+class Trace(ABC):
+    """Hooks through which LLM and tool calls pass while a trace is active.
+
+    LLM calls are identified by the same request hash as the response cache,
+    tool calls by a hash of the tool name and input.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    @abstractmethod
+    async def llm(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Any]],
+        sink: Optional[StreamSink] = None,
+    ) -> Any:
+        """Return the response of an LLM request"""
+
+    @abstractmethod
+    async def tool(
+        self, name: str, tool_input: Dict[str, Any], call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the result of a tool call"""
+
+    def close(self) -> None:
+        pass
+
+
+class TraceRecorder(Trace):
+    """Runs calls live and appends each request and response to a JSONL file"""
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self.entries = 0
+
+    def _write(self, entry: dict) -> None:
+        self._file.write(json.dumps(entry, ensure_ascii=False, default=_to_json))
+        self._file.write("\n")
+        self._file.flush()
+        self.entries += 1
+
+    async def llm(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Any]],
+        sink: Optional[StreamSink] = None,
+    ) -> Any:
+        start = time.monotonic()
+        response = await call()
+        entry = {"type": "llm", "key": key, "latency": time.monotonic() - start}
+        if isinstance(response, str):
+            entry["text"] = response
+        else:
+            entry["message"] = response
+        self._write(entry)
+        return response
+
+    async def tool(
+        self, name: str, tool_input: Dict[str, Any], call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        from app.tool.base import ToolFailure, ToolResult
+
+        start = time.monotonic()
+        result = await call()
+        entry = {
+            "type": "tool",
+            "key": tool_key(name, tool_input),
+            "name": name,
+            "latency": time.monotonic() - start,
+        }
+        if isinstance(result, ToolResult):
+            entry["result"] = {
+                "output": result.output,
+                "error": result.error,
+                "base64_image": result.base64_image,
+                "system": result.system,
+            }
+            entry["failure"] = isinstance(result, ToolFailure)
+        else:
+            entry["value"] = result
+        self._write(entry)
+        return result
+
+    def close(self) -> None:
+        self._file.close()
+        logger.info(f"Recorded {self.entries} calls to trace {self.path}")
+
+
+class TraceReplayer(Trace):
+    """Serves LLM responses and tool results from a recorded trace.
+
+    Calls are matched by key. An identical request made several times gets
+    the recorded responses in order. When a request has no match, e.g.
+    because a prompt contains a timestamp, the next unused entry of the
+    same type is served instead, unless ``strict`` is set, in which case
+    ``TraceMiss`` is raised.
+
+    Attributes:
+        hits: Calls served by key.
+        fallbacks: Calls served in recorded order after a key miss.
+        recorded_latency: Total latency of the calls served, as recorded.
+    """
+
+    def __init__(self, path: Path, strict: bool = False):
+        super().__init__(path)
+        self.strict = strict
+        self.hits = 0
+        self.fallbacks = 0
+        self.recorded_latency = 0.0
+
+        self._entries: Dict[str, List[dict]] = {"llm": [], "tool": []}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["type"]].append(entry)
+        self._used: set = set()
+
+    def _next(self, kind: str, key: str) -> dict:
+        entries = self._entries[kind]
+        for index, entry in enumerate(entries):
+            if entry["key"] == key and (kind, index) not in self._used:
+                self.hits += 1
+                break
+        else:
+            unused = [i for i in range(len(entries)) if (kind, i) not in self._used]
+            if self.strict or not unused:
+                raise TraceMiss(f"No recorded {kind} call matches {key} in {self.path}")
+            index = unused[0]
+            self.fallbacks += 1
+            logger.warning(
+                f"Trace has no {kind} call matching {key}, replaying in order"
+            )
+
+        self._used.add((kind, index))
+        entry = entries[index]
+        self.recorded_latency += entry.get("latency", 0.0)
+        return entry
+
+    async def llm(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Any]],
+        sink: Optional[StreamSink] = None,
+    ) -> Any:
+        entry = self._next("llm", key)
+        if "text" not in entry:
+            # ask_tool returns None when the response has no message
+            if entry["message"] is None:
+                return None
+            return ChatCompletionMessage.model_validate(entry["message"])
+        if sink is not None:
+            await sink.send(entry["text"])
+            await sink.end()
+        return entry["text"]
+
+    async def tool(
+        self, name: str, tool_input: Dict[str, Any], call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        from app.tool.base import ToolFailure, ToolResult
+
+        entry = self._next("tool", tool_key(name, tool_input))
+        if "result" not in entry:
+            return entry["value"]
+        result_class = ToolFailure if entry["failure"] else ToolResult
+        return result_class(**entry["result"])
+
+    def close(self) -> None:
+        logger.info(
+            f"Replayed trace {self.path}: {self.hits} matched, "
+            f"{self.fallbacks} in order, {self.recorded_latency:.2f}s recorded latency"
+        )
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+def get_trace() -> Optional[Trace]:
+    """Return the trace active in the current task, if any"""
+    return _current_trace.get()
+
+
+@contextmanager
+def _use_trace(trace: Trace) -> Iterator[Trace]:
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.close()
+
+
+def record_trace(path: Path) -> ContextManager[TraceRecorder]:
+    """Record the LLM and tool calls made within this context to path."""
+    return _use_trace(TraceRecorder(path))
+
+
+def replay_trace(path: Path, strict: bool = False) -> ContextManager[TraceReplayer]:
+    """Serve the LLM and tool calls made within this context from a trace.
+
+    No provider or tool is called, so a recorded agent run can be repeated
+    offline, e.g. to benchmark the agent loop itself.
+    """
+    return _use_trace(TraceReplayer(path, strict=strict))
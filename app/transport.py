@@ -0,0 +1,173 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from app.config import HTTPSettings, config
+from app.logger import logger
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that releases a per-host slot once the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """Connection-pooling httpx transport shared by every LLM client.
+
+    Wraps ``httpx.AsyncHTTPTransport`` with an optional cap on concurrent
+    requests per host and counts how many requests were served over a
+    reused connection instead of a fresh TCP/TLS handshake.
+
+    Attributes:
+        requests: Number of requests sent.
+        connections_opened: Number of new TCP connections established.
+        tls_handshakes: Number of TLS handshakes performed.
+    """
+
+    def __init__(self, settings: HTTPSettings):
+        http2 = settings.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requested but the h2 package is not installed")
+                http2 = False
+
+        self._http2 = http2
+        self._limits = httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+        )
+        self.max_connections_per_host = settings.max_connections_per_host
+        # Connection pools and semaphores belong to the loop that created
+        # them, so each running event loop gets its own
+        self._loops: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self._waiting: Dict[str, int] = {}
+
+    def _loop_state(
+        self,
+    ) -> Tuple[httpx.AsyncHTTPTransport, Dict[str, asyncio.Semaphore]]:
+        """Return the transport and per-host slots of the running loop"""
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            transport = httpx.AsyncHTTPTransport(http2=self._http2, limits=self._limits)
+            state = self._loops[loop] = (transport, {})
+        return state
+
+    def _trace(self, previous: Optional[Callable]) -> Callable:
+        """Build an httpcore trace hook that counts new connections"""
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                self.connections_opened += 1
+            elif event_name == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+            if previous is not None:
+                await previous(event_name, info)
+
+        return trace
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        request.extensions["trace"] = self._trace(request.extensions.get("trace"))
+        transport, host_slots = self._loop_state()
+
+        if not self.max_connections_per_host:
+            return await transport.handle_async_request(request)
+
+        host = request.url.host
+        slots = host_slots.setdefault(
+            host, asyncio.Semaphore(self.max_connections_per_host)
+        )
+        self._waiting[host] = self._waiting.get(host, 0) + 1
+        try:
+            await slots.acquire()
+        finally:
+            self._waiting[host] -= 1
+
+        try:
+            response = await transport.handle_async_request(request)
+        except BaseException:
+            slots.release()
+            raise
+
+        # Hold the host slot until the body has been consumed
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, slots.release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        """Close the connections of the running loop"""
+        state = self._loops.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return connection reuse statistics"""
+        reused = max(self.requests - self.connections_opened, 0)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "reused_requests": reused,
+            "reuse_ratio": reused / self.requests if self.requests else 0.0,
+            "waiting_per_host": {h: n for h, n in self._waiting.items() if n},
+        }
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+_transport: Optional[PooledTransport] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled HTTP client used by LLM clients."""
+    global _http_client, _transport
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                settings = config.http or HTTPSettings()
+                _transport = PooledTransport(settings)
+                _http_client = httpx.AsyncClient(
+                    transport=_transport,
+                    timeout=httpx.Timeout(
+                        settings.timeout, connect=settings.connect_timeout
+                    ),
+                    follow_redirects=True,
+                )
+    return _http_client
+
+
+def get_transport_stats() -> Dict[str, Any]:
+    """Return connection reuse statistics of the shared transport."""
+    if _transport is None:
+        return {}
+    return _transport.stats()
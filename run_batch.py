@@ -0,0 +1,75 @@
+import argparse
+import os
+from pathlib import Path
+
+from app.logger import logger
+from app.service.batch import load_items, run_batch
+from app.service.session import SessionKind
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Run the prompts of a JSONL request file in parallel"
+    )
+    parser.add_argument("input", type=Path, help="JSONL file with one prompt per line")
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        help="JSONL file for results, also used as checkpoint "
+        "(default: <input>.results.jsonl)",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=min(4, os.cpu_count() or 1),
+        help="Number of worker processes",
+    )
+    parser.add_argument(
+        "--kind",
+        choices=[kind.value for kind in SessionKind],
+        default=SessionKind.MANUS.value,
+        help="Agent or flow to run for lines that don't set one",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=3600, help="Seconds allowed per prompt"
+    )
+    traces = parser.add_mutually_exclusive_group()
+    traces.add_argument(
+        "--record-traces",
+        type=Path,
+        metavar="DIR",
+        help="Record the LLM and tool calls of each prompt to DIR/<id>.jsonl",
+    )
+    traces.add_argument(
+        "--replay-traces",
+        type=Path,
+        metavar="DIR",
+        help="Serve LLM and tool calls from traces in DIR instead of running them",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    output = args.output or args.input.with_suffix(".results.jsonl")
+    items = load_items(args.input, kind=SessionKind(args.kind))
+    try:
+        records = run_batch(
+            items,
+            output,
+            workers=args.workers,
+            timeout=args.timeout,
+            trace_dir=args.replay_traces or args.record_traces,
+            replay=args.replay_traces is not None,
+        )
+    except KeyboardInterrupt:
+        logger.warning("Operation interrupted, rerun to resume.")
+        return
+    logger.info(f"Wrote {len(records)} results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import argparse
+
+import uvicorn
+
+from app.config import ServerSettings, config
+from app.service.server import create_app
+
+
+def main():
+    settings = config.server or ServerSettings()
+    parser = argparse.ArgumentParser(description="Run the OpenManus agent server")
+    parser.add_argument("--host", default=settings.host, help="Address to listen on")
+    parser.add_argument(
+        "--port", type=int, default=settings.port, help="Port to listen on"
+    )
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
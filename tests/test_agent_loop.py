@@ -0,0 +1,67 @@
+import asyncio
+import time
+from typing import List, Tuple
+
+import pytest
+
+from app.agent.base import BaseAgent
+from app.schema import AgentState, Memory
+
+
+class CountingAgent(BaseAgent):
+    """Agent whose steps only record when they ran."""
+
+    log: List[Tuple[str, int]] = []
+
+    async def step(self) -> str:
+        self.log.append((self.name, self.current_step))
+        await asyncio.sleep(0.01)
+        if self.current_step >= 3:
+            self.state = AgentState.FINISHED
+        return "ok"
+
+
+def make_agents(count: int, log: List[Tuple[str, int]], **kwargs) -> List[BaseAgent]:
+    """Builds agents without constructing an LLM client."""
+    return [
+        CountingAgent.model_construct(
+            name=f"agent-{i}", llm=None, memory=Memory(), log=log, **kwargs
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_agents_interleave_on_one_loop():
+    """Tests that concurrent agents take turns instead of running back to back."""
+    log: List[Tuple[str, int]] = []
+    agents = make_agents(20, log, interval=0.05)
+
+    start = time.monotonic()
+    await asyncio.gather(*(agent.run() for agent in agents))
+    elapsed = time.monotonic() - start
+
+    assert len(log) == 20 * 3
+    # Every agent finishes its first step before any agent starts its second
+    assert {step for _, step in log[:20]} == {1}
+    # Pacing sleeps overlap, so the batch takes about as long as one agent
+    assert elapsed < 20 * 3 * 0.05 / 2
+
+
+@pytest.mark.asyncio
+async def test_pacing_does_not_block_event_loop():
+    """Tests that pacing between steps leaves the event loop free."""
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    (agent,) = make_agents(1, [], interval=0.1)
+    await agent.run()
+    ticker_task.cancel()
+
+    assert ticks >= 10
@@ -0,0 +1,48 @@
+import json
+import os
+
+from app.service.batch import load_completed, load_items, run_batch
+
+
+async def echo_runner(session) -> str:
+    """Fails for prompts asking to, otherwise echoes the prompt."""
+    if session.prompt == "fail":
+        raise RuntimeError("asked to fail")
+    return f"{os.getpid()}:{session.prompt}"
+
+
+def write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def test_load_items(tmp_path):
+    """Tests reading prompts from prompt and title/body lines."""
+    path = tmp_path / "requests.jsonl"
+    write_jsonl(
+        path,
+        [
+            {"request_id": "r-1", "title": "Title", "body": "Body"},
+            {"prompt": "Plain prompt", "kind": "di"},
+        ],
+    )
+
+    items = load_items(path)
+    assert [item.id for item in items] == ["r-1", "2"]
+    assert items[0].prompt == "Title\n\nBody"
+    assert items[1].kind == "di"
+
+
+def test_run_batch_checkpoints(tmp_path):
+    """Tests that reruns skip completed items and retry failed ones."""
+    path = tmp_path / "requests.jsonl"
+    output = tmp_path / "results.jsonl"
+    write_jsonl(path, [{"prompt": "a"}, {"prompt": "fail"}, {"prompt": "b"}])
+    items = load_items(path)
+
+    records = run_batch(items, output, workers=2, runner=echo_runner)
+    assert sorted(r.status for r in records) == ["completed", "completed", "failed"]
+    assert all(r.worker != os.getpid() for r in records)
+    assert set(load_completed(output)) == {"1", "3"}
+
+    rerun = run_batch(items, output, workers=2, runner=echo_runner)
+    assert [(r.id, r.error) for r in rerun] == [("2", "RuntimeError: asked to fail")]
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Tuple
+
+import pytest
+
+from app.llm import LLM
+from app.schema import Message
+
+
+class FakeProvider:
+    """Answers prompts after a delay given in the prompt, tracking concurrency."""
+
+    def __init__(self, llm: LLM):
+        self.llm = llm
+        self.in_flight = self.peak = 0
+        self.started = []
+
+    async def ask(self, messages, system_msgs=None, **kwargs) -> str:
+        text = messages[-1].content
+        self.started.append(text)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(float(text.split(":")[1]))
+            if text.startswith("fail"):
+                raise ValueError("bad prompt")
+            self.llm.update_token_count(10, 5, cached_tokens=2)
+            return text.upper()
+        finally:
+            self.in_flight -= 1
+
+
+def make_llm() -> Tuple[LLM, FakeProvider]:
+    """Builds an LLM whose ask and ask_tool are answered by a fake provider."""
+    llm = object.__new__(LLM)
+    llm.total_input_tokens = llm.total_completion_tokens = 0
+    llm.total_cached_tokens = 0
+    provider = FakeProvider(llm)
+    llm.ask = llm.ask_tool = provider.ask
+    return llm, provider
+
+
+def prompts(*texts: str):
+    return [[Message.user_message(text)] for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_results_keep_input_order():
+    """Tests that results line up with prompts, not with completion order."""
+    llm, _ = make_llm()
+
+    batch = await llm.ask_many(prompts("a:0.03", "b:0.01", "c:0"))
+    assert batch.results == ["A:0.03", "B:0.01", "C:0"]
+    assert [item.index for item in batch.items] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_failures_stay_with_their_item():
+    """Tests that one failing prompt neither cancels nor fails the others."""
+    llm, _ = make_llm()
+
+    batch = await llm.ask_tool_many(prompts("fail:0", "slow:0.02", "c:0"))
+    assert [item.ok for item in batch.items] == [False, True, True]
+    assert batch.items[0].error == "ValueError: bad prompt"
+    assert batch.results[1:] == ["SLOW:0.02", "C:0"]
+    assert batch.failed == [batch.items[0]]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    """Tests that no more than max_concurrency prompts are in flight."""
+    llm, provider = make_llm()
+
+    batch = await llm.ask_many(
+        prompts(*(f"p{i}:0.01" for i in range(6))), max_concurrency=2
+    )
+    assert len(batch.results) == 6 and provider.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_usage_is_summed():
+    """Tests that each item reports its own usage and the batch their sum."""
+    llm, _ = make_llm()
+
+    batch = await llm.ask_many(prompts("a:0.01", "b:0", "fail:0"))
+    assert [item.usage.total_tokens for item in batch.items] == [15, 15, 0]
+    usage = batch.usage
+    assert (usage.input_tokens, usage.completion_tokens) == (20, 10)
+    assert usage.cached_tokens == 4
+    assert llm.total_input_tokens == 20
@@ -0,0 +1,107 @@
+import pytest
+
+from app.bedrock import ChatCompletions
+
+
+class FakeBedrock:
+    """Returns canned converse_stream events."""
+
+    def __init__(self, events):
+        self.events = events
+
+    def converse_stream(self, **kwargs):
+        return {"stream": iter(self.events)}
+
+
+@pytest.fixture(scope="function")
+def completions() -> ChatCompletions:
+    """Creates completions without a Bedrock connection."""
+    return ChatCompletions(client=None, executor=None, timeout=5)
+
+
+def test_converts_every_tool_call_and_result(completions: ChatCompletions):
+    """Tests that parallel tool calls and their results keep their toolUseIds."""
+    messages = [
+        {"role": "system", "content": "be helpful"},
+        {"role": "user", "content": "compare"},
+        {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [
+                {
+                    "id": "call_a",
+                    "type": "function",
+                    "function": {"name": "search", "arguments": '{"q": "a"}'},
+                },
+                {
+                    "id": "call_b",
+                    "type": "function",
+                    "function": {"name": "search", "arguments": '{"q": "b"}'},
+                },
+            ],
+        },
+        {"role": "tool", "tool_call_id": "call_a", "content": "result a"},
+        {"role": "tool", "tool_call_id": "call_b", "content": "result b"},
+    ]
+
+    system, converted = completions._convert_openai_messages_to_bedrock_format(messages)
+
+    assert system == [{"text": "be helpful"}]
+    assert [m["role"] for m in converted] == ["user", "assistant", "user"]
+    tool_uses = [block["toolUse"] for block in converted[1]["content"]]
+    assert [(t["toolUseId"], t["input"]) for t in tool_uses] == [
+        ("call_a", {"q": "a"}),
+        ("call_b", {"q": "b"}),
+    ]
+    results = [block["toolResult"] for block in converted[2]["content"]]
+    assert [(r["toolUseId"], r["content"]) for r in results] == [
+        ("call_a", [{"text": "result a"}]),
+        ("call_b", [{"text": "result b"}]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_assembles_tool_uses_by_block_index(completions: ChatCompletions):
+    """Tests that streamed tool uses are assembled per content block."""
+
+    def tool_start(index, tool_id):
+        return {
+            "contentBlockStart": {
+                "contentBlockIndex": index,
+                "start": {"toolUse": {"toolUseId": tool_id, "name": "search"}},
+            }
+        }
+
+    def tool_delta(index, fragment):
+        return {
+            "contentBlockDelta": {
+                "contentBlockIndex": index,
+                "delta": {"toolUse": {"input": fragment}},
+            }
+        }
+
+    events = [
+        {"messageStart": {"role": "assistant"}},
+        {"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"text": "ok"}}},
+        {"contentBlockStop": {"contentBlockIndex": 0}},
+        tool_start(1, "call_a"),
+        tool_start(2, "call_b"),
+        tool_delta(1, '{"q": '),
+        tool_delta(2, '{"q": "b"}'),
+        tool_delta(1, '"a"}'),
+        {"contentBlockStop": {"contentBlockIndex": 2}},
+        {"contentBlockStop": {"contentBlockIndex": 1}},
+        {"messageStop": {"stopReason": "tool_use"}},
+    ]
+    completions.client = FakeBedrock(events)
+
+    response = await completions._invoke_bedrock_stream(
+        "model", [{"role": "user", "content": "hi"}], 100, 0.0
+    )
+
+    message = response.choices[0].message
+    assert message.content == "ok"
+    assert [(c.id, c.function.arguments) for c in message.tool_calls] == [
+        ("call_a", '{"q": "a"}'),
+        ("call_b", '{"q": "b"}'),
+    ]
@@ -0,0 +1,95 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app import blob
+from app.blob import BlobStore
+from app.image import image_dimensions
+from app.llm import LLM, TokenCounter
+from app.schema import Message
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch) -> BlobStore:
+    store = BlobStore(tmp_path / "blobs", cache_size=1)
+    monkeypatch.setattr(blob, "_blob_store", store)
+    return store
+
+
+def test_messages_reference_deduplicated_blobs(store):
+    """Tests that identical screenshots are stored once and held by reference."""
+    first = Message.user_message("state", base64_image="c2NyZWVu")
+    second = Message.user_message("state again", base64_image="c2NyZWVu")
+
+    assert first.base64_image is None
+    assert first.image_ref == second.image_ref
+    store.flush()
+    assert (store.writes, store.dedup_hits) == (1, 1)
+
+    store.put("b3RoZXI=")  # pushes the screenshot out of the memory cache
+    assert store.get(first.image_ref) == "c2NyZWVu"
+    with pytest.raises(KeyError):
+        store.get("0" * 64)
+
+
+def test_only_recent_images_are_sent(store):
+    """Tests that images are materialized only for the most recent messages."""
+    messages = [
+        Message.user_message(f"step {i}", base64_image=f"aW1n{i}") for i in range(3)
+    ]
+
+    formatted = LLM.format_messages(messages, supports_images=True, max_images=2)
+    assert formatted[0]["content"] == "step 0"
+    images = [
+        [item for item in m["content"] if item["type"] == "image_url"]
+        for m in formatted[1:]
+    ]
+    assert [len(items) for items in images] == [1, 1]
+    assert images[1][0]["image_url"]["url"] == "data:image/jpeg;base64,aW1n2"
+    assert all("image_ref" not in m for m in formatted)
+
+    formatted = LLM.format_messages(messages, supports_images=False)
+    assert [m["content"] for m in formatted] == ["step 0", "step 1", "step 2"]
+
+
+def test_missing_images_are_dropped(store):
+    """Tests that a pruned or foreign image reference does not break requests."""
+    messages = [
+        Message.user_message("kept", base64_image="aW1nMQ=="),
+        Message.user_message("lost").model_copy(update={"image_ref": "0" * 64}),
+    ]
+
+    formatted = LLM.format_messages(messages, supports_images=True)
+    assert len(formatted[0]["content"]) == 2
+    assert formatted[1]["content"] == "lost"
+
+
+def test_prune_keeps_recently_used_blobs(tmp_path):
+    """Tests that the least recently used blobs are deleted past max_bytes."""
+    store = BlobStore(tmp_path / "blobs", cache_size=0, max_bytes=10)
+    old = store.put("a" * 8)
+    store.flush()
+    os.utime(store._path(old), (0, 0))
+    new = store.put("b" * 8)
+    store.flush()
+
+    assert store.evictions == 1
+    with pytest.raises(KeyError):
+        store.get(old)
+    assert store.get(new) == "b" * 8
+
+
+def test_stored_images_count_towards_tokens(store):
+    """Tests that images held by reference are counted at their size."""
+    png = (
+        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGA"
+        "hKmMIQAAAABJRU5ErkJggg=="
+    )
+    counter = TokenCounter(tokenizer=SimpleNamespace(encode=str.split))
+    message = Message.user_message("", base64_image=png)
+
+    assert image_dimensions(png) == (1, 1)
+    assert counter.count_message(message) - counter.count_message(
+        Message.user_message("")
+    ) == counter._calculate_high_detail_tokens(1, 1)
@@ -0,0 +1,57 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from app.cache import ResponseCache
+
+
+@pytest.fixture(scope="function")
+def cache(tmp_path: Path) -> ResponseCache:
+    """Creates a small response cache in a temporary directory."""
+    return ResponseCache(tmp_path / "cache.sqlite", ttl=60, max_entries=3)
+
+
+def test_key_is_stable_across_dict_order():
+    """Tests that logically identical requests share a cache key."""
+    key_a = ResponseCache.make_key(
+        model="m", messages=[{"role": "user", "content": "hi"}]
+    )
+    key_b = ResponseCache.make_key(
+        messages=[{"content": "hi", "role": "user"}], model="m"
+    )
+    assert key_a == key_b
+    assert key_a != ResponseCache.make_key(model="m", messages=[])
+
+
+def test_hit_and_miss_counters(cache: ResponseCache):
+    """Tests cache lookups and hit/miss accounting."""
+    assert cache.get("a") is None
+    cache.set("a", "response")
+    assert cache.get("a") == "response"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_lru_eviction(cache: ResponseCache):
+    """Tests that the least recently used entry is evicted first."""
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+        time.sleep(0.01)
+    cache.get("a")
+    cache.set("d", "d")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+    assert cache.stats()["entries"] == 3
+
+
+def test_ttl_expiry(tmp_path: Path):
+    """Tests that expired entries are treated as misses."""
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=0)
+    cache.set("a", "response")
+    time.sleep(0.01)
+    assert cache.get("a") is None
@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.compaction import COMPACTED_PREFIX, ContextCompactor
+from app.schema import Memory, Message, ToolCall
+
+
+def make_memory() -> Memory:
+    """Builds a history of three tool calls with large results."""
+    memory = Memory()
+    memory.set_token_counter(lambda message: len(message.content or "") // 4)
+    memory.add_message(Message.user_message("task"))
+    for i in range(3):
+        call = ToolCall(id=f"call_{i}", function={"name": "bash", "arguments": "{}"})
+        memory.add_message(Message.from_tool_calls(tool_calls=[call]))
+        output = f"result {i}\n" + "x" * 4000
+        if i == 0:
+            output += "\nfull output saved as observation `obs_0123456789ab`"
+        memory.add_message(
+            Message.tool_message(output, name="bash", tool_call_id=f"call_{i}")
+        )
+    return memory
+
+
+@pytest.mark.asyncio
+async def test_truncating_compaction():
+    """Tests that old tool results are shortened in place above the watermark."""
+    memory = make_memory()
+    compactor = ContextCompactor(watermark=2000, keep_recent=1, summary_chars=200)
+
+    record = await compactor.compact(memory)
+    assert (record.messages, record.summarizer) == (2, "truncate")
+    assert record.tokens_after == memory.token_count < record.tokens_before
+
+    tool_results = [m for m in memory.messages if m.role == "tool"]
+    assert [m.tool_call_id for m in tool_results] == ["call_0", "call_1", "call_2"]
+    assert all(m.content.startswith(COMPACTED_PREFIX) for m in tool_results[:2])
+    assert "obs_0123456789ab" in tool_results[0].content
+    assert tool_results[2].content.startswith("result 2")
+
+    # Already compacted results are left alone
+    assert await compactor.compact(memory) is None
+    assert compactor.tokens_saved == record.tokens_saved
+
+
+@pytest.mark.asyncio
+async def test_summarizing_compaction():
+    """Tests that summaries come from the configured LLM, bounded in length."""
+
+    async def ask(messages, **kwargs):
+        return "ran bash; " * 100
+
+    llm = SimpleNamespace(config_name="summarizer", ask=ask)
+    compactor = ContextCompactor(watermark=0, keep_recent=0, summary_chars=50, llm=llm)
+    memory = make_memory()
+
+    record = await compactor.compact(memory)
+    assert (record.messages, record.summarizer) == (3, "summarizer")
+    assert memory.messages[4].content == COMPACTED_PREFIX + ("ran bash; " * 5).strip()
+
+
+@pytest.mark.asyncio
+async def test_summaries_are_bounded_in_concurrency():
+    """Tests that no more than max_concurrency summaries are requested at once."""
+    in_flight = peak = 0
+
+    async def ask(messages, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "ran bash"
+
+    llm = SimpleNamespace(config_name="summarizer", ask=ask)
+    compactor = ContextCompactor(
+        watermark=0, keep_recent=0, summary_chars=50, llm=llm, max_concurrency=2
+    )
+
+    record = await compactor.compact(make_memory())
+    assert record.messages == 3 and peak == 2
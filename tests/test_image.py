@@ -0,0 +1,101 @@
+import base64
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+from app import blob
+from app.blob import BlobStore
+from app.image import ImageProcessor, image_dimensions, target_size
+from app.llm import LLM, TokenCounter
+from app.schema import Message
+
+
+def make_png(width: int, height: int) -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def make_jpeg(width: int, height: int, quality: int) -> str:
+    """Builds a noisy JPEG, which like a screenshot barely compresses at quality 100."""
+    noise = Image.effect_noise((width, height), 40)
+    image = Image.merge(
+        "RGB",
+        (noise, noise.rotate(180), noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)),
+    )
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def test_target_size():
+    """Tests scaling to the size providers tile images at."""
+    assert target_size(4096, 1024) == (2048, 512)
+    assert target_size(1280, 1280) == (768, 768)
+    assert target_size(1280, 8000) == (328, 2048)
+    assert target_size(500, 300) == (500, 300)
+
+
+def test_process_resizes_and_caches():
+    """Tests that screenshots are down-scaled once and re-encoded as JPEG."""
+    processor = ImageProcessor(quality=60)
+    screenshot = make_png(1600, 1200)
+
+    processed = processor.process(screenshot)
+    assert processor.process(screenshot) == processed
+    assert (processor.misses, processor.hits) == (1, 1)
+
+    with Image.open(io.BytesIO(base64.b64decode(processed))) as image:
+        assert image.format == "JPEG"
+        assert image.size == (1024, 768)
+    assert processor.process("not an image") == "not an image"
+
+
+def test_high_quality_jpegs_are_reencoded():
+    """Tests that a JPEG already at the target size is still shrunk to quality."""
+    processor = ImageProcessor(quality=60)
+    screenshot = make_jpeg(1280, 720, quality=100)
+
+    processed = processor.process(screenshot)
+    assert len(processed) < len(screenshot) // 2
+    with Image.open(io.BytesIO(base64.b64decode(processed))) as image:
+        assert image.size == (1280, 720)
+
+    # Re-encoding a JPEG saved at a lower quality would only make it larger
+    smaller = make_jpeg(1280, 720, quality=40)
+    assert ImageProcessor(quality=95).process(smaller) == smaller
+
+
+def test_token_count_uses_true_dimensions():
+    """Tests that inline images are counted at their real size."""
+    counter = TokenCounter(tokenizer=None)
+    small = {"image_url": {"url": f"data:image/png;base64,{make_png(400, 300)}"}}
+
+    assert image_dimensions(small["image_url"]["url"]) == (400, 300)
+    assert counter.count_image(small) == counter._calculate_high_detail_tokens(400, 300)
+    assert counter.count_image({"image_url": {"url": "https://x/y.png"}}) == 1024
+
+
+@pytest.mark.asyncio
+async def test_images_are_processed_off_the_event_loop(tmp_path, monkeypatch):
+    """Tests that formatting with the image processor runs in a worker thread."""
+    monkeypatch.setattr(blob, "_blob_store", BlobStore(tmp_path / "blobs"))
+    threads = []
+
+    class RecordingProcessor(ImageProcessor):
+        def process(self, data: str) -> str:
+            threads.append(threading.get_ident())
+            return super().process(data)
+
+    llm = object.__new__(LLM)
+    llm.max_images = None
+    llm.image_processor = RecordingProcessor()
+
+    formatted = await llm._format(
+        [Message.user_message("look", base64_image=make_png(1600, 1200))],
+        supports_images=True,
+    )
+    assert formatted[0]["content"][1]["type"] == "image_url"
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import journal as journal_module
+from app.agent.base import BaseAgent
+from app.journal import SessionJournal
+from app.schema import AgentState, Memory, Message
+
+
+class JournaledAgent(BaseAgent):
+    """Agent that answers once per step and can crash at a given step."""
+
+    crash_at: int = 0
+
+    async def step(self) -> str:
+        self.memory.add_message(
+            Message.assistant_message(f"answer {self.current_step}")
+        )
+        if self.current_step == self.crash_at:
+            raise RuntimeError("crashed")
+        return "ok"
+
+
+def make_agent(journal: SessionJournal, **kwargs) -> JournaledAgent:
+    """Builds an agent without constructing an LLM client."""
+    agent = JournaledAgent.model_construct(
+        name="journaled",
+        llm=SimpleNamespace(total_input_tokens=0, total_completion_tokens=0),
+        memory=Memory(),
+        state=AgentState.IDLE,
+        max_steps=4,
+        interval=0,
+        **kwargs,
+    )
+    agent.attach_journal(journal)
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_resume_after_crash(tmp_path):
+    """Tests that a resumed agent continues after its last completed step."""
+    path = tmp_path / "session.jsonl"
+    crashed = make_agent(SessionJournal(path), crash_at=3)
+    with pytest.raises(RuntimeError):
+        await crashed.run("task")
+
+    resumed = make_agent(SessionJournal(path))
+    assert resumed.resume()
+    assert resumed.current_step == 2
+    assert [m.content for m in resumed.memory.messages] == [
+        "task",
+        "answer 1",
+        "answer 2",
+    ]
+
+    await resumed.run()
+    assert [m.content for m in resumed.memory.messages][-2:] == [
+        "answer 3",
+        "answer 4",
+    ]
+
+
+def test_truncated_record_is_skipped(tmp_path):
+    """Tests that a record cut off by a crash does not break the journal."""
+    path = tmp_path / "session.jsonl"
+    journal = SessionJournal(path)
+    journal.append("checkpoint", agent="a", step=1)
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"seq": 2, "type": "mess')
+
+    journal = SessionJournal(path)
+    journal.append("checkpoint", agent="a", step=2)
+    assert [r["step"] for r in journal.records()] == [1, 2]
+
+
+def test_fsync_is_rate_limited(tmp_path, monkeypatch):
+    """Tests that appends fsync at most once per interval."""
+    synced = []
+    monkeypatch.setattr(journal_module.os, "fsync", synced.append)
+
+    journal = SessionJournal(tmp_path / "session.jsonl", fsync_interval=60)
+    for step in range(100):
+        journal.append("checkpoint", agent="a", step=step)
+    assert synced == []
+    journal.close()
+    assert len(synced) == 1
+
+    journal = SessionJournal(tmp_path / "session.jsonl", fsync_interval=0)
+    journal.append("checkpoint", agent="a", step=100)
+    assert len(synced) == 2
+    assert len(journal.records()) == 101
@@ -0,0 +1,74 @@
+from app.schema import Function, Memory, Message, TokenBudgetMemory, ToolCall
+
+
+def count_words(message: Message) -> int:
+    return len((message.content or "").split())
+
+
+def make_memory(max_tokens: int) -> TokenBudgetMemory:
+    memory = TokenBudgetMemory(max_tokens=max_tokens)
+    memory.set_token_counter(count_words)
+    return memory
+
+
+def tool_call_message(call_id: str) -> Message:
+    return Message(
+        role="assistant",
+        content="calling tool",
+        tool_calls=[ToolCall(id=call_id, function=Function(name="t", arguments="{}"))],
+    )
+
+
+def test_evicts_oldest_within_budget():
+    """Tests eviction by tokens while keeping system messages first."""
+    memory = make_memory(max_tokens=5)
+    memory.add_message(Message.system_message("be brief"))
+    memory.add_message(Message.user_message("one two"))
+    memory.add_message(Message.assistant_message("three four"))
+    memory.add_message(Message.user_message("five six"))
+
+    assert [m.content for m in memory.messages] == ["be brief", "five six"]
+    assert memory.token_count == 4
+    assert memory.available_tokens == 1
+    assert [m.content for m in memory.get_recent_messages(1)] == ["five six"]
+
+
+def test_tool_results_evicted_with_their_call():
+    """Tests that a tool call and its results are evicted together."""
+    memory = make_memory(max_tokens=5)
+    memory.add_message(tool_call_message("call-1"))
+    memory.add_message(
+        Message.tool_message("result a", name="t", tool_call_id="call-1")
+    )
+    memory.add_message(
+        Message.tool_message("result b", name="t", tool_call_id="call-1")
+    )
+    memory.add_message(Message.user_message("next question here"))
+
+    assert [m.content for m in memory.messages] == ["next question here"]
+    assert memory.token_count == 3
+
+    memory.add_message(Message.assistant_message("a very long answer indeed"))
+    assert [m.role for m in memory.messages] == ["assistant"]
+
+
+def test_memory_keeps_a_running_token_total():
+    """Tests that token_count matches the stored messages after every change."""
+    memory = Memory(max_messages=3)
+    memory.add_message(Message.user_message("one two"))
+    memory.set_token_counter(count_words)
+    assert memory.token_count == 2
+
+    memory.add_message(Message.assistant_message("three"))
+    memory.add_messages(
+        [Message.user_message("four five six"), Message.user_message("seven")]
+    )
+    # The oldest message was trimmed by max_messages
+    assert [m.content for m in memory.messages] == ["three", "four five six", "seven"]
+    assert memory.token_count == 5 == sum(map(count_words, memory.messages))
+
+    memory.set_messages([Message.user_message("eight nine")])
+    assert memory.token_count == 2
+
+    memory.clear()
+    assert memory.token_count == 0
@@ -0,0 +1,145 @@
+import os
+import threading
+
+import pytest
+
+from app import observation
+from app.agent.toolcall import ToolCallAgent
+from app.observation import ObservationStore
+from app.schema import Function, Memory, ToolCall
+from app.tool import ToolCollection
+from app.tool.base import BaseTool
+from app.tool.read_observation import ReadObservation
+
+
+class Flood(BaseTool):
+    name: str = "flood"
+    description: str = "Prints a lot."
+
+    async def execute(self) -> str:
+        return "".join(f"line {i}\n" for i in range(10000))
+
+
+class Crash(BaseTool):
+    name: str = "crash"
+    description: str = "Fails loudly."
+
+    async def execute(self) -> str:
+        raise RuntimeError("".join(f"frame {i}\n" for i in range(10000)))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch) -> ObservationStore:
+    store = ObservationStore(tmp_path / "observations")
+    monkeypatch.setattr(observation, "_observation_store", store)
+    return store
+
+
+def test_spill_keeps_head_and_tail(store):
+    """Tests that a large output is bounded and saved in full."""
+    text = "".join(f"line {i}\n" for i in range(10000))
+
+    assert store.spill("short", limit=1000) == "short"
+    summary = store.spill(text, limit=1000)
+    assert len(summary) <= 1000 and store.spills == 1
+    assert summary.startswith("line 0\n") and summary.endswith("line 9999\n")
+
+    observation_id = summary.split("`")[1]
+    assert store.read(observation_id, offset=0, limit=len(text)) == text
+    assert store.read(observation_id, offset=7, limit=7) == "line 1\n"
+    with pytest.raises(KeyError):
+        store.read("../config", 0)
+
+
+@pytest.mark.parametrize("limit", [0, 60, 100, 250, 300])
+def test_spill_summary_fits_small_limits(store, limit):
+    """Tests that summaries stay within the limit whenever the notice fits."""
+    text = "x" * 5000
+
+    summary = store.spill(text, limit=limit)
+    observation_id = summary.split("`")[1]
+    assert len(summary) <= max(limit, 50)
+    assert store.read(observation_id, limit=len(text)) == text
+
+
+@pytest.mark.asyncio
+async def test_agent_pages_through_spilled_output(store):
+    """Tests that an agent observes a summary and can read the rest on demand."""
+    agent = ToolCallAgent.model_construct(
+        llm=None,
+        memory=Memory(),
+        available_tools=ToolCollection(Flood(), ReadObservation()),
+        special_tool_names=[],
+        max_observe=2000,
+    )
+    call = ToolCall(id="1", function=Function(name="flood", arguments="{}"))
+
+    result = await agent.execute_tool(call)
+    assert len(result) <= 2000
+    observation_id = result.split("`")[3]
+
+    page = ToolCall(
+        id="2",
+        function=Function(
+            name="read_observation",
+            arguments=f'{{"observation_id": "{observation_id}", "offset": 70, "limit": 16}}',
+        ),
+    )
+    assert (await agent.execute_tool(page)).endswith(
+        "[characters 70-86; continue from offset 86]\nline 10\nline 11\n"
+    )
+
+
+@pytest.mark.asyncio
+async def test_large_errors_are_spilled(store):
+    """Tests that an error is bounded like any other output and kept in full."""
+    agent = ToolCallAgent.model_construct(
+        llm=None,
+        memory=Memory(),
+        available_tools=ToolCollection(Crash()),
+        special_tool_names=[],
+        max_observe=2000,
+    )
+    call = ToolCall(id="1", function=Function(name="crash", arguments="{}"))
+
+    result = await agent.execute_tool(call)
+    assert len(result) <= 2000 and result.startswith("Error: ")
+    assert result.rstrip().endswith("frame 9999") and store.spills == 1
+
+
+def test_prune_keeps_recently_read_outputs(tmp_path):
+    """Tests that the least recently used outputs are deleted past max_bytes."""
+    store = ObservationStore(tmp_path / "observations", max_bytes=15000)
+    old_id = store.spill("a" * 10000, limit=1000).split("`")[1]
+    os.utime(store._path(old_id), (0, 0))
+    new_id = store.spill("b" * 10000, limit=1000).split("`")[1]
+
+    assert store.evictions == 1
+    with pytest.raises(KeyError):
+        store.read(old_id)
+    assert store.read(new_id, limit=3) == "bbb"
+
+
+@pytest.mark.asyncio
+async def test_spills_are_written_off_the_event_loop(store, monkeypatch):
+    """Tests that an agent spills large outputs from a worker thread."""
+    threads = []
+    spill = store.spill
+
+    def recording_spill(text: str, limit: int) -> str:
+        threads.append(threading.get_ident())
+        return spill(text, limit)
+
+    monkeypatch.setattr(store, "spill", recording_spill)
+    agent = ToolCallAgent.model_construct(
+        llm=None,
+        memory=Memory(),
+        available_tools=ToolCollection(Flood()),
+        special_tool_names=[],
+        max_observe=2000,
+    )
+
+    await agent.execute_tool(
+        ToolCall(id="1", function=Function(name="flood", arguments="{}"))
+    )
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,142 @@
+import asyncio
+import json
+from typing import Any, List, Optional, Tuple
+
+import pytest
+
+from app.agent.toolcall import ToolCallAgent
+from app.schema import Function, Memory, ToolCall
+from app.tool import ToolCollection
+from app.tool.base import BaseTool
+from app.tool.str_replace_editor import StrReplaceEditor
+
+
+class Probe(BaseTool):
+    """Parallel-safe tool that records when each call starts and ends."""
+
+    name: str = "probe"
+    description: str = "Waits, then echoes its tag."
+    parallel_safe: bool = True
+    # Shared between probes, so not validated into a copy
+    events: Any = None
+    in_flight: int = 0
+    peak: int = 0
+
+    def conflict_key(self, key: Optional[str] = None, **kwargs) -> Optional[str]:
+        return key
+
+    async def execute(self, tag: str, delay: float = 0.01, **kwargs) -> str:
+        self.events.append(("start", tag))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(delay)
+        self.in_flight -= 1
+        self.events.append(("end", tag))
+        return tag
+
+
+class SerialProbe(Probe):
+    """The same probe, but not safe to run concurrently."""
+
+    name: str = "serial_probe"
+    parallel_safe: bool = False
+
+
+class FinishProbe(Probe):
+    """A parallel-safe probe registered as a special tool."""
+
+    name: str = "finish_probe"
+
+
+def make_agent(events: List[Tuple[str, str]], **kwargs) -> Tuple[ToolCallAgent, Probe]:
+    """Builds a parallel agent whose tools share one event log."""
+    probe = Probe(events=events)
+    agent = ToolCallAgent.model_construct(
+        llm=None,
+        memory=Memory(),
+        available_tools=ToolCollection(
+            probe, SerialProbe(events=events), FinishProbe(events=events)
+        ),
+        special_tool_names=[FinishProbe().name],
+        parallel_tool_calls=True,
+        **kwargs,
+    )
+    return agent, probe
+
+
+def call(tag: str, name: str = "probe", **args) -> ToolCall:
+    return ToolCall(
+        id=tag, function=Function(name=name, arguments=json.dumps({"tag": tag, **args}))
+    )
+
+
+@pytest.mark.asyncio
+async def test_safe_calls_run_together():
+    """Tests that consecutive calls to parallel-safe tools overlap."""
+    events: List[Tuple[str, str]] = []
+    agent, _ = make_agent(events, max_parallel_tools=4)
+
+    await agent._execute_tool_calls([call("a"), call("b"), call("c")])
+    assert [kind for kind, _ in events[:3]] == ["start"] * 3
+
+
+@pytest.mark.asyncio
+async def test_conflicting_calls_run_in_order():
+    """Tests that calls with the same conflict key do not overlap."""
+    events: List[Tuple[str, str]] = []
+    agent, _ = make_agent(events, max_parallel_tools=4)
+
+    await agent._execute_tool_calls(
+        [call("a", key="x"), call("b", key="y"), call("c", key="x")]
+    )
+    assert events.index(("end", "a")) < events.index(("start", "c"))
+    assert events.index(("start", "b")) < events.index(("end", "a"))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", ["serial_probe", "finish_probe"])
+async def test_unsafe_and_special_tools_flush_the_group(name):
+    """Tests that a call to an unsafe or special tool runs on its own."""
+    events: List[Tuple[str, str]] = []
+    agent, _ = make_agent(events, max_parallel_tools=4)
+
+    await agent._execute_tool_calls([call("a"), call("b", name=name), call("c")])
+    assert events == [
+        ("start", "a"),
+        ("end", "a"),
+        ("start", "b"),
+        ("end", "b"),
+        ("start", "c"),
+        ("end", "c"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_max_parallel_tools_caps_a_group():
+    """Tests that no more than max_parallel_tools calls run at once."""
+    events: List[Tuple[str, str]] = []
+    agent, probe = make_agent(events, max_parallel_tools=2)
+
+    outcomes = await agent._execute_tool_calls([call(str(i)) for i in range(5)])
+    assert len(outcomes) == 5 and probe.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_results_are_added_in_call_order():
+    """Tests that tool messages follow the calls, not the order they finished in."""
+    events: List[Tuple[str, str]] = []
+    agent, _ = make_agent(events, max_parallel_tools=4)
+    agent.tool_calls = [call("slow", delay=0.05), call("fast", delay=0)]
+
+    await agent.act()
+    assert events.index(("end", "fast")) < events.index(("end", "slow"))
+    assert [m.tool_call_id for m in agent.memory.messages] == ["slow", "fast"]
+
+
+def test_editor_conflicts_by_path():
+    """Tests that edits to the same file share a conflict key."""
+    editor = StrReplaceEditor()
+    assert editor.conflict_key(command="view", path="/a") == editor.conflict_key(
+        command="str_replace", path="/a"
+    )
+    assert editor.conflict_key(path="/a") != editor.conflict_key(path="/b")
@@ -0,0 +1,95 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.llm import CACHE_BREAKPOINT, LLM
+
+
+def make_llm(api_type: str = "openai", breakpoints: bool = True) -> LLM:
+    """Builds an LLM without a client or tokenizer."""
+    llm = object.__new__(LLM)
+    llm.api_type = api_type
+    llm.prefix_cache = True
+    llm.prefix_cache_breakpoints = breakpoints
+    return llm
+
+
+def tool(name: str) -> dict:
+    return {
+        "type": "function",
+        "function": {
+            "parameters": {"type": "object", "properties": {}},
+            "name": name,
+            "description": f"The {name} tool.",
+        },
+    }
+
+
+def make_params(*names: str) -> dict:
+    return {
+        "messages": [
+            {"role": "system", "content": "You are an agent."},
+            {"role": "user", "content": "hi"},
+        ],
+        "tools": [tool(name) for name in names],
+    }
+
+
+def test_tools_serialize_canonically():
+    """Tests that the same tools in any order serialize to the same bytes."""
+    llm = make_llm(breakpoints=False)
+    first, second = make_params("bash", "browser"), make_params("browser", "bash")
+
+    llm._stabilize_prefix(first)
+    llm._stabilize_prefix(second)
+    assert [t["function"]["name"] for t in first["tools"]] == ["bash", "browser"]
+    assert json.dumps(first) == json.dumps(second)
+    assert list(first["tools"][0]["function"]) == [
+        "description",
+        "name",
+        "parameters",
+    ]
+    assert first["messages"][0]["content"] == "You are an agent."
+
+
+def test_breakpoints_mark_system_prompt_and_tools():
+    """Tests that cache_control goes on the last tool and the system message."""
+    llm = make_llm()
+    params = make_params("bash", "browser")
+    original = params["messages"]
+
+    llm._stabilize_prefix(params)
+    assert params["tools"][-1]["cache_control"] == CACHE_BREAKPOINT
+    assert "cache_control" not in params["tools"][0]
+    assert params["messages"][0]["content"] == [
+        {
+            "type": "text",
+            "text": "You are an agent.",
+            "cache_control": CACHE_BREAKPOINT,
+        }
+    ]
+    assert params["messages"][1] == {"role": "user", "content": "hi"}
+    # Callers' messages are not modified
+    assert original[0]["content"] == "You are an agent."
+
+
+@pytest.mark.parametrize("llm", [make_llm(api_type="aws"), make_llm(breakpoints=False)])
+def test_breakpoints_are_skipped(llm):
+    """Tests that no cache_control is sent to Bedrock or with breakpoints off."""
+    params = make_params("browser", "bash")
+
+    llm._stabilize_prefix(params)
+    assert "cache_control" not in json.dumps(params)
+    assert [t["function"]["name"] for t in params["tools"]] == ["bash", "browser"]
+
+
+def test_cached_tokens_from_usage():
+    """Tests reading cache hits from OpenAI and Anthropic style usage."""
+    openai = SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=12))
+    anthropic = SimpleNamespace(prompt_tokens_details=None, cache_read_input_tokens=7)
+
+    assert LLM._cached_tokens(openai) == 12
+    assert LLM._cached_tokens(anthropic) == 7
+    assert LLM._cached_tokens(SimpleNamespace(prompt_tokens=100)) == 0
+    assert LLM._cached_tokens(None) == 0
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import rate_limiter
+from app.rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the limiter sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
+        await real_sleep(0)
+
+
+real_sleep = asyncio.sleep
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(
+        rate_limiter, "time", SimpleNamespace(monotonic=clock.monotonic)
+    )
+    fake_asyncio = SimpleNamespace(**vars(asyncio))
+    fake_asyncio.sleep = clock.sleep
+    monkeypatch.setattr(rate_limiter, "asyncio", fake_asyncio)
+    return clock
+
+
+def test_bucket_refills_continuously(clock):
+    """Tests that a drained bucket refills at capacity per minute, up to capacity."""
+    bucket = TokenBucket(60)
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+
+    clock.now = 0.5
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    # Requests larger than the bucket only wait for a full bucket
+    assert bucket.wait_time(600) == pytest.approx(59.5)
+
+    clock.now = 600
+    bucket.take(0)
+    assert bucket.level == 60
+
+
+@pytest.mark.asyncio
+async def test_requests_admitted_at_rpm_in_arrival_order(clock):
+    """Tests that concurrent acquirers beyond the rpm burst are spaced out."""
+    limiter = RateLimiter("test", rpm=3)
+    admitted = []
+
+    async def request(index: int):
+        async with limiter.acquire():
+            admitted.append((index, clock.now))
+
+    await asyncio.gather(*(request(i) for i in range(5)))
+
+    assert [index for index, _ in admitted] == [0, 1, 2, 3, 4]
+    assert [at for _, at in admitted] == pytest.approx([0, 0, 0, 20, 40])
+    assert limiter.stats()["admitted"] == 5
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap():
+    """Tests that no more than max_concurrency requests are in flight."""
+    limiter = RateLimiter("test", max_concurrency=2)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with limiter.acquire():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(6)))
+    assert (peak, limiter.in_flight, limiter.admitted) == (2, 0, 6)
+
+
+def test_limiter_survives_a_new_event_loop():
+    """Tests that one limiter can be used from successive event loops."""
+    limiter = RateLimiter("test", max_concurrency=1)
+
+    async def contend():
+        async def request():
+            async with limiter.acquire():
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(request(), request())
+
+    asyncio.run(contend())
+    asyncio.run(contend())
+    assert limiter.admitted == 4
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import APITimeoutError, AuthenticationError, BadRequestError, RateLimitError
+
+from app.retry import RetryPolicy, classify_error, get_retry_after, llm_retry
+
+
+REQUEST = httpx.Request("POST", "https://llm.example/v1/chat/completions")
+
+
+def status_error(cls, status: int, headers=None):
+    response = httpx.Response(status, headers=headers, request=REQUEST)
+    return cls("error", response=response, body=None)
+
+
+def test_classification():
+    """Tests which errors are retried."""
+    assert classify_error(status_error(RateLimitError, 429)) == "rate_limit"
+    assert classify_error(APITimeoutError(REQUEST)) == "timeout"
+    assert classify_error(asyncio.TimeoutError()) == "timeout"
+    assert classify_error(httpx.ConnectError("refused")) == "connection"
+    assert classify_error(status_error(BadRequestError, 400)) is None
+    assert classify_error(status_error(AuthenticationError, 401)) is None
+    assert classify_error(ValueError("bad tool_choice")) is None
+
+
+def test_retry_after_is_honoured():
+    """Tests that the server-requested delay overrides a shorter backoff."""
+    policy = RetryPolicy(min_wait=0.01, max_wait=0.01)
+
+    def wait_after(error) -> float:
+        outcome = SimpleNamespace(exception=lambda: error)
+        return policy._wait(SimpleNamespace(outcome=outcome, attempt_number=1))
+
+    assert wait_after(status_error(RateLimitError, 429, {"retry-after": "2"})) == 2.0
+    assert wait_after(
+        status_error(RateLimitError, 429, {"retry-after-ms": "1500"})
+    ) == pytest.approx(1.5)
+    assert wait_after(status_error(RateLimitError, 429)) == 0.01
+
+    dated = status_error(
+        RateLimitError, 429, {"retry-after": "Thu, 01 Jan 1970 00:00:00 GMT"}
+    )
+    assert get_retry_after(dated) == 0.0
+
+
+class Flaky:
+    """Fails with the given error a number of times before succeeding."""
+
+    def __init__(self, policy: RetryPolicy, error: Exception, failures: int):
+        self.retry_policy = policy
+        self.error = error
+        self.failures = failures
+        self.attempts = 0
+
+    @llm_retry
+    async def ask(self) -> str:
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise self.error
+        return "ok"
+
+
+@pytest.mark.asyncio
+async def test_retries_only_retryable_errors():
+    """Tests that transient errors are retried and others fail at once."""
+    policy = RetryPolicy(max_attempts=5, min_wait=0.001, max_wait=0.001)
+
+    flaky = Flaky(policy, APITimeoutError(REQUEST), failures=2)
+    assert await flaky.ask() == "ok"
+    assert flaky.attempts == 3
+
+    rejected = Flaky(policy, status_error(BadRequestError, 400), failures=2)
+    with pytest.raises(BadRequestError):
+        await rejected.ask()
+    assert rejected.attempts == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_at_the_deadline():
+    """Tests that no retry is attempted once its sleep would pass the deadline."""
+    policy = RetryPolicy(max_attempts=100, deadline=0.1, min_wait=0.03, max_wait=0.03)
+    flaky = Flaky(policy, APITimeoutError(REQUEST), failures=100)
+
+    start = time.monotonic()
+    with pytest.raises(APITimeoutError):
+        await flaky.ask()
+    assert time.monotonic() - start < 0.1
+    assert 2 <= flaky.attempts <= 4
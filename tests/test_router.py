@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import APITimeoutError
+
+from app.router import HedgePolicy, LLMRouter
+
+
+REQUEST = httpx.Request("POST", "https://llm.example/v1/chat/completions")
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_and_loser_cancelled():
+    """Tests that a backup request fires after the delay and the loser is cancelled."""
+    policy = HedgePolicy(percentile=50, min_samples=1)
+    policy.latencies.append(0.02)
+    started, cancelled = [], []
+
+    async def call():
+        attempt = len(started)
+        started.append(asyncio.get_running_loop().time())
+        try:
+            await asyncio.sleep(1.0 if attempt == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+        return attempt
+
+    assert await policy.run(call) == 1
+    assert started[1] - started[0] >= 0.02
+    await asyncio.sleep(0)
+    assert cancelled == [0]
+    assert (policy.hedges, policy.hedge_wins) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_fast_call_is_not_hedged():
+    """Tests that calls finishing within the delay send a single request."""
+    policy = HedgePolicy(percentile=50, min_samples=1)
+    policy.latencies.append(0.5)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return "ok"
+
+    assert await policy.run(call) == "ok"
+    assert (len(calls), policy.hedges) == (1, 0)
+
+
+def endpoints(*names):
+    return [SimpleNamespace(config_name=name) for name in names]
+
+
+@pytest.mark.asyncio
+async def test_router_fails_over_on_retryable_errors():
+    """Tests that a timed-out endpoint hands the call to the next one."""
+    router = LLMRouter(endpoints("primary", "backup"))
+    tried = []
+
+    async def run(endpoint):
+        tried.append(endpoint.config_name)
+        if endpoint.config_name == "primary":
+            raise APITimeoutError(REQUEST)
+        return endpoint.config_name
+
+    assert await router.call(run) == "backup"
+    assert tried == ["primary", "backup"]
+    assert router.health["primary"].failures == 1
+    assert router.health["backup"].requests == 1
+
+
+@pytest.mark.asyncio
+async def test_router_raises_non_retryable_errors_at_once():
+    """Tests that errors every endpoint would return are not failed over."""
+    router = LLMRouter(endpoints("primary", "backup"))
+    tried = []
+
+    async def run(endpoint):
+        tried.append(endpoint.config_name)
+        raise ValueError("invalid request")
+
+    with pytest.raises(ValueError):
+        await router.call(run)
+    assert tried == ["primary"]
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.config import ServerSettings
+from app.exceptions import SessionQueueFull
+from app.llm import LLM, track_token_usage
+from app.service.session import SessionManager, SessionStatus
+
+
+def make_manager(runner, **settings) -> SessionManager:
+    return SessionManager(settings=ServerSettings(**settings), runner=runner)
+
+
+@pytest.mark.asyncio
+async def test_admission_limits():
+    """Tests the global and per-tenant concurrency limits."""
+    running = []
+    peak = {"total": 0, "a": 0}
+    release = asyncio.Event()
+
+    async def runner(session):
+        running.append(session.tenant)
+        peak["total"] = max(peak["total"], len(running))
+        peak["a"] = max(peak["a"], running.count("a"))
+        await release.wait()
+        running.remove(session.tenant)
+        return "done"
+
+    manager = make_manager(runner, max_concurrent_sessions=3, max_sessions_per_tenant=2)
+    sessions = [manager.submit("task", tenant="a") for _ in range(3)]
+    sessions += [manager.submit("task", tenant="b") for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    assert manager.stats()["running"] == 3
+    assert manager.stats()["tenants"]["a"]["running"] == 2
+
+    release.set()
+    await asyncio.gather(*(s._task for s in sessions))
+    assert peak == {"total": 3, "a": 2}
+    assert all(s.status == SessionStatus.COMPLETED for s in sessions)
+    assert sessions[0].result == "done"
+
+
+@pytest.mark.asyncio
+async def test_queue_full_and_cancel():
+    """Tests rejecting submissions past the queue limit and cancelling."""
+
+    async def runner(session):
+        await asyncio.sleep(10)
+
+    manager = make_manager(runner, max_concurrent_sessions=1, max_queued_sessions=1)
+    running = manager.submit("first")
+    await asyncio.sleep(0)
+    queued = manager.submit("second")
+    with pytest.raises(SessionQueueFull):
+        manager.submit("third")
+
+    assert manager.cancel(queued.id)
+    await manager.shutdown()
+    assert queued.status == SessionStatus.CANCELLED
+    assert running.status == SessionStatus.CANCELLED
+    assert not manager.cancel(running.id)
+
+
+@pytest.mark.asyncio
+async def test_events_and_failure():
+    """Tests event replay for late subscribers and failure reporting."""
+
+    async def runner(session):
+        session.emit("step", result="thinking")
+        raise ValueError("boom")
+
+    manager = make_manager(runner)
+    session = manager.submit("task")
+    await session._task
+
+    events = [payload["event"] async for payload in session.events()]
+    assert events == ["queued", "running", "step", "failed"]
+    assert session.error == "ValueError: boom"
+
+
+def test_token_limit_is_per_session():
+    """Tests that max_input_tokens applies to each session's own usage."""
+    llm = object.__new__(LLM)
+    llm.max_input_tokens = 100
+    llm.total_input_tokens = 10_000  # used by earlier sessions
+
+    assert not llm.check_token_limit(10)
+    with track_token_usage(budget=True) as usage:
+        usage.input_tokens = 60
+        with track_token_usage():
+            assert llm.check_token_limit(40)
+            assert not llm.check_token_limit(41)
+            assert "Current: 60" in llm.get_limit_error_message(41)
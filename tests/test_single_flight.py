@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.llm import LLM, SingleFlight, _record_usage, track_token_usage
+
+
+class Provider:
+    """Counts calls and answers once released."""
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def call(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        _record_usage(10, 5)
+        return f"answer {self.calls}"
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_join_one_flight():
+    """Tests that concurrent callers share a call and each is charged for it."""
+    flights, provider = SingleFlight(), Provider()
+
+    async def caller():
+        with track_token_usage() as usage:
+            result = await flights.do("key", provider.call)
+        return result, usage.total_tokens
+
+    tasks = [asyncio.create_task(caller()) for _ in range(3)]
+    await asyncio.sleep(0)
+    provider.release.set()
+
+    assert await asyncio.gather(*tasks) == [("answer 1", 15)] * 3
+    assert flights.stats() == {"calls": 1, "coalesced": 2, "in_flight": 0}
+
+    # A finished flight is not joined by later callers
+    assert await flights.do("key", provider.call) == "answer 2"
+
+
+@pytest.mark.asyncio
+async def test_call_cancelled_only_when_every_caller_left():
+    """Tests that the shared call outlives callers until the last one leaves."""
+    flights, provider = SingleFlight(), Provider()
+    first = asyncio.create_task(flights.do("key", provider.call))
+    second = asyncio.create_task(flights.do("key", provider.call))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0.01)
+    assert provider.cancelled == 0
+    provider.release.set()
+    assert await second == "answer 1"
+
+    provider.release.clear()
+    third = asyncio.create_task(flights.do("key", provider.call))
+    await asyncio.sleep(0)
+    third.cancel()
+    await asyncio.sleep(0.01)
+    assert provider.cancelled == 1
+    assert flights.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_only_deterministic_requests_are_coalesced():
+    """Tests that sampled requests each get their own provider call."""
+    llm = object.__new__(LLM)
+    llm._router = llm.endpoint_names = llm.hedge_policy = llm.rate_limiter = None
+    llm.coalesce_requests = True
+    llm.single_flight = SingleFlight()
+    provider = Provider()
+    provider.release.set()
+
+    async def ask(temperature: float):
+        params = {"temperature": temperature}
+        return await asyncio.gather(
+            *(
+                llm._dispatch("key", params, 0, lambda llm, p: provider.call())
+                for _ in range(2)
+            )
+        )
+
+    assert await ask(0.7) == ["answer 1", "answer 2"]
+    assert await ask(0) == ["answer 3", "answer 3"]
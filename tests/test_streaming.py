@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from app.cache import ResponseCache
+from app.llm import LLM, TokenCounter
+from app.retry import RetryPolicy
+from app.schema import Message
+from app.streaming import (
+    CallbackSink,
+    QueueSink,
+    StdoutSink,
+    get_stream_sink,
+    stream_to,
+)
+
+
+@pytest.mark.asyncio
+async def test_queue_sink_applies_backpressure():
+    """Tests that send waits for the consumer once the queue is full."""
+    sink = QueueSink(maxsize=1)
+    await sink.send("a")
+    blocked = asyncio.create_task(sink.send("b"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    received = []
+
+    async def consume():
+        async for text in sink:
+            received.append(text)
+
+    consumer = asyncio.create_task(consume())
+    await blocked
+    await sink.send("c")
+    await sink.close()
+    # Iteration ends at the end-of-stream marker
+    await asyncio.wait_for(consumer, timeout=1)
+    assert received == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_stream_to_is_scoped_per_task():
+    """Tests that concurrent tasks stream to their own sinks."""
+    seen = {}
+
+    async def session(name: str):
+        sink = QueueSink()
+        with stream_to(sink):
+            await asyncio.sleep(0.01)
+            seen[name] = get_stream_sink() is sink
+            # Tasks spawned inside the context inherit its sink
+            seen[f"{name}-child"] = await asyncio.create_task(
+                asyncio.sleep(0, result=get_stream_sink() is sink)
+            )
+
+    await asyncio.gather(session("a"), session("b"))
+    assert all(seen.values()) and len(seen) == 4
+    assert isinstance(get_stream_sink(), StdoutSink)
+
+    explicit = QueueSink()
+    with stream_to(QueueSink()):
+        assert get_stream_sink(explicit) is explicit
+
+
+@pytest.mark.asyncio
+async def test_cached_response_is_replayed_to_sink(tmp_path):
+    """Tests that a streamed ask answered from the cache still reaches the sink."""
+    llm = object.__new__(LLM)
+    llm.model, llm.max_tokens, llm.temperature = "gpt-4o-mini", 100, 0
+    llm.max_images = llm.image_processor = llm.max_input_tokens = None
+    llm.prefix_cache = False
+    llm.token_counter = TokenCounter(tokenizer=SimpleNamespace(encode=str.split))
+    llm.cache = ResponseCache(tmp_path / "cache.sqlite")
+    llm.retry_policy = RetryPolicy(max_attempts=1)
+    calls = []
+
+    async def dispatch(request_key, params, input_tokens, complete, sink=None):
+        calls.append(request_key)
+        return "cached answer"
+
+    llm._dispatch = dispatch
+    messages = [Message.user_message("hello")]
+    assert await llm.ask(messages, stream=False) == "cached answer"
+
+    chunks: List[str] = []
+    with stream_to(CallbackSink(chunks.append)):
+        assert await llm.ask(messages, stream=True) == "cached answer"
+    assert chunks == ["cached answer"] and len(calls) == 1
@@ -0,0 +1,49 @@
+from app.llm import TokenCounter
+from app.schema import Message
+
+
+class CountingTokenizer:
+    """Splits on whitespace and counts how often it was called."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text: str) -> list:
+        self.calls += 1
+        return text.split()
+
+
+def test_seen_messages_skip_the_tokenizer():
+    """Tests that a message already counted is served from the memo."""
+    tokenizer = CountingTokenizer()
+    counter = TokenCounter(tokenizer)
+    message = Message.user_message("one two three")
+
+    tokens = counter.count_message(message)
+    calls = tokenizer.calls
+    # An equal message built separately hits the memo too
+    assert counter.count_message(Message.user_message("one two three")) == tokens
+    assert counter.count_message(message.to_dict()) == tokens
+    assert tokenizer.calls == calls
+
+    assert counter.count_message(Message.user_message("one two")) == tokens - 1
+    assert tokenizer.calls > calls
+
+
+def test_memo_is_bounded():
+    """Tests that the memo keeps at most MESSAGE_CACHE_SIZE counts."""
+    tokenizer = CountingTokenizer()
+    counter = TokenCounter(tokenizer)
+    size = TokenCounter.MESSAGE_CACHE_SIZE
+    assert size == 4096
+
+    for i in range(size + 10):
+        counter.count_message(Message.user_message(f"message {i}"))
+    assert len(counter._message_cache) == size
+
+    # The oldest counts were evicted, the newest are still served from the memo
+    calls = tokenizer.calls
+    counter.count_message(Message.user_message(f"message {size + 9}"))
+    assert tokenizer.calls == calls
+    counter.count_message(Message.user_message("message 0"))
+    assert tokenizer.calls > calls
@@ -0,0 +1,138 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent.toolcall import ToolCallAgent
+from app.exceptions import ToolStreamInterrupted
+from app.llm import LLM
+from app.schema import Function, Memory, ToolCall
+from app.tool import ToolCollection
+from app.tool.base import BaseTool
+
+
+def chunk(content=None, index=None, call_id=None, name=None, arguments=None):
+    """Builds a streamed chat completion chunk."""
+    tool_calls = None
+    if index is not None:
+        function = SimpleNamespace(name=name, arguments=arguments)
+        tool_calls = [SimpleNamespace(index=index, id=call_id, function=function)]
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+async def stream(chunks, error=None):
+    for item in chunks:
+        yield item
+    if error is not None:
+        raise error
+
+
+CHUNKS = [
+    chunk(content="Looking "),
+    chunk(index=0, call_id="call_a", name="search", arguments='{"q": '),
+    chunk(index=0, arguments='"a"}'),
+    chunk(content="it up"),
+    chunk(index=1, call_id="call_b", name="search", arguments='{"q": "b"'),
+    chunk(index=1, arguments="}"),
+]
+
+
+def make_llm() -> LLM:
+    """Builds an LLM without constructing a client."""
+    return object.__new__(LLM)
+
+
+@pytest.mark.asyncio
+async def test_stream_assembles_and_dispatches_calls():
+    """Tests that each tool call is handed out as soon as its arguments close."""
+    dispatched = []
+
+    def on_tool_call(call: ToolCall):
+        dispatched.append((call.id, call.function.arguments, len(dispatched)))
+
+    message = await make_llm()._collect_tool_stream(stream(CHUNKS), on_tool_call)
+
+    assert message.content == "Looking it up"
+    assert [(c.id, c.function.arguments) for c in message.tool_calls] == [
+        ("call_a", '{"q": "a"}'),
+        ("call_b", '{"q": "b"}'),
+    ]
+    assert dispatched == [("call_a", '{"q": "a"}', 0), ("call_b", '{"q": "b"}', 1)]
+
+
+@pytest.mark.asyncio
+async def test_stream_failure_after_dispatch_is_not_retryable():
+    """Tests that a stream failing after a dispatch is reported, not retried."""
+    llm = make_llm()
+    with pytest.raises(ToolStreamInterrupted) as raised:
+        await llm._collect_tool_stream(
+            stream(CHUNKS[:3], ConnectionError("reset")), lambda call: None
+        )
+    assert raised.value.dispatched == ["call_a"]
+
+    with pytest.raises(ConnectionError):
+        await llm._collect_tool_stream(
+            stream(CHUNKS[:2], ConnectionError("reset")), lambda call: None
+        )
+
+
+class SlowTool(BaseTool):
+    name: str = "search"
+    description: str = "Searches slowly."
+    runs: list = []
+
+    async def execute(self, q: str) -> str:
+        await asyncio.sleep(0.05)
+        self.runs.append(q)
+        return q
+
+
+def make_agent(ask_tool) -> ToolCallAgent:
+    """Builds a streaming agent around a fake ask_tool."""
+    return ToolCallAgent.model_construct(
+        llm=SimpleNamespace(ask_tool=ask_tool),
+        memory=Memory(),
+        available_tools=ToolCollection(SlowTool(runs=[])),
+        stream_tool_calls=True,
+        next_step_prompt=None,
+    )
+
+
+def search(call_id: str, q: str) -> ToolCall:
+    return ToolCall(
+        id=call_id, function=Function(name="search", arguments=f'{{"q": "{q}"}}')
+    )
+
+
+@pytest.mark.asyncio
+async def test_calls_missing_from_final_response_are_cancelled():
+    """Tests that early-dispatched calls the final response drops are cancelled."""
+
+    async def ask_tool(on_tool_call, **kwargs):
+        on_tool_call(search("call_a", "a"))
+        on_tool_call(search("call_b", "b"))
+        return SimpleNamespace(content="", tool_calls=[search("call_b", "b")])
+
+    agent = make_agent(ask_tool)
+    assert await agent.think()
+
+    assert [call.id for call in agent.tool_calls] == ["call_b"]
+    assert list(agent._dispatched_tools) == ["call_b"]
+    assert await agent.act() == "Observed output of cmd `search` executed:\nb"
+    assert agent.available_tools.get_tool("search").runs == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_interrupted_stream_is_noted_instead_of_retried():
+    """Tests that an agent records calls started by a failed stream."""
+
+    async def ask_tool(on_tool_call, **kwargs):
+        on_tool_call(search("call_a", "a"))
+        raise ToolStreamInterrupted("stream reset", dispatched=["call_a"])
+
+    agent = make_agent(ask_tool)
+    assert not await agent.think()
+
+    assert agent._dispatched_tools == {}
+    assert "call_a (search)" in agent.memory.messages[-1].content
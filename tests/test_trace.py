@@ -0,0 +1,94 @@
+import pytest
+from openai.types.chat import ChatCompletionMessage
+
+from app.exceptions import ToolError, TraceMiss
+from app.tool.base import BaseTool, ToolFailure
+from app.tool.tool_collection import ToolCollection
+from app.trace import get_trace, record_trace, replay_trace
+
+
+class EchoTool(BaseTool):
+    name: str = "echo"
+    description: str = "Echoes its input."
+    calls: int = 0
+
+    async def execute(self, text: str) -> str:
+        self.calls += 1
+        if text == "fail":
+            raise ToolError("cannot echo")
+        return text
+
+
+llm_calls = []
+
+
+def fake_llm(response):
+    """Builds an LLM call that must only run while recording."""
+
+    async def call():
+        llm_calls.append(response)
+        return response
+
+    return call
+
+
+async def run_calls(tools: ToolCollection):
+    trace = get_trace()
+    text = await trace.llm("ask-key", fake_llm("plan"))
+    message = await trace.llm(
+        "tool-key", fake_llm(ChatCompletionMessage(role="assistant", content="x"))
+    )
+    echoed = await tools.execute(name="echo", tool_input={"text": "hi"})
+    failed = await tools.execute(name="echo", tool_input={"text": "fail"})
+    return text, message, echoed, failed
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay(tmp_path):
+    """Tests that a replay returns recorded results without running calls."""
+    path = tmp_path / "trace.jsonl"
+    tool = EchoTool()
+    tools = ToolCollection(tool)
+
+    with record_trace(path):
+        recorded = await run_calls(tools)
+    assert (len(llm_calls), tool.calls) == (2, 2)
+
+    with replay_trace(path) as trace:
+        replayed = await run_calls(tools)
+    assert (len(llm_calls), tool.calls) == (2, 2)
+    assert trace.hits == 4
+
+    assert replayed[0] == recorded[0] == "plan"
+    assert replayed[1].content == "x"
+    assert replayed[2] == "hi"
+    assert isinstance(replayed[3], ToolFailure)
+    assert replayed[3].error == "cannot echo"
+
+
+@pytest.mark.asyncio
+async def test_replay_miss(tmp_path):
+    """Tests fallback to recorded order, and strict mode raising instead."""
+    path = tmp_path / "trace.jsonl"
+    with record_trace(path) as trace:
+        await trace.llm("recorded-key", fake_llm("answer"))
+
+    with replay_trace(path) as trace:
+        assert await trace.llm("other-key", fake_llm("live")) == "answer"
+        assert trace.fallbacks == 1
+
+    with replay_trace(path, strict=True) as trace:
+        with pytest.raises(TraceMiss):
+            await trace.llm("other-key", fake_llm("live"))
+
+
+@pytest.mark.asyncio
+async def test_replay_empty_tool_response(tmp_path):
+    """Tests that an ask_tool call that returned None replays as None."""
+    path = tmp_path / "trace.jsonl"
+    with record_trace(path) as trace:
+        assert await trace.llm("tool-key", fake_llm(None)) is None
+
+    with replay_trace(path, strict=True) as trace:
+        assert await trace.llm("tool-key", fake_llm("live")) is None
+        assert trace.hits == 1
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.config import HTTPSettings
+from app.transport import PooledTransport
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def test_client_survives_a_new_event_loop(server_url):
+    """Tests that one shared client works from successive event loops."""
+    transport = PooledTransport(HTTPSettings(max_connections_per_host=2))
+    client = httpx.AsyncClient(transport=transport)
+
+    async def fetch():
+        responses = await asyncio.gather(*(client.get(server_url) for _ in range(4)))
+        return [response.text for response in responses]
+
+    assert asyncio.run(fetch()) == ["ok"] * 4
+    assert asyncio.run(fetch()) == ["ok"] * 4
+    # Connections were reused within each loop but not carried across them
+    assert transport.stats()["requests"] == 8
+    assert transport.connections_opened == 4